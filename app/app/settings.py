@@ -37,17 +37,21 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'core',
     'user',
+    'product',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'user.middleware.LastSeenMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -85,9 +89,48 @@ DATABASES = {
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        # Keep connections open between requests instead of paying the
+        # TCP and authentication handshake every time
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        # Check a reused connection before handing it to a request
+        # (Django 4.1+, ignored by older versions)
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+        },
+    }
+}
+
+# Threads (and so database connections) each process uses to run the
+# queries of async views
+ASYNC_ORM_THREADS = int(os.environ.get('ASYNC_ORM_THREADS', 10))
+
+# Open the database connection and load the in-memory caches when a worker
+# process starts instead of on its first request
+DB_WARM_UP_ON_STARTUP = os.environ.get('DB_WARM_UP_ON_STARTUP', '1') == '1'
+
+# Cache
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+# Process-local caches share their version stamps through this cache, and
+# the sql_stats command reads the totals of every worker from it, so it
+# must be shared by all workers (docker-compose runs memcached).  Set
+# CACHE_BACKEND and CACHE_LOCATION, e.g.
+# django.core.cache.backends.memcached.PyMemcacheCache and 127.0.0.1:11211;
+# the LocMemCache default only suits tests and a single process.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
+# Seconds a process-local cache trusts its data before checking the shared
+# version stamp again
+CACHE_VERSION_CHECK_INTERVAL = 5
+
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
 
@@ -128,4 +171,98 @@ STATIC_URL = '/static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT = '/vol/web/static'
+# Stream every upload to a temporary file instead of holding it in memory
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
 AUTH_USER_MODEL = 'core.User'
+
+AUTHENTICATION_BACKENDS = ['user.backends.LockoutModelBackend']
+
+# Django's defaults plus plain bcrypt, used by the legacy member base.
+# Legacy hashes are upgraded to the first hasher on the next login.
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.BCryptPasswordHasher',
+]
+
+# Failed logins are counted by this backend, outside of the users table
+LOGIN_FAILURE_COUNTER = os.environ.get(
+    'LOGIN_FAILURE_COUNTER', 'user.lockout.CacheCounterBackend'
+)
+# Failed logins for one email within the window that lock the account
+LOGIN_FAILURE_LIMIT = 5
+LOGIN_FAILURE_WINDOW = 10 * 60
+# Failed logins from one client address within the window after which
+# its logins are refused without checking passwords; None turns the
+# address throttle off
+LOGIN_FAILURE_IP_LIMIT = 100
+LOGIN_FAILURE_IP_WINDOW = 10 * 60
+# Behind a proxy or load balancer REMOTE_ADDR is the proxy, shared by all
+# clients.  Name the request header the trusted proxies append the client
+# address to (e.g. HTTP_X_FORWARDED_FOR) and how many of them append to it
+LOGIN_CLIENT_ADDRESS_HEADER = (
+    os.environ.get('LOGIN_CLIENT_ADDRESS_HEADER') or None
+)
+LOGIN_TRUSTED_PROXY_COUNT = int(os.environ.get('LOGIN_TRUSTED_PROXY_COUNT', 1))
+# Seconds an account stays locked the first time, doubling with every
+# further lock up to the maximum
+LOGIN_LOCK_DURATION = 15 * 60
+LOGIN_LOCK_MAX_DURATION = 24 * 60 * 60
+
+# Seconds between writes of the buffered last seen timestamps, and users
+# written per statement
+LAST_SEEN_FLUSH_INTERVAL = int(os.environ.get('LAST_SEEN_FLUSH_INTERVAL', 30))
+LAST_SEEN_BATCH_SIZE = 1000
+
+# Phone verification codes: seconds a code is valid, its length, wrong
+# guesses allowed per code and codes issued per number within the window
+PHONE_CODE_TTL = 3 * 60
+PHONE_CODE_LENGTH = 6
+PHONE_CODE_MAX_ATTEMPTS = 5
+PHONE_CODE_ISSUE_LIMIT = 5
+PHONE_CODE_ISSUE_WINDOW = 60 * 60
+
+# Name of the ProductStatus a product is moved to when it has been sold
+SOLD_PRODUCT_STATUS = '판매완료'
+
+# Resized variants generated for every product image, by longest edge
+IMAGE_DERIVATIVE_SIZES = {
+    'thumbnail': 240,
+    'medium': 720,
+    'large': 1440,
+}
+IMAGE_DERIVATIVE_FORMATS = ('JPEG', 'WEBP')
+# Processes rendering derivatives, None for one per CPU
+IMAGE_DERIVATIVE_WORKERS = None
+
+# Boundaries of the price facet buckets and seconds facet counts are
+# cached for a filter set
+FACET_PRICE_BUCKETS = (100000, 500000, 1000000, 5000000)
+FACET_CACHE_TIMEOUT = 60
+
+# Generated related products kept per product
+RECOMMENDATION_TOP_K = 12
+
+# Product detail pages cached in every process, least recently used first
+# out
+PRODUCT_DETAIL_CACHE_SIZE = 1000
+
+# Per-request SQL instrumentation: Server-Timing header, requests slower
+# than SQL_SLOW_REQUEST_MS or running a statement with
+# SQL_REPEATED_QUERY_THRESHOLD different parameters are logged at
+# SQL_SLOW_SAMPLE_RATE, and per-view totals are written to the cache
+# every SQL_STATS_FLUSH_INTERVAL seconds
+SQL_INSTRUMENTATION = os.environ.get('SQL_INSTRUMENTATION', '1') == '1'
+SQL_SERVER_TIMING = True
+SQL_SLOW_REQUEST_MS = int(os.environ.get('SQL_SLOW_REQUEST_MS', 500))
+SQL_SLOW_SAMPLE_RATE = float(os.environ.get('SQL_SLOW_SAMPLE_RATE', 0.1))
+SQL_REPEATED_QUERY_THRESHOLD = 5
+SQL_STATS_FLUSH_INTERVAL = 10
+
+# Admin changelists show the planner's row estimate instead of counting
+# results larger than this
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 10000
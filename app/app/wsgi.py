@@ -9,8 +9,17 @@ https://docs.djangoproject.com/en/3.1/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_wsgi_application()
+
+# Runs once per worker process. Servers that import the application before
+# forking (gunicorn --preload) would share the connection between workers,
+# so disable it there with DB_WARM_UP_ON_STARTUP=0.
+if settings.DB_WARM_UP_ON_STARTUP:
+    from core.db import warm_up
+
+    warm_up()
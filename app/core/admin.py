@@ -1 +1,120 @@
-# from django.contrib import admin
+from django.contrib import admin
+from django.contrib.auth import forms as auth_forms
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+
+from core import models
+from core.admin_pagination import KeysetModelAdmin
+from core.exports import export_csv, export_xlsx
+from core.search import search_products
+
+
+@admin.register(models.Brand)
+class BrandAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kor_name', 'eng_name']
+    ordering = ['kor_name']
+    search_fields = ['kor_name', 'eng_name', 'kor_letters']
+
+
+@admin.register(models.Product)
+class ProductAdmin(KeysetModelAdmin):
+    list_display = [
+        'id', 'name', 'brand', 'user', 'product_status', 'product_grade',
+        'price', 'created_at',
+    ]
+    list_select_related = ['brand', 'user', 'product_status', 'product_grade']
+    # Each of these columns is the first of an index
+    list_filter = ['product_status', 'sell_category', 'product_grade']
+    search_fields = ['name']
+    autocomplete_fields = ['brand', 'user']
+    raw_id_fields = ['order', 'agreement']
+    readonly_fields = ['current_price']
+    actions = [export_csv, export_xlsx]
+
+    def save_model(self, request, obj, form, change):
+        """Record a new or changed price in the price history, which
+        keeps current_price pointing at the up-to-date row"""
+        super().save_model(request, obj, form, change)
+        if 'price' in form.changed_data and obj.price is not None:
+            models.PriceHistory.objects.record_price(obj, obj.price)
+
+    def get_search_results(self, request, queryset, search_term):
+        """Search with the indexed search columns instead of a
+        sequential scan for the name, or match an id"""
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        if search_term.isdigit():
+            return queryset.filter(pk=search_term), False
+        return search_products(queryset, search_term), False
+
+
+class UserCreationForm(auth_forms.UserCreationForm):
+    """Add form hashing the password of a user signing in by email"""
+
+    class Meta(auth_forms.UserCreationForm.Meta):
+        model = models.User
+        fields = ['email', 'name', 'phone_number']
+        field_classes = {}
+
+
+class UserChangeForm(auth_forms.UserChangeForm):
+    """Change form showing the password hash read-only"""
+
+    class Meta(auth_forms.UserChangeForm.Meta):
+        model = models.User
+        field_classes = {}
+
+
+@admin.register(models.User)
+class UserAdmin(KeysetModelAdmin, BaseUserAdmin):
+    form = UserChangeForm
+    add_form = UserCreationForm
+    # Every field, as a plain ModelAdmin shows them
+    fieldsets = None
+    add_fieldsets = [
+        (None, {
+            'classes': ['wide'],
+            'fields': [
+                'email', 'name', 'phone_number', 'password1', 'password2',
+            ],
+        }),
+    ]
+    list_display = ['id', 'email', 'name', 'grade', 'date_created']
+    list_select_related = ['grade']
+    list_filter = ['grade']
+    search_fields = ['email']
+    readonly_fields = [
+        'last_login', 'date_created',
+        *models.User.SEEN_FIELDS,
+        *models.User.COUNTER_FIELDS,
+    ]
+    actions = [export_csv, export_xlsx]
+
+    def get_search_results(self, request, queryset, search_term):
+        """Match the start of the email, which the pattern index Django
+        adds to unique text columns answers"""
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return queryset.filter(email__startswith=search_term), False
+
+
+@admin.register(models.PriceHistory)
+class PriceHistoryAdmin(KeysetModelAdmin):
+    list_display = [
+        'id', 'product', 'price', 'discounted_amount', 'is_uptodate',
+        'created_at',
+    ]
+    list_select_related = ['product']
+    autocomplete_fields = ['product']
+    actions = [export_csv, export_xlsx]
+
+
+@admin.register(models.ProductStatusLog)
+class ProductStatusLogAdmin(KeysetModelAdmin):
+    list_display = [
+        'id', 'product', 'product_status', 'created_at', 'is_valid',
+    ]
+    list_select_related = ['product', 'product_status']
+    list_filter = ['product_status']
+    autocomplete_fields = ['product']
@@ -0,0 +1,108 @@
+"""Bridge from async views to the synchronous ORM.
+
+Queries run in a dedicated thread pool of ASYNC_ORM_THREADS threads.  The
+pool bounds how many queries an async worker runs at once and, since
+Django connections are per thread, how many database connections it
+holds.  Connections are recycled around every call the same way the
+request cycle does, honouring CONN_MAX_AGE, and shutdown() closes them
+on every thread, at exit or when a test is done with the pool.  The
+query tracker of the calling request is installed around every call, so
+core.middleware counts the queries run here.
+"""
+import asyncio
+import atexit
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+from core import query_stats
+
+
+# Seconds shutdown() waits for busy threads to finish their call
+SHUTDOWN_TIMEOUT = 30
+
+_executor = None
+_workers = []
+_executor_lock = threading.Lock()
+
+
+def _count_worker(workers):
+    workers.append(threading.get_ident())
+
+
+def get_executor():
+    global _executor, _workers
+    with _executor_lock:
+        if _executor is None:
+            _workers = []
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ASYNC_ORM_THREADS,
+                thread_name_prefix='orm',
+                initializer=_count_worker,
+                initargs=(_workers,),
+            )
+    return _executor
+
+
+def _call(func, args, kwargs, tracker=None):
+    close_old_connections()
+    try:
+        if tracker is None:
+            context = nullcontext()
+        else:
+            context = query_stats.tracking(tracker)
+        with context:
+            return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def _close_connections(barrier):
+    # Every thread waits until all of them took one of these calls, so
+    # each closes its own connections
+    try:
+        barrier.wait(SHUTDOWN_TIMEOUT)
+    except threading.BrokenBarrierError:
+        pass
+    connections.close_all()
+
+
+def shutdown():
+    """Close the database connections of every ORM thread and stop the
+    pool; the next call starts a new one"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+        workers = len(_workers)
+    if executor is None:
+        return
+    if workers:
+        barrier = threading.Barrier(workers)
+        for _ in range(workers):
+            executor.submit(_close_connections, barrier)
+    executor.shutdown(wait=True)
+
+
+atexit.register(shutdown)
+
+
+async def run_orm(func, *args, **kwargs):
+    """Run a function using the ORM in the ORM thread pool"""
+    loop = asyncio.get_running_loop()
+    # run_in_executor does not carry context variables to the thread
+    tracker = query_stats.current_tracker.get()
+    return await loop.run_in_executor(
+        get_executor(), functools.partial(_call, func, args, kwargs, tracker)
+    )
+
+
+async def gather_orm(*calls):
+    """Run several (func, args...) calls concurrently, returning their
+    results in order"""
+    return await asyncio.gather(
+        *(run_orm(func, *args) for func, *args in calls)
+    )
@@ -0,0 +1,86 @@
+"""In-memory brand autocomplete.
+
+The whole Brand table is small enough to keep in every process as a sorted
+array of (prefix key, brand) pairs.  A lookup is a binary search for the
+first key starting with the prefix followed by a short scan, so answering
+an autocomplete request never touches the database.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+
+from core.cache import VersionedCache
+from core.models import Brand, BrandCategory
+from core.search import to_chosung
+
+
+def normalize(text):
+    """Lowercase text and drop whitespace so prefixes match loosely"""
+    return ''.join((text or '').lower().split())
+
+
+class BrandIndex:
+    """Sorted prefix index over the names of every brand"""
+
+    def __init__(self, brands, categories):
+        self.brands = {}
+        self.categories = categories
+        entries = set()
+        for brand in brands:
+            self.brands[brand['id']] = brand
+            for text in (
+                brand['kor_name'],
+                brand['kor_letters'],
+                to_chosung(brand['kor_name']),
+                brand['eng_name'],
+            ):
+                key = normalize(text)
+                if key:
+                    entries.add((key, brand['id']))
+        entries = sorted(entries)
+        self.keys = [key for key, _ in entries]
+        self.brand_ids = [brand_id for _, brand_id in entries]
+
+    @classmethod
+    def load(cls):
+        """Build the index from the database"""
+        brands = list(
+            Brand.objects.order_by('id').values(
+                'id', 'kor_name', 'kor_letters', 'eng_name'
+            )
+        )
+        categories = defaultdict(set)
+        for brand_id, category_id in BrandCategory.objects.values_list(
+            'brand_id', 'category_id'
+        ):
+            categories[brand_id].add(category_id)
+        return cls(brands, categories)
+
+    def lookup(self, prefix, sell_category=None, limit=10):
+        """Return up to limit brands with a name starting with prefix"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        results = []
+        seen = set()
+        position = bisect_left(self.keys, prefix)
+        while position < len(self.keys) and len(results) < limit:
+            if not self.keys[position].startswith(prefix):
+                break
+            brand_id = self.brand_ids[position]
+            position += 1
+            if brand_id in seen:
+                continue
+            seen.add(brand_id)
+            if (sell_category is not None and sell_category
+                    not in self.categories.get(brand_id, ())):
+                continue
+            results.append(self.brands[brand_id])
+        return results
+
+
+brand_index = VersionedCache('brand_index', BrandIndex.load)
+
+
+def autocomplete_brands(prefix, sell_category=None, limit=10):
+    """Return the brands matching a prefix of any of their names"""
+    return brand_index.get().lookup(prefix, sell_category, limit)
@@ -0,0 +1,306 @@
+"""Benchmark scenarios for the hot read and write paths.
+
+Every scenario is run in process a number of times.  Each run records its
+latency and the number of queries it executed; a report holds the
+percentiles of every scenario together with the commit and the size of
+the main tables, so reports of two commits on the same data set can be
+compared with ``compare``.
+
+Read scenarios send requests through the test client, so URL routing,
+middleware and serialization are included but the network and the web
+server are not.  Write scenarios call the code behind the write endpoints
+inside a transaction that is rolled back, which keeps the data set the
+same from one run to the next.  Samples (product ids, search words,
+emails) are picked with a seeded random.Random before timing starts.
+"""
+import random
+import subprocess
+import time
+
+from django.conf import settings
+from django.contrib.auth import authenticate, get_user_model
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core import statistics
+from core.models import Brand, PriceHistory, Product, ProductStatusLog, Tag
+from core.seeding import BENCHMARK_PASSWORD
+
+
+PERCENTILES = (50, 95, 99)
+COUNTED_MODELS = (Product, PriceHistory, ProductStatusLog, Brand, Tag)
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def get_host():
+    """Return a host name the site accepts, so requests are not refused
+    with a 400 before reaching the view"""
+    hosts = settings.ALLOWED_HOSTS
+    if not hosts:
+        # What DEBUG allows when ALLOWED_HOSTS is empty
+        return 'localhost'
+    if '*' in hosts:
+        return 'testserver'
+    # '.example.com' allows example.com and its subdomains
+    return hosts[0].lstrip('.')
+
+
+def percentile(values, percent):
+    """Return the nearest-rank percentile of sorted values"""
+    index = max(int(round(percent / 100 * len(values))) - 1, 0)
+    return values[min(index, len(values) - 1)]
+
+
+def summarize(latencies, queries):
+    """Return the latency percentiles and query counts of a scenario"""
+    latencies = sorted(latencies)
+    summary = {
+        'requests': len(latencies),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+    }
+    for percent in PERCENTILES:
+        summary['p%d_ms' % percent] = round(
+            percentile(latencies, percent) * 1000, 3
+        )
+    summary['queries_per_request'] = round(sum(queries) / len(queries), 2)
+    summary['max_queries'] = max(queries)
+    return summary
+
+
+class Samples:
+    """Inputs of the scenarios, picked from the data set by a seed"""
+
+    def __init__(self, seed=0, size=100):
+        self.random = random.Random(seed)
+        self.product_ids = self.pick_product_ids(size)
+        if not self.product_ids:
+            raise BenchmarkError('There are no products to benchmark')
+        self.words = [
+            name for name in Tag.objects.order_by('id').values_list(
+                'name', flat=True
+            )[:size] if name
+        ]
+        self.brand_prefixes = [
+            name[:1] for name in Brand.objects.order_by('id').values_list(
+                'kor_name', flat=True
+            )[:size] if name
+        ]
+        self.emails = list(
+            get_user_model().objects.filter(
+                email__endswith='@benchmark.test'
+            ).order_by('id').values_list('email', flat=True)[:size]
+        )
+        self.sold_status_ids = sorted(statistics.get_sold_status_ids())
+
+    def pick_product_ids(self, size):
+        bounds = Product.objects.aggregate(low=Min('id'), high=Max('id'))
+        if bounds['low'] is None:
+            return []
+        # Random ids in the id range rather than ORDER BY random(), which
+        # would sort the whole table
+        wanted = {
+            self.random.randint(bounds['low'], bounds['high'])
+            for _ in range(size * 2)
+        }
+        ids = sorted(
+            Product.objects.filter(id__in=wanted).values_list(
+                'id', flat=True
+            )
+        )
+        return ids or [bounds['low']]
+
+    def pick(self, values, number):
+        return values[number % len(values)]
+
+
+def _get(client, path, params=None):
+    response = client.get(path, params or {})
+    # Timings of error responses say nothing about the view
+    if not 200 <= response.status_code < 400:
+        raise BenchmarkError('%s returned %d %s' % (
+            path, response.status_code, response.reason_phrase
+        ))
+    return response
+
+
+def _rolled_back(function):
+    """Run a write scenario and roll back what it changed"""
+    def run(client, samples, number):
+        with transaction.atomic():
+            function(client, samples, number)
+            transaction.set_rollback(True)
+    run.__doc__ = function.__doc__
+    return run
+
+
+def product_list(client, samples, number):
+    """Newest products, first page"""
+    _get(client, reverse('product:product-list'))
+
+
+def product_list_by_price(client, samples, number):
+    """Cheapest products in a price range"""
+    _get(client, reverse('product:product-list'), {
+        'ordering': 'price', 'min_price': 100000, 'max_price': 5000000,
+    })
+
+
+def product_list_facets(client, samples, number):
+    """Products of a brand with every facet counted"""
+    product = Product.objects.only('brand_id').get(
+        pk=samples.pick(samples.product_ids, number)
+    )
+    _get(client, reverse('product:product-list'), {
+        'brand': product.brand_id, 'facets': 'all',
+    })
+
+
+def product_search(client, samples, number):
+    """Full text search for a tag name"""
+    if not samples.words:
+        raise BenchmarkError('There are no tags to search for')
+    _get(client, reverse('product:product-search'), {
+        'q': samples.pick(samples.words, number),
+    })
+
+
+def brand_autocomplete(client, samples, number):
+    """Brand suggestions for a one letter prefix"""
+    if not samples.brand_prefixes:
+        raise BenchmarkError('There are no brands to suggest')
+    _get(client, reverse('product:brand-autocomplete'), {
+        'q': samples.pick(samples.brand_prefixes, number),
+    })
+
+
+def product_detail(client, samples, number):
+    """Product detail page"""
+    _get(client, reverse(
+        'product:product-detail',
+        args=[samples.pick(samples.product_ids, number)],
+    ))
+
+
+@_rolled_back
+def price_change(client, samples, number):
+    """Record a new price of a product"""
+    product = Product.objects.get(pk=samples.pick(samples.product_ids, number))
+    PriceHistory.objects.record_price(product, (product.price or 0) + 1000)
+
+
+@_rolled_back
+def product_sale(client, samples, number):
+    """Move a product to a sold status, updating the sell statistics"""
+    if not samples.sold_status_ids:
+        raise BenchmarkError('There is no sold product status')
+    product = Product.objects.get(pk=samples.pick(samples.product_ids, number))
+    product.product_status_id = samples.sold_status_ids[0]
+    product.save(update_fields=['product_status'])
+    ProductStatusLog.objects.create(
+        product=product, product_status_id=product.product_status_id
+    )
+
+
+@_rolled_back
+def login(client, samples, number):
+    """Authenticate a seeded user, including the password hash"""
+    if not samples.emails:
+        raise BenchmarkError('There are no seeded users to log in')
+    email = samples.pick(samples.emails, number)
+    if authenticate(email=email, password=BENCHMARK_PASSWORD) is None:
+        raise BenchmarkError('%s could not log in' % email)
+
+
+SCENARIOS = {
+    'product_list': product_list,
+    'product_list_by_price': product_list_by_price,
+    'product_list_facets': product_list_facets,
+    'product_search': product_search,
+    'brand_autocomplete': brand_autocomplete,
+    'product_detail': product_detail,
+    'price_change': price_change,
+    'product_sale': product_sale,
+    'login': login,
+}
+
+
+def run_scenario(scenario, samples, iterations, warmup=5):
+    """Run a scenario and return its summary"""
+    client = Client(HTTP_HOST=get_host())
+    for number in range(warmup):
+        scenario(client, samples, number)
+
+    latencies = []
+    queries = []
+    for number in range(iterations):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            scenario(client, samples, warmup + number)
+            latencies.append(time.perf_counter() - started)
+        queries.append(len(context.captured_queries))
+    return summarize(latencies, queries)
+
+
+def get_commit():
+    """Return the checked out git commit, if there is one"""
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def run_benchmarks(names=None, iterations=100, seed=0, warmup=5):
+    """Run the named scenarios, or all of them, and return the report"""
+    names = names or list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        raise BenchmarkError(
+            'Unknown scenarios: %s' % ', '.join(sorted(unknown))
+        )
+    samples = Samples(seed=seed)
+    return {
+        'commit': get_commit(),
+        'created_at': timezone.now().isoformat(),
+        'database': connection.vendor,
+        'seed': seed,
+        'iterations': iterations,
+        'rows': {
+            model._meta.db_table: model.objects.count()
+            for model in COUNTED_MODELS
+        },
+        'scenarios': {
+            name: run_scenario(SCENARIOS[name], samples, iterations, warmup)
+            for name in names
+        },
+    }
+
+
+def compare(baseline, report):
+    """Return (scenario, metric, before, after, change %) of every metric
+    both reports have"""
+    changes = []
+    for name, summary in report['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if before is None:
+            continue
+        for metric, value in summary.items():
+            if metric == 'requests' or metric not in before:
+                continue
+            previous = before[metric]
+            change = (
+                round((value - previous) / previous * 100, 1)
+                if previous else None
+            )
+            changes.append((name, metric, previous, value, change))
+    return changes
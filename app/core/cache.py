@@ -0,0 +1,188 @@
+"""Process-local caches kept consistent through shared version stamps.
+
+Every cached dataset has a version number stored in the shared Django
+cache.  Writers bump it once their transaction commits; readers keep the
+data in process memory and compare their version with the shared one at
+most every ``CACHE_VERSION_CHECK_INTERVAL`` seconds, so all workers
+converge shortly after a change while the hot path stays in memory.
+
+Timestamp versions are the time of the last change instead of a counter,
+for data that also needs a modification date, such as HTTP responses.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+VERSION_KEY_PREFIX = 'version:'
+
+
+def _version_key(name):
+    return VERSION_KEY_PREFIX + name
+
+
+def get_version(name):
+    """Return the shared version of a dataset"""
+    return cache.get(_version_key(name))
+
+
+def bump_version(name):
+    """Move the shared version of a dataset forward and return it"""
+    key = _version_key(name)
+    # Start from the clock so a version evicted from the cache never comes
+    # back with a value a worker still holds.
+    if cache.add(key, time.time_ns(), timeout=None):
+        return cache.get(key)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+        return cache.get(key)
+
+
+def bump_version_on_commit(name):
+    """Bump the version of a dataset once the current transaction commits"""
+    transaction.on_commit(lambda: bump_version(name))
+
+
+def get_timestamps(names, start_missing=True):
+    """Return {name: version} of timestamp versions, starting the missing
+    ones at the current time.
+
+    With ``start_missing`` false, missing versions are left out instead,
+    so callers can check that what they name exists before storing a
+    version that never expires."""
+    keys = {_version_key(name): name for name in names}
+    versions = cache.get_many(list(keys))
+    if not start_missing:
+        return {keys[key]: version for key, version in versions.items()}
+    now = time.time_ns()
+    missing = [key for key in keys if key not in versions]
+    for key in missing:
+        cache.add(key, now, timeout=None)
+    if missing:
+        versions.update(cache.get_many(missing))
+    # A cache that keeps nothing makes every version new
+    return {name: versions.get(key, now) for key, name in keys.items()}
+
+
+def touch_timestamps(names):
+    """Move timestamp versions to the current time.
+
+    Unlike bump_version, the version stays the time of the last change,
+    so it can be used as a modification date.  Concurrent touches may
+    overwrite each other, but either way the version changes."""
+    keys = [_version_key(name) for name in names]
+    if not keys:
+        return
+    current = cache.get_many(keys)
+    now = time.time_ns()
+    cache.set_many({
+        # Never move back, whatever the clock of this worker says
+        key: max(now, current.get(key, 0) + 1) for key in keys
+    }, timeout=None)
+
+
+def touch_timestamps_on_commit(names, using=None):
+    """Touch timestamp versions once the current transaction commits.
+
+    Names touched several times in a transaction are written once."""
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        touch_timestamps(set(names))
+        return
+    pending = getattr(connection, '_pending_timestamps', None)
+    # The callback is dropped when the transaction or savepoint that
+    # registered it rolls back
+    if pending is None or not any(
+        entry[1] is pending[1] for entry in connection.run_on_commit
+    ):
+        touched = set()
+        pending = (touched, lambda: touch_timestamps(touched))
+        connection._pending_timestamps = pending
+        transaction.on_commit(pending[1], using)
+    pending[0].update(names)
+
+
+class VersionedCache:
+    """Hold a value built by ``loader`` in process memory and rebuild it
+    when the shared version of ``name`` changes"""
+
+    def __init__(self, name, loader, check_interval=None):
+        self.name = name
+        self.loader = loader
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._value = None
+        self._version = None
+        self._loaded = False
+        self._checked_at = 0.0
+        # (connection, callback) of an invalidation waiting for a commit
+        self._pending = None
+
+    def get_check_interval(self):
+        if self.check_interval is not None:
+            return self.check_interval
+        return settings.CACHE_VERSION_CHECK_INTERVAL
+
+    def get(self):
+        """Return the cached value, rebuilding it if it is outdated"""
+        self._check_rollback()
+        now = time.monotonic()
+        if self._loaded and now - self._checked_at < self.get_check_interval():
+            return self._value
+
+        with self._lock:
+            version = get_version(self.name)
+            if version is None:
+                version = bump_version(self.name)
+            if not self._loaded or version != self._version:
+                # Read the version before loading, so a change made while
+                # loading is picked up by the next check.
+                self._value = self.loader()
+                self._version = version
+                self._loaded = True
+            self._checked_at = time.monotonic()
+            return self._value
+
+    def invalidate(self, using=None):
+        """Mark the value outdated in this process right away, so it sees
+        its own writes, and in every other process once the current
+        transaction commits.
+
+        A value loaded from those writes is dropped again if the
+        transaction rolls back instead."""
+        def bump():
+            self._pending = None
+            bump_version(self.name)
+            self._checked_at = 0.0
+
+        self._loaded = False
+        connection = transaction.get_connection(using)
+        if connection.in_atomic_block:
+            self._pending = (connection, bump)
+        transaction.on_commit(bump, using)
+
+    def _check_rollback(self):
+        pending = self._pending
+        # The callback is dropped when the transaction or savepoint that
+        # registered it rolls back, it clears _pending when it runs
+        if pending is None or any(
+            entry[1] is pending[1] for entry in pending[0].run_on_commit
+        ):
+            return
+        with self._lock:
+            if self._pending is pending:
+                self._pending = None
+                self._loaded = False
+
+    def clear(self):
+        """Drop the value held by this process"""
+        with self._lock:
+            self._value = None
+            self._version = None
+            self._loaded = False
+            self._pending = None
@@ -0,0 +1,65 @@
+"""Database connection lifecycle helpers"""
+import logging
+import time
+
+from django.db import connections
+from django.db.utils import DatabaseError, OperationalError
+
+
+logger = logging.getLogger(__name__)
+
+
+def check_connection(alias='default'):
+    """Open the connection if needed and run a trivial query on it"""
+    connection = connections[alias]
+    connection.ensure_connection()
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+
+
+def wait_for_connection(alias='default', timeout=60, delay=0.5,
+                        max_delay=5, log=None):
+    """Retry check_connection with exponential backoff until it succeeds.
+
+    Raises OperationalError when the database is still unavailable after
+    ``timeout`` seconds."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            check_connection(alias)
+            return
+        except OperationalError as exc:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise
+            wait = min(delay, max_delay, remaining)
+            if log is not None:
+                log('Database unavailable (%s), waiting %.1f seconds...'
+                    % (str(exc).strip() or exc.__class__.__name__, wait))
+            time.sleep(wait)
+            delay *= 2
+
+
+def warm_up(open_connections=True):
+    """Open the database connections and load the in-memory caches of
+    this process, so its first request does not pay for them.
+
+    Connections belong to the thread opening them, so ASGI servers, whose
+    queries run in other threads, only warm the caches."""
+    from core import reference
+    from core.autocomplete import brand_index
+
+    try:
+        for alias in connections:
+            check_connection(alias)
+        for cache in reference.REFERENCE_CACHES.values():
+            cache.all()
+        brand_index.get()
+    except DatabaseError as exc:
+        # Unavailable, or not migrated yet on a first deploy; the worker
+        # starts anyway and loads on its first request
+        logger.warning('Could not warm up the database: %s', exc)
+    finally:
+        if not open_connections:
+            connections.close_all()
@@ -0,0 +1,184 @@
+"""Resized and WebP derivatives of product images.
+
+Resizing is CPU bound, so the work runs in a process pool: each task
+opens one source file, renders every configured size from the largest to
+the smallest (each one from the previous, which is much cheaper than
+starting again from the original) and saves it in every configured
+format.  The tasks only get file paths and return plain dicts; the rows
+describing the files are written by the calling process.
+
+Derivatives are written next to MEDIA_ROOT, so this requires the default
+file system storage.
+"""
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+
+from PIL import Image as PILImage
+from PIL import ImageOps
+
+from core import product_versions
+from core.models import Image, ImageDerivative
+
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {'JPEG': 'jpg', 'WEBP': 'webp', 'PNG': 'png'}
+SAVE_OPTIONS = {
+    'JPEG': {'quality': 85, 'optimize': True, 'progressive': True},
+    'WEBP': {'quality': 80, 'method': 4},
+    'PNG': {'optimize': True},
+}
+
+_executor = None
+
+
+def derivative_name(image_id, size, image_format):
+    """Return the storage name of a derivative"""
+    return 'derivatives/%d/%s.%s' % (image_id, size, EXTENSIONS[image_format])
+
+
+def render_derivatives(image_id, source_path, media_root, sizes, formats):
+    """Render the derivatives of one image file.
+
+    Runs in a worker process, so it only uses its arguments.  Returns one
+    dict per written file."""
+    rendered = []
+    with PILImage.open(source_path) as source:
+        current = ImageOps.exif_transpose(source)
+        if current.mode not in ('RGB', 'L'):
+            current = current.convert('RGB')
+        for size, edge in sorted(
+            sizes.items(), key=lambda item: item[1], reverse=True
+        ):
+            current = current.copy()
+            current.thumbnail((edge, edge), PILImage.LANCZOS)
+            for image_format in formats:
+                name = derivative_name(image_id, size, image_format)
+                path = os.path.join(media_root, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                current.save(
+                    path, image_format, **SAVE_OPTIONS.get(image_format, {})
+                )
+                rendered.append({
+                    'image_id': image_id,
+                    'size': size,
+                    'format': image_format,
+                    'file': name,
+                    'width': current.width,
+                    'height': current.height,
+                })
+    return rendered
+
+
+def _render_task(image):
+    return (
+        image.pk,
+        default_storage.path(image.image_url.name),
+        settings.MEDIA_ROOT,
+        settings.IMAGE_DERIVATIVE_SIZES,
+        tuple(settings.IMAGE_DERIVATIVE_FORMATS),
+    )
+
+
+def _safe_render(task):
+    try:
+        return render_derivatives(*task)
+    except (OSError, ValueError) as exc:
+        # Broken or missing source files must not stop the other images
+        return {'image_id': task[0], 'error': str(exc)}
+
+
+def save_derivatives(results):
+    """Replace the derivative rows of the rendered images"""
+    if not results:
+        return []
+    image_ids = {row['image_id'] for row in results}
+    with transaction.atomic():
+        ImageDerivative.objects.filter(image_id__in=image_ids).delete()
+        product_versions.invalidate_products(
+            Image.objects.filter(pk__in=image_ids).values_list(
+                'product_id', flat=True
+            )
+        )
+        return ImageDerivative.objects.bulk_create(
+            ImageDerivative(**row) for row in results
+        )
+
+
+def get_workers(workers=None):
+    if workers is None:
+        workers = settings.IMAGE_DERIVATIVE_WORKERS
+    return workers if workers is not None else os.cpu_count()
+
+
+def generate_derivatives(images, workers=None, chunksize=4, executor=None):
+    """Render and record the derivatives of the given images.
+
+    Renders in ``executor`` when given, so callers processing many chunks
+    start the worker processes once; otherwise ``workers=0`` renders in
+    the calling process and any other value in a pool of its own.
+    Returns the number of images processed and the errors of the failed
+    ones."""
+    tasks = [_render_task(image) for image in images if image.image_url]
+    workers = get_workers(workers)
+    if executor is not None:
+        outcomes = list(
+            executor.map(_safe_render, tasks, chunksize=chunksize)
+        )
+    elif workers == 0:
+        outcomes = [_safe_render(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            outcomes = list(
+                executor.map(_safe_render, tasks, chunksize=chunksize)
+            )
+
+    results = []
+    errors = {}
+    for outcome in outcomes:
+        if isinstance(outcome, dict):
+            errors[outcome['image_id']] = outcome['error']
+        else:
+            results.extend(outcome)
+    save_derivatives(results)
+    return len(tasks) - len(errors), errors
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=get_workers() or None)
+    return _executor
+
+
+def _record_future(future):
+    """Save the outcome of a scheduled render from the pool callback"""
+    try:
+        outcome = future.result()
+        if isinstance(outcome, dict):
+            logger.warning(
+                'Could not render image %s: %s',
+                outcome['image_id'], outcome['error'],
+            )
+        else:
+            save_derivatives(outcome)
+    except Exception:
+        logger.exception('Could not save image derivatives')
+    finally:
+        # The callback runs in a pool thread, outside of any request
+        connection.close()
+
+
+def schedule_derivatives(image):
+    """Render the derivatives of a new image in the background once the
+    transaction that created it commits"""
+    def submit():
+        future = _get_executor().submit(_safe_render, _render_task(image))
+        future.add_done_callback(_record_future)
+
+    transaction.on_commit(submit)
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import recommendations
+
+
+class Command(BaseCommand):
+    """Django command to compute related product recommendations"""
+    help = (
+        'Compute the most similar products of every product, or with '
+        '--new only of products without recommendations yet'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--new', action='store_true',
+            help='Only products that have no recommendations yet',
+        )
+        parser.add_argument('--top-k', type=int, default=None)
+        parser.add_argument('--block-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        product_ids = None
+        if options['new']:
+            product_ids = recommendations.get_new_product_ids()
+
+        done = written = 0
+        started = time.monotonic()
+        for block_done, block_written in recommendations.build_recommendations(
+            product_ids,
+            top_k=options['top_k'],
+            block_size=options['block_size'],
+        ):
+            done += block_done
+            written += block_written
+            elapsed = time.monotonic() - started
+            self.stdout.write('%d products processed, %.0f products/sec' % (
+                done, done / elapsed if elapsed else done
+            ))
+
+        self.stdout.write(self.style.SUCCESS(
+            'Wrote %d recommendations for %d products' % (written, done)
+        ))
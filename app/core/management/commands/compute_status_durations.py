@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import status_durations
+
+
+class Command(BaseCommand):
+    """Django command to compute how long products stay in each status"""
+    help = (
+        'Recompute the time in status statistics per brand and sell '
+        'category from the product status log'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        started = time.monotonic()
+        statistics = status_durations.rebuild_statistics(
+            options['chunk_size']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            'Wrote %d statistics in %.1fs' % (
+                len(statistics), time.monotonic() - started
+            )
+        ))
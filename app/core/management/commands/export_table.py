@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import exports
+
+
+class Command(BaseCommand):
+    """Django command to export a table as CSV or XLSX"""
+    help = (
+        'Write every row of a table as CSV or XLSX, streaming the rows '
+        'through a server-side cursor.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('table', choices=sorted(exports.EXPORTS))
+        parser.add_argument(
+            '--format', choices=exports.FORMATS, default='csv'
+        )
+        parser.add_argument(
+            '--output', help='File to write, standard output by default'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=exports.CHUNK_SIZE,
+            help='Rows fetched from the database at a time',
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        if options['format'] == 'xlsx' and not options['output']:
+            raise CommandError('XLSX exports need --output')
+
+        export = exports.EXPORTS[options['table']]
+        chunks = exports.stream_export(
+            export, export.model._default_manager.all(),
+            options['format'], options['chunk_size'],
+        )
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        with open(options['output'], 'wb') as stream:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                stream.write(chunk)
+        self.stderr.write(self.style.SUCCESS(
+            'Exported %s to %s' % (export.name, options['output'])
+        ))
@@ -0,0 +1,70 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from core import images
+from core.models import Image
+
+
+class Command(BaseCommand):
+    """Django command to render the derivatives of existing images"""
+    help = 'Render resized and WebP variants of product images in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=200)
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Worker processes, one per CPU by default',
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Render images that already have derivatives again',
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        queryset = Image.objects.order_by('pk').only('id', 'image_url')
+        if not options['all']:
+            queryset = queryset.filter(derivatives__isnull=True)
+
+        workers = images.get_workers(options['workers'])
+        if workers == 0:
+            processed, failed = self.render(
+                queryset, options['chunk_size'], None
+            )
+        else:
+            # One pool for every chunk, so the worker processes start once
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                processed, failed = self.render(
+                    queryset, options['chunk_size'], executor
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            'Rendered %d images, %d failed' % (processed, failed)
+        ))
+
+    def render(self, queryset, chunk_size, executor):
+        """Render the images in chunks, in the calling process without an
+        executor, and return how many were processed and failed"""
+        last_id = 0
+        processed = failed = 0
+        started = time.monotonic()
+        while True:
+            chunk = list(queryset.filter(pk__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1].pk
+            done, errors = images.generate_derivatives(
+                chunk, workers=0, executor=executor
+            )
+            processed += done
+            failed += len(errors)
+            for image_id, error in sorted(errors.items()):
+                self.stderr.write('Image %d: %s' % (image_id, error))
+
+            elapsed = time.monotonic() - started
+            self.stdout.write('%d images processed, %.1f images/sec' % (
+                processed, processed / elapsed if elapsed else processed
+            ))
+        return processed, failed
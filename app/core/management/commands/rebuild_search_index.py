@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from core import search
+from core.models import Product
+
+
+class Command(BaseCommand):
+    """Django command to rebuild the product search documents"""
+    help = 'Rebuild the search columns of every product in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        chunk_size = options['chunk_size']
+        last_id = 0
+        total = 0
+        while True:
+            ids = list(
+                Product.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            search.update_search_documents(ids, chunk_size=chunk_size)
+            last_id = ids[-1]
+            total += len(ids)
+            self.stdout.write('Indexed %d products' % total)
+
+        self.stdout.write(self.style.SUCCESS(
+            'Rebuilt the search index of %d products' % total
+        ))
@@ -0,0 +1,92 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import statistics, user_counters
+from core.models import SellRecord, SellStatistic
+
+
+class Command(BaseCommand):
+    """Django command to recompute the sell statistics and report drift"""
+    help = (
+        'Recompute SellStatistic from the sold products and their status '
+        'log, and report drifted rollups and missing or stale sell records'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Overwrite drifted rows with the recomputed values and '
+                 'create or delete the sell records to match',
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        expected, missing = statistics.compute_rollups(options['chunk_size'])
+        stored = {
+            (row.scope, row.key): row
+            for row in SellStatistic.objects.all()
+        }
+
+        drifted = []
+        for scope_key in sorted(set(expected) | set(stored)):
+            price, count, period = expected.get(scope_key, (0, 0, 0))
+            row = stored.get(scope_key)
+            actual = (
+                (row.total_price, row.total_count, row.total_period)
+                if row else (0, 0, 0)
+            )
+            if actual != (price, count, period):
+                drifted.append((scope_key, actual, (price, count, period)))
+                self.stdout.write(
+                    '%s %s: stored %s, expected %s' % (
+                        scope_key[0], scope_key[1] or '-', actual,
+                        (price, count, period),
+                    )
+                )
+
+        for sale in missing:
+            self.stdout.write(
+                'product %d: sold without a sell record' % sale['product_id']
+            )
+        stale = list(statistics.get_stale_records())
+        for record in stale:
+            self.stdout.write('sell record %d: product %s is not sold' % (
+                record.pk, record.product_id or '(deleted)'
+            ))
+
+        if not drifted and not missing and not stale:
+            self.stdout.write(self.style.SUCCESS('No drift found'))
+            return
+        summary = '%d drifted rows, %d missing and %d stale sell records' % (
+            len(drifted), len(missing), len(stale)
+        )
+        if not options['fix']:
+            self.stdout.write(self.style.WARNING(
+                summary + ', rerun with --fix to correct them'
+            ))
+            return
+
+        with transaction.atomic():
+            for sale in missing:
+                SellRecord.objects.create(**sale)
+                user_counters.add_sale(sale['seller_id'], sale['price'])
+            for record in stale:
+                seller_id = record.seller_id
+                if seller_id is None and record.product is not None:
+                    # Recorded before the seller was stored
+                    seller_id = record.product.user_id
+                user_counters.cancel_sale(seller_id, record.price)
+                record.delete()
+            for (scope, key), _, (price, count, period) in drifted:
+                SellStatistic.objects.update_or_create(
+                    scope=scope,
+                    key=key,
+                    defaults={
+                        'total_price': price,
+                        'total_count': count,
+                        'total_period': period,
+                        'average_period': period // count if count else 0,
+                    },
+                )
+        self.stdout.write(self.style.SUCCESS('Fixed ' + summary))
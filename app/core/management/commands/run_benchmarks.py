@@ -0,0 +1,69 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the hot read and write paths"""
+    help = (
+        'Run the benchmark scenarios against the current database and '
+        'write latency percentiles and queries per request as JSON. '
+        'Seed the data with seed_benchmark_data first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario', action='append', dest='scenarios',
+            choices=sorted(benchmark.SCENARIOS),
+            help='Scenario to run, may be repeated; all by default',
+        )
+        parser.add_argument('--iterations', type=int, default=100)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--output', help='Write the report to this JSON file'
+        )
+        parser.add_argument(
+            '--compare', help='Compare with the report in this JSON file'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as stream:
+                baseline = json.load(stream)
+
+        try:
+            report = benchmark.run_benchmarks(
+                options['scenarios'],
+                iterations=options['iterations'],
+                seed=options['seed'],
+                warmup=options['warmup'],
+            )
+        except benchmark.BenchmarkError as error:
+            raise CommandError(str(error))
+
+        if options['output']:
+            with open(options['output'], 'w') as stream:
+                json.dump(report, stream, indent=2)
+
+        for name, summary in report['scenarios'].items():
+            self.stdout.write(
+                '{name}: p50 {p50_ms} ms, p95 {p95_ms} ms, p99 {p99_ms} ms, '
+                '{queries_per_request} queries'.format(name=name, **summary)
+            )
+
+        if baseline is not None:
+            self.stdout.write('Compared with %s:' % (
+                baseline.get('commit') or options['compare']
+            ))
+            for name, metric, before, after, change in benchmark.compare(
+                baseline, report
+            ):
+                self.stdout.write('%s %s: %s -> %s (%s)' % (
+                    name, metric, before, after,
+                    'n/a' if change is None else '%+.1f%%' % change,
+                ))
@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.seeding import Seeder
+
+
+class Command(BaseCommand):
+    """Django command to generate synthetic data for benchmarks"""
+    help = (
+        'Generate deterministic users, products, price history, status '
+        'log, images, tags and keywords. Never run it against production.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--users', type=int, default=100000)
+        parser.add_argument('--products', type=int, default=1000000)
+        parser.add_argument('--brands', type=int, default=500)
+        parser.add_argument('--tags', type=int, default=2000)
+        parser.add_argument('--keywords', type=int, default=2000)
+        parser.add_argument('--categories', type=int, default=50)
+        parser.add_argument(
+            '--price-changes', type=int, default=3,
+            help='Price history rows per product',
+        )
+        parser.add_argument(
+            '--status-changes', type=int, default=3,
+            help='Status log rows per product',
+        )
+        parser.add_argument(
+            '--images', type=int, default=3, help='Images per product'
+        )
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def report(self, label, done, started):
+        elapsed = time.monotonic() - started
+        self.stdout.write('%d %s, %.0f rows/sec' % (
+            done, label, done / elapsed if elapsed else done
+        ))
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        seeder = Seeder(seed=options['seed'])
+        seeder.seed_reference(
+            brands=options['brands'],
+            tags=options['tags'],
+            keywords=options['keywords'],
+            categories=options['categories'],
+        )
+
+        started = time.monotonic()
+        for done in seeder.seed_users(
+            options['users'], options['batch_size']
+        ):
+            self.report('users', done, started)
+
+        started = time.monotonic()
+        for done in seeder.seed_products(
+            options['products'],
+            options['batch_size'],
+            price_changes=options['price_changes'],
+            status_changes=options['status_changes'],
+            images=options['images'],
+        ):
+            self.report('products', done, started)
+        seeder.finish()
+
+        for model, count in sorted(
+            seeder.written.items(), key=lambda item: item[0]._meta.db_table
+        ):
+            self.stdout.write('%s: %d rows' % (model._meta.db_table, count))
+        self.stdout.write(self.style.SUCCESS(
+            'Seeded the benchmark data, run rebuild_search_index to make '
+            'the products searchable'
+        ))
@@ -0,0 +1,86 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import query_stats
+
+
+SORT_KEYS = {
+    'db': lambda row: row['db_ms'] * row['requests'],
+    'queries': lambda row: row['queries_per_request'],
+    'requests': lambda row: row['requests'],
+    'repeated': lambda row: row['repeated_requests'],
+}
+
+
+def describe(view, totals):
+    requests = totals['requests']
+    return {
+        'view': view,
+        'requests': requests,
+        'queries_per_request': round(totals['queries'] / requests, 1),
+        'max_queries': totals['max_queries'],
+        'db_ms': round(totals['db_us'] / requests / 1000, 1),
+        'total_ms': round(totals['total_us'] / requests / 1000, 1),
+        'duplicates_per_request': round(totals['duplicates'] / requests, 1),
+        'repeated_requests': totals['repeated_requests'],
+        'slow_requests': totals['slow_requests'],
+    }
+
+
+class Command(BaseCommand):
+    """Django command to show the database cost of every view"""
+    help = (
+        'Show the queries and database time per request of every view, '
+        'as recorded by QueryInstrumentationMiddleware.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sort', choices=sorted(SORT_KEYS), default='db',
+            help='db sorts by the total database time of the view',
+        )
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument(
+            '--json', action='store_true', help='Print the rows as JSON'
+        )
+        parser.add_argument(
+            '--reset', action='store_true', help='Forget the totals'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        if query_stats.is_process_local_cache():
+            raise CommandError(
+                'The totals are kept in the default cache, which is local '
+                'to each process here; configure a cache shared by all '
+                'workers, such as memcached or redis'
+            )
+        if options['reset']:
+            query_stats.reset_stats()
+            self.stdout.write(self.style.SUCCESS('SQL statistics reset'))
+            return
+
+        rows = sorted(
+            (
+                describe(view, totals)
+                for view, totals in query_stats.read_stats().items()
+            ),
+            key=SORT_KEYS[options['sort']],
+            reverse=True,
+        )[:options['limit']]
+
+        if options['json']:
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+        if not rows:
+            self.stdout.write('No requests recorded yet')
+            return
+        for row in rows:
+            self.stdout.write(
+                '{view}: {requests} requests, {queries_per_request} '
+                'queries (max {max_queries}), db {db_ms} ms of '
+                '{total_ms} ms, {duplicates_per_request} duplicates, '
+                '{repeated_requests} with repeated queries, '
+                '{slow_requests} slow'.format(**row)
+            )
@@ -1,22 +1,37 @@
-import time
-
-from django.db import connections
+from django.core.management.base import BaseCommand, CommandError
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+
+from core.db import wait_for_connection
 
 
 class Command(BaseCommand):
     """Django command to pause execution until database is available"""
 
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument(
+            '--timeout', type=float, default=60,
+            help='Seconds to wait before giving up',
+        )
+        parser.add_argument(
+            '--max-delay', type=float, default=5,
+            help='Longest pause between two attempts, in seconds',
+        )
+
     def handle(self, *args, **options):
         """Handle the command"""
         self.stdout.write('Waiting for database...')
-        db_conn = None
-        while not db_conn:
-            try:
-                db_conn = connections['default']
-            except OperationalError:
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
+        try:
+            wait_for_connection(
+                options['database'],
+                timeout=options['timeout'],
+                max_delay=options['max_delay'],
+                log=self.stdout.write,
+            )
+        except OperationalError as exc:
+            raise CommandError(
+                'Database unavailable after %s seconds: %s'
+                % (options['timeout'], exc)
+            )
 
         self.stdout.write(self.style.SUCCESS('Database available!'))
@@ -0,0 +1,107 @@
+import json
+import logging
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+
+from core.query_stats import QueryTracker, tracking, view_stats
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match._func_path
+
+
+class QueryInstrumentationMiddleware:
+    """Measure the queries of every request.
+
+    Adds a Server-Timing header with the database time and query count,
+    adds the totals to the per-view statistics, and logs a sample of the
+    slow requests and of those repeating a statement (N+1 queries)."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Async views are not serialized through sync_to_async
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.SQL_INSTRUMENTATION:
+            return self.get_response(request)
+
+        tracker = QueryTracker()
+        started = time.perf_counter()
+        with tracking(tracker):
+            response = self.get_response(request)
+        return self.finish(request, response, tracker, started)
+
+    async def __acall__(self, request):
+        if not settings.SQL_INSTRUMENTATION:
+            return await self.get_response(request)
+
+        tracker = QueryTracker()
+        started = time.perf_counter()
+        with tracking(tracker):
+            response = await self.get_response(request)
+        return self.finish(request, response, tracker, started)
+
+    def finish(self, request, response, tracker, started):
+        elapsed = time.perf_counter() - started
+
+        view = get_view_name(request)
+        repeated = tracker.repeated(settings.SQL_REPEATED_QUERY_THRESHOLD)
+        slow = elapsed * 1000 >= settings.SQL_SLOW_REQUEST_MS
+        view_stats.add(
+            view, tracker, elapsed, slow=slow, repeated=bool(repeated)
+        )
+        view_stats.flush_if_due()
+
+        if settings.SQL_SERVER_TIMING:
+            self.add_server_timing(response, tracker, elapsed)
+        if (slow or repeated) and (
+            random.random() < settings.SQL_SLOW_SAMPLE_RATE
+        ):
+            self.log_request(request, view, tracker, elapsed, repeated)
+        return response
+
+    def add_server_timing(self, response, tracker, elapsed):
+        timing = 'db;dur=%.1f;desc="%d queries", total;dur=%.1f' % (
+            tracker.duration * 1000, tracker.count, elapsed * 1000
+        )
+        if response.has_header('Server-Timing'):
+            timing = '%s, %s' % (response['Server-Timing'], timing)
+        response['Server-Timing'] = timing
+
+    def log_request(self, request, view, tracker, elapsed, repeated):
+        record = {
+            'view': view,
+            'method': request.method,
+            'path': request.path,
+            'total_ms': round(elapsed * 1000, 1),
+            'db_ms': round(tracker.duration * 1000, 1),
+            'queries': tracker.count,
+            'duplicates': tracker.duplicates,
+            'repeated': [
+                {'sql': sql[:500], 'times': count}
+                for sql, count in repeated[:5]
+            ],
+        }
+        logger.warning(
+            'Slow or repetitive request %s',
+            json.dumps(record, ensure_ascii=False),
+            extra={'query_stats': record},
+        )
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_trigram_extension'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='recent_login',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='sleep_expiration_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,41 @@
+import core.models
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_user_activity_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='phoneauthorization',
+            name='issued_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='phoneauthorization',
+            name='expires_at',
+            field=models.DateTimeField(default=core.models.phone_authorization_expiry),
+        ),
+        migrations.AddField(
+            model_name='phoneauthorization',
+            name='verified_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='phoneauthorization',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='phoneauthorization',
+            index=models.Index(fields=['phone_number', '-issued_at'], name='phone_auth_number_issued_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='phoneauthorization',
+            index=models.Index(fields=['expires_at'], name='phone_auth_expires_idx'),
+        ),
+    ]
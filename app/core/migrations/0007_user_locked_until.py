@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_phone_authorization_expiry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='locked_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from datetime import timedelta
+
+from django.db import models, transaction
 
 from django.conf import settings
 from django.contrib.auth.models import (
@@ -6,6 +8,9 @@ from django.contrib.auth.models import (
     BaseUserManager,
     PermissionsMixin,
 )
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.utils import timezone
 
 
 class UserManager(BaseUserManager):
@@ -38,8 +43,9 @@ class User(AbstractBaseUser, PermissionsMixin):
     purchase_total = models.DecimalField(max_digits=18, decimal_places=2, default=0)
     sell_total = models.DecimalField(max_digits=18, decimal_places=2, default=0)
     date_created = models.DateTimeField(auto_now_add=True, null=True, blank=True)
-    recent_login = models.DateTimeField(auto_now=True, null=True, blank=True)
-    sleep_expiration_date = models.DateTimeField(auto_now=True, null=True, blank=True)
+    # Written behind by user.activity, see SEEN_FIELDS
+    recent_login = models.DateTimeField(null=True, blank=True)
+    sleep_expiration_date = models.DateTimeField(null=True, blank=True)
     is_approved = models.BooleanField(default=True)
     coupon = models.CharField(max_length=50, default=0)
     gender = models.CharField(max_length=50)
@@ -56,6 +62,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_lock = models.BooleanField(default=False)
     latest_try_login_date = models.DateTimeField(default=None, null=True)
     lock_count = models.IntegerField(default=0)
+    locked_until = models.DateTimeField(null=True, blank=True)
     is_deleted = models.BooleanField(default=False)
     date_deleted = models.DateTimeField(auto_now_add=True, null=True, blank=True)
     is_active = models.BooleanField(default=True)
@@ -66,9 +73,41 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     USERNAME_FIELD = "email"
 
+    # Changed with F() expressions by core.user_counters only
+    COUNTER_FIELDS = (
+        "point",
+        "purchase_count",
+        "purchase_total",
+        "sell_total",
+    )
+
+    # Written behind by user.activity only.  recent_login is what the rest
+    # of the code reads, sleep_expiration_date used to be rewritten on
+    # every save.  last_login is left to Django: it is part of password
+    # reset tokens and must only change on login.
+    SEEN_FIELDS = ("recent_login", "sleep_expiration_date")
+
     def __str__(self):
         return self.email
 
+    def save(self, *args, **kwargs):
+        # Saving a loaded user would write back counters that concurrent
+        # sales have moved since, and move last seen timestamps backwards
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            skipped = (
+                set(self.COUNTER_FIELDS)
+                | set(self.SEEN_FIELDS)
+                | self.get_deferred_fields()
+            )
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in skipped
+                and field.attname not in skipped
+            ]
+        super().save(*args, **kwargs)
+
     class Meta:
         db_table = "users"
         verbose_name_plural = "회원관리"
@@ -94,15 +133,31 @@ class Address(models.Model):
         verbose_name_plural = "addresses"
 
 
+def phone_authorization_expiry():
+    return timezone.now() + timedelta(seconds=settings.PHONE_CODE_TTL)
+
+
 class PhoneAuthorization(models.Model):
     phone_number = models.CharField(max_length=20)
     authorization_number = models.CharField(max_length=20)
+    issued_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(default=phone_authorization_expiry)
+    verified_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
 
     def __str__(self):
         return self.phone_number
 
     class Meta:
         db_table = "phone_authorizations"
+        indexes = [
+            models.Index(
+                fields=["phone_number", "-issued_at"],
+                name="phone_auth_number_issued_idx",
+            ),
+            # Lets the purge find expired rows without scanning the table
+            models.Index(fields=["expires_at"], name="phone_auth_expires_idx"),
+        ]
 
 
 class UserGrade(models.Model):
@@ -124,6 +179,16 @@ class UserBrand(models.Model):
         db_table = "users_brands"
 
 
+class ProductQuerySet(models.QuerySet):
+    def with_relations(self):
+        """Load the relations shown on product lists in a fixed number
+        of queries, for ProductListSerializer on model instances"""
+        # Grades, statuses and sell categories come from core.reference
+        return self.select_related("brand", "user").prefetch_related(
+            "tag", "keyword", "category", "image_set", "image_set__derivatives"
+        )
+
+
 class Product(models.Model):
     product_code = models.CharField(max_length=500, blank=True, verbose_name="자체상품코드")
     brand = models.ForeignKey("Brand", on_delete=models.CASCADE, verbose_name="브랜드")
@@ -146,11 +211,13 @@ class Product(models.Model):
     user = models.ManyToManyField(
         settings.AUTH_USER_MODEL, through="purchase.UserProduct"
     )
+    # Indexed first by products_user_created_idx
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
         null=True,
         verbose_name="판매자",
+        db_index=False,
     )
     tag = models.ManyToManyField("Tag", through="ProductTag")
     memo = models.CharField(max_length=2000, blank=True)
@@ -161,16 +228,31 @@ class Product(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="신청일자")
     keyword = models.ManyToManyField("Keyword", through="ProductKeyword")
+    # Indexed first by products_status_created_idx
     product_status = models.ForeignKey(
         "ProductStatus",
         on_delete=models.SET_NULL,
         null=True,
         blank=True,
         verbose_name="상태",
+        db_index=False,
     )
     price = models.DecimalField(
         max_digits=12, decimal_places=2, verbose_name="판매 가격", null=True, blank=True
     )
+    current_price = models.OneToOneField(
+        "PriceHistory",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="현재 가격",
+    )
+    search_document = SearchVectorField(null=True, editable=False)
+    search_text = models.TextField(blank=True, editable=False)
+    search_chosung = models.TextField(blank=True, editable=False)
+
+    objects = ProductQuerySet.as_manager()
 
     def __str__(self):
         return self.name
@@ -178,6 +260,34 @@ class Product(models.Model):
     class Meta:
         db_table = "products"
         verbose_name_plural = "상품 관리"
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-id"], name="products_created_id_idx"
+            ),
+            models.Index(fields=["price", "id"], name="products_price_id_idx"),
+            # Listings filtered by status and seller pages, newest first
+            models.Index(
+                fields=["product_status", "-created_at", "-id"],
+                name="products_status_created_idx",
+            ),
+            models.Index(
+                fields=["user", "-created_at"],
+                name="products_user_created_idx",
+            ),
+            GinIndex(
+                fields=["search_document"], name="products_search_doc_idx"
+            ),
+            GinIndex(
+                fields=["search_text"],
+                name="products_search_text_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+            GinIndex(
+                fields=["search_chosung"],
+                name="products_search_chosung_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
 
 
 class Agreement(models.Model):
@@ -224,20 +334,83 @@ class Image(models.Model):
         db_table = "images"
 
 
+class ImageDerivative(models.Model):
+    image = models.ForeignKey(
+        "Image", on_delete=models.CASCADE, related_name="derivatives"
+    )
+    size = models.CharField(max_length=20)
+    format = models.CharField(max_length=10)
+    file = models.ImageField(max_length=2000)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+
+    class Meta:
+        db_table = "image_derivatives"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["image", "size", "format"],
+                name="image_derivatives_uniq",
+            ),
+        ]
+
+
+class PriceHistoryManager(models.Manager):
+    def record_price(self, product, price, discounted_amount=None):
+        """Record a new price and make it the current price of the product"""
+        with transaction.atomic(using=self.db):
+            # Lock the product so concurrent price changes are serialized
+            Product.objects.using(self.db).select_for_update().only("id").get(
+                pk=product.pk
+            )
+            self.filter(product=product, is_uptodate=True).update(
+                is_uptodate=False
+            )
+            history = self.create(
+                product=product,
+                price=price,
+                discounted_amount=discounted_amount,
+                is_uptodate=True,
+            )
+            Product.objects.using(self.db).filter(pk=product.pk).update(
+                price=price, current_price=history
+            )
+        product.price = price
+        product.current_price = history
+        return history
+
+
 class PriceHistory(models.Model):
     price = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="판매 가격")
-    product = models.ForeignKey("Product", on_delete=models.CASCADE, verbose_name="상품명")
+    # Indexed first by price_hist_product_created_idx
+    product = models.ForeignKey(
+        "Product", on_delete=models.CASCADE, verbose_name="상품명", db_index=False
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     discounted_amount = models.DecimalField(
         max_digits=12, decimal_places=2, null=True, blank=True
     )
     is_uptodate = models.BooleanField(verbose_name="최신여부")
 
+    objects = PriceHistoryManager()
+
     def __str__(self):
         return self.product.name
 
     class Meta:
         db_table = "price_histories"
+        indexes = [
+            models.Index(
+                fields=["product", "-created_at"],
+                name="price_hist_product_created_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product"],
+                condition=models.Q(is_uptodate=True),
+                name="price_hist_one_uptodate_per_product",
+            ),
+        ]
 
 
 class ProductGrade(models.Model):
@@ -381,7 +554,10 @@ class ProductStatus(models.Model):
 
 
 class ProductStatusLog(models.Model):
-    product = models.ForeignKey("Product", on_delete=models.SET_NULL, null=True)
+    # Indexed first by status_log_product_created_idx
+    product = models.ForeignKey(
+        "Product", on_delete=models.SET_NULL, null=True, db_index=False
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     product_status = models.ForeignKey(
         "ProductStatus", on_delete=models.SET_NULL, null=True
@@ -395,16 +571,96 @@ class ProductStatusLog(models.Model):
     class Meta:
         db_table = "product_status_log"
         verbose_name_plural = "상품 상태"
+        indexes = [
+            models.Index(
+                fields=["product", "created_at"],
+                name="status_log_product_created_idx",
+            ),
+        ]
 
 
 class SellStatistic(models.Model):
+    TOTAL = "total"
+    BRAND = "brand"
+    SELL_CATEGORY = "sell_category"
+    DAY = "day"
+    SCOPE_CHOICES = [
+        (TOTAL, "전체"),
+        (BRAND, "브랜드"),
+        (SELL_CATEGORY, "카테고리"),
+        (DAY, "일자"),
+    ]
+
+    scope = models.CharField(
+        max_length=20, choices=SCOPE_CHOICES, default=TOTAL
+    )
+    key = models.CharField(max_length=50, blank=True, default="")
     total_price = models.DecimalField(max_digits=18, decimal_places=2)
     total_count = models.IntegerField()
+    total_period = models.BigIntegerField(default=0)
     average_period = models.IntegerField()
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = "sell_statistics"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["scope", "key"], name="sell_statistics_scope_key_uniq"
+            ),
+        ]
+
+
+class StatusDurationStatistic(models.Model):
+    """Time products spend in a status, computed by core.status_durations"""
+    scope = models.CharField(
+        max_length=20,
+        choices=SellStatistic.SCOPE_CHOICES,
+        default=SellStatistic.TOTAL,
+    )
+    key = models.CharField(max_length=50, blank=True, default="")
+    product_status = models.ForeignKey(
+        "ProductStatus", on_delete=models.CASCADE
+    )
+    count = models.IntegerField()
+    average_seconds = models.FloatField()
+    p50_seconds = models.FloatField()
+    p90_seconds = models.FloatField()
+    p95_seconds = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "status_duration_statistics"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["scope", "key", "product_status"],
+                name="status_duration_scope_key_status_uniq",
+            ),
+        ]
+
+
+class SellRecord(models.Model):
+    product = models.OneToOneField(
+        "Product",
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="sell_record",
+    )
+    seller = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="sell_records",
+    )
+    brand = models.ForeignKey("Brand", on_delete=models.SET_NULL, null=True)
+    sell_category = models.ForeignKey(
+        "SellCategory", on_delete=models.SET_NULL, null=True
+    )
+    price = models.DecimalField(max_digits=12, decimal_places=2)
+    period = models.IntegerField(verbose_name="판매 기간(일)")
+    sold_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "sell_records"
 
 
 class SellerReview(models.Model):
@@ -412,22 +668,51 @@ class SellerReview(models.Model):
     rating = models.DecimalField(max_digits=2, decimal_places=1)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    product = models.ForeignKey("Product", on_delete=models.SET_NULL, null=True)
+    # Indexed first by seller_reviews_product_idx
+    product = models.ForeignKey(
+        "Product", on_delete=models.SET_NULL, null=True, db_index=False
+    )
 
     class Meta:
         db_table = "seller_reviews"
+        indexes = [
+            models.Index(
+                fields=["product", "-created_at"],
+                name="seller_reviews_product_idx",
+            ),
+        ]
 
 
 class RelatedProduct(models.Model):
+    # Indexed first by related_from_score_idx
     from_product = models.ForeignKey(
-        "Product", on_delete=models.CASCADE, related_name="to_product"
+        "Product",
+        on_delete=models.CASCADE,
+        related_name="to_product",
+        db_index=False,
     )
     to_product = models.ForeignKey(
         "Product", on_delete=models.CASCADE, related_name="from_product"
     )
+    # Computed rows are replaced by core.recommendations, curated rows
+    # (without a score) are never touched and listed first
+    score = models.FloatField(null=True, blank=True)
+    is_generated = models.BooleanField(default=False)
 
     class Meta:
         db_table = "related_produtcs"
+        indexes = [
+            models.Index(
+                fields=["from_product", "is_generated", "-score"],
+                name="related_from_score_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["from_product", "to_product"],
+                name="related_products_uniq",
+            ),
+        ]
 
 
 class Keyword(models.Model):
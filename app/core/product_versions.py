@@ -0,0 +1,59 @@
+"""Version stamps of the product detail page.
+
+Every product has a timestamp version in the shared cache, touched once
+the transaction changing the product, or a row shown on its page,
+commits (see core.signals).  Brands, tags, keywords, categories and the
+reference tables are shown on every page and share one catalogue
+version instead.  The pair is the ETag of the page and its newest half
+the Last-Modified date, so a repeat view needs one cache lookup and no
+query.
+
+Rows written with bulk_create or update() send no signals; code doing so
+calls invalidate_products itself.
+"""
+from core.cache import get_timestamps, touch_timestamps_on_commit
+from core.models import Product
+
+
+CATALOGUE = 'product_detail'
+
+
+def _name(pk):
+    return 'product_detail:%d' % pk
+
+
+def get_versions(pk):
+    """Return the (catalogue, product) versions of a product page.
+
+    Raises Product.DoesNotExist for an unknown product rather than
+    storing a version for every id anyone asks for."""
+    names = [CATALOGUE, _name(pk)]
+    versions = get_timestamps(names, start_missing=False)
+    if _name(pk) not in versions:
+        if not Product.objects.filter(pk=pk).exists():
+            raise Product.DoesNotExist('Product %s does not exist' % pk)
+        versions = get_timestamps(names)
+    elif CATALOGUE not in versions:
+        versions = get_timestamps(names)
+    return versions[CATALOGUE], versions[_name(pk)]
+
+
+def invalidate_products(product_ids):
+    """Change the page version of products once the transaction commits"""
+    names = {_name(pk) for pk in product_ids if pk is not None}
+    if names:
+        touch_timestamps_on_commit(names)
+
+
+def invalidate_catalogue():
+    """Change the version of every product page"""
+    touch_timestamps_on_commit([CATALOGUE])
+
+
+def get_etag(versions):
+    return '"%x-%x"' % versions
+
+
+def get_last_modified(versions):
+    """Return the time of the last change, in seconds since the epoch"""
+    return max(versions) // 1000000000
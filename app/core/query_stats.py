@@ -0,0 +1,218 @@
+"""Database cost of requests, measured without DEBUG.
+
+QueryTracker is installed with ``connection.execute_wrapper`` for the
+duration of a request (see core.middleware) and is the request's
+``current_tracker``; core.async_orm installs it on its pool threads too,
+so the queries of async views are counted.  It counts the queries and
+their time, and notices:
+
+* duplicates, the same statement run again with the same parameters;
+* repeated statements, the same statement run with SQL_REPEATED_QUERY_
+  THRESHOLD or more different parameters, which is how an N+1 pattern
+  shows up.
+
+Totals are added to a per-process ViewStats and written to the shared
+cache every SQL_STATS_FLUSH_INTERVAL seconds with ``cache.incr``, so the
+sql_stats command sees the requests of every worker.  Like the version
+stamps of core.cache, this needs a cache shared by all workers: with a
+process-local backend such as LocMemCache the command runs in a process
+of its own and would see nothing, so it refuses to run.
+"""
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections
+
+
+KEY_PREFIX = 'sqlstats:'
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+VIEWS_KEY = KEY_PREFIX + 'views'
+# Counters summed over requests; times are stored in microseconds because
+# cache.incr only adds integers
+FIELDS = (
+    'requests',
+    'queries',
+    'db_us',
+    'total_us',
+    'duplicates',
+    'repeated_requests',
+    'slow_requests',
+)
+
+
+def _freeze(params):
+    """Return a hashable form of query parameters"""
+    if isinstance(params, dict):
+        params = tuple(sorted(params.items()))
+    elif isinstance(params, list):
+        params = tuple(params)
+    try:
+        hash(params)
+    except TypeError:
+        return repr(params)
+    return params
+
+
+class QueryTracker:
+    """Execute wrapper counting the queries of one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.executions = Counter()
+        # Async views run their queries on several pool threads at once
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            key = sql, None if many else _freeze(params)
+            with self._lock:
+                self.duration += elapsed
+                self.count += 1
+                self.executions[key] += 1
+
+    @property
+    def duplicates(self):
+        """Number of executions that repeated an earlier one exactly"""
+        return sum(
+            count - 1 for (_, params), count in self.executions.items()
+            if params is not None and count > 1
+        )
+
+    def repeated(self, threshold):
+        """Return [(sql, distinct parameters)] of the statements run with
+        at least ``threshold`` different parameters, most first"""
+        variants = Counter(sql for sql, _ in self.executions)
+        return [
+            (sql, count) for sql, count in variants.most_common()
+            if count >= threshold
+        ]
+
+
+current_tracker = ContextVar('current_tracker', default=None)
+
+
+@contextmanager
+def tracking(tracker):
+    """Install the tracker on every connection of this thread and make it
+    the current tracker"""
+    token = current_tracker.set(tracker)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(tracker))
+            yield tracker
+    finally:
+        current_tracker.reset(token)
+
+
+def is_process_local_cache():
+    """Return True if the default cache is not shared between processes"""
+    return isinstance(caches['default'], PROCESS_LOCAL_CACHES)
+
+
+def _key(view, field):
+    return '%s%s:%s' % (KEY_PREFIX, view, field)
+
+
+def _incr(key, delta):
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        # Evicted between add and incr
+        cache.set(key, delta, timeout=None)
+
+
+class ViewStats:
+    """Per-process totals by view, written to the shared cache in batches"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = defaultdict(Counter)
+        self._max_queries = {}
+        self._flushed_at = time.monotonic()
+
+    def add(self, view, tracker, elapsed, slow=False, repeated=False):
+        with self._lock:
+            pending = self._pending[view]
+            pending['requests'] += 1
+            pending['queries'] += tracker.count
+            pending['db_us'] += int(tracker.duration * 1000000)
+            pending['total_us'] += int(elapsed * 1000000)
+            pending['duplicates'] += tracker.duplicates
+            pending['repeated_requests'] += int(repeated)
+            pending['slow_requests'] += int(slow)
+            self._max_queries[view] = max(
+                self._max_queries.get(view, 0), tracker.count
+            )
+
+    def pending(self):
+        with self._lock:
+            return {
+                view: dict(counts) for view, counts in self._pending.items()
+            }
+
+    def flush(self):
+        """Add the pending totals to the shared cache"""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(Counter)
+            max_queries, self._max_queries = self._max_queries, {}
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return
+
+        views = set(cache.get(VIEWS_KEY) or ())
+        if not views.issuperset(pending):
+            # Not atomic, but every flush adds its views again
+            cache.set(VIEWS_KEY, sorted(views | set(pending)), timeout=None)
+        for view, counts in pending.items():
+            for field, value in counts.items():
+                if value:
+                    _incr(_key(view, field), value)
+            key = _key(view, 'max_queries')
+            if max_queries[view] > (cache.get(key) or 0):
+                cache.set(key, max_queries[view], timeout=None)
+
+    def flush_if_due(self, interval=None):
+        if interval is None:
+            interval = settings.SQL_STATS_FLUSH_INTERVAL
+        if time.monotonic() - self._flushed_at >= interval:
+            self.flush()
+
+
+view_stats = ViewStats()
+
+
+def read_stats():
+    """Return {view: totals} of every view seen by any worker"""
+    stats = {}
+    for view in cache.get(VIEWS_KEY) or ():
+        keys = {_key(view, field): field for field in FIELDS}
+        keys[_key(view, 'max_queries')] = 'max_queries'
+        values = cache.get_many(list(keys))
+        totals = {field: values.get(key, 0) for key, field in keys.items()}
+        if totals['requests']:
+            stats[view] = totals
+    return stats
+
+
+def reset_stats():
+    """Forget the shared totals"""
+    views = cache.get(VIEWS_KEY) or ()
+    keys = [VIEWS_KEY]
+    for view in views:
+        keys.extend(_key(view, field) for field in FIELDS)
+        keys.append(_key(view, 'max_queries'))
+    cache.delete_many(keys)
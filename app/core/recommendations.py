@@ -0,0 +1,224 @@
+"""Related product recommendations computed from product features.
+
+Every product becomes a sparse vector of its tags, keywords and sub
+categories, weighted by how rare each feature is (IDF) and by
+FEATURE_WEIGHTS, then normalized.  The cosine similarity of all pairs is
+the product of the matrix with its transpose; it is computed a block of
+rows at a time so memory stays bounded, and the best
+RECOMMENDATION_TOP_K unsold products of each row are written to
+RelatedProduct as generated rows.  Curated rows are left alone.
+
+Brands and grades are shared by large parts of the catalogue, so as
+matrix columns they would relate nearly every pair of products and make
+the product dense.  They only re-rank the candidates the sparse features
+found, adding RERANK_WEIGHTS to the similarity.
+
+Reading the recommendations of a product is then a single index range
+scan (see product.detail.load_related_products).
+"""
+import numpy as np
+from scipy import sparse
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from core import product_versions, statistics
+from core.models import (
+    Product,
+    ProductCategory,
+    ProductKeyword,
+    ProductTag,
+    RelatedProduct,
+)
+
+
+FEATURE_WEIGHTS = {
+    'category': 2.0,
+    'tag': 1.0,
+    'keyword': 1.0,
+}
+
+RERANK_WEIGHTS = {
+    'brand': 0.2,
+    'grade': 0.05,
+}
+
+LINK_FEATURES = (
+    (ProductTag, 'tag_id', 'tag'),
+    (ProductKeyword, 'keyword_id', 'keyword'),
+    (ProductCategory, 'sub_category_id', 'category'),
+)
+
+
+class FeatureMatrix:
+    """Normalized feature vectors of products, one row per product"""
+
+    def __init__(self, product_ids, matrix, candidates, brands, grades):
+        self.product_ids = np.asarray(product_ids, dtype=np.int64)
+        self.rows = {int(pk): row for row, pk in enumerate(product_ids)}
+        self.matrix = matrix
+        # Products that may be recommended
+        self.candidates = candidates
+        # Brand and grade ids of every row, -1 without a grade
+        self.brands = brands
+        self.grades = grades
+
+
+def _links(model, field):
+    """Return the (product id, feature id) links of a model as an array
+    of two columns"""
+    links = model.objects.filter(
+        product_id__isnull=False, **{field + '__isnull': False}
+    ).order_by().values_list('product_id', field)
+    return np.array(list(links.iterator()), dtype=np.int64).reshape(-1, 2)
+
+
+def _feature_entries(product_ids):
+    """Return the distinct (row, group, feature id) entries of the
+    products as an array of three columns"""
+    entries = [np.empty((0, 3), dtype=np.int64)]
+    for group, (model, field, _) in enumerate(LINK_FEATURES):
+        links = _links(model, field)
+        rows = np.searchsorted(product_ids, links[:, 0])
+        known = rows < len(product_ids)
+        known[known] = product_ids[rows[known]] == links[known, 0]
+        entries.append(np.column_stack((
+            rows[known],
+            np.full(np.count_nonzero(known), group, dtype=np.int64),
+            links[known, 1],
+        )))
+    return np.unique(np.concatenate(entries), axis=0)
+
+
+def build_features():
+    """Build the feature matrix of the whole catalogue"""
+    sold_ids = statistics.get_sold_status_ids()
+    products = list(
+        Product.objects.order_by('id').values_list(
+            'id', 'product_status_id', 'brand_id', 'product_grade_id'
+        ).iterator()
+    )
+    count = len(products)
+    product_ids = np.fromiter(
+        (pk for pk, _, _, _ in products), dtype=np.int64, count=count
+    )
+    candidates = np.fromiter(
+        (status not in sold_ids for _, status, _, _ in products),
+        dtype=bool, count=count,
+    )
+    brands = np.fromiter(
+        (brand for _, _, brand, _ in products), dtype=np.int64, count=count
+    )
+    grades = np.fromiter(
+        (-1 if grade is None else grade for _, _, _, grade in products),
+        dtype=np.int64, count=count,
+    )
+
+    entries = _feature_entries(product_ids)
+    columns, column_index = np.unique(
+        entries[:, 1:], axis=0, return_inverse=True
+    )
+    column_index = column_index.ravel()
+    frequency = np.bincount(column_index, minlength=len(columns))
+    idf = np.log((1 + count) / (1 + frequency)) + 1
+    group_weights = np.array(
+        [FEATURE_WEIGHTS[group] for _, _, group in LINK_FEATURES]
+    )
+    weights = (group_weights[columns[:, 0]] * idf).astype(np.float32)
+
+    matrix = sparse.csr_matrix(
+        (weights[column_index], (entries[:, 0], column_index)),
+        shape=(count, len(columns)),
+        dtype=np.float32,
+    )
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)))
+    norms[norms == 0] = 1
+    matrix = sparse.diags(1 / norms.ravel()).dot(matrix).tocsr()
+    return FeatureMatrix(product_ids, matrix, candidates, brands, grades)
+
+
+def top_neighbours(features, rows, top_k):
+    """Return {row: [(row, score), ...]} of the best candidates of rows"""
+    similarities = features.matrix[rows].dot(features.matrix.T).tocsr()
+    neighbours = {}
+    for offset, row in enumerate(rows):
+        start, end = similarities.indptr[offset:offset + 2]
+        columns = similarities.indices[start:end]
+        scores = similarities.data[start:end]
+        keep = (columns != row) & features.candidates[columns] & (scores > 0)
+        columns, scores = columns[keep], scores[keep]
+        scores = scores + RERANK_WEIGHTS['brand'] * (
+            features.brands[columns] == features.brands[row]
+        )
+        if features.grades[row] >= 0:
+            scores += RERANK_WEIGHTS['grade'] * (
+                features.grades[columns] == features.grades[row]
+            )
+        if len(scores) > top_k:
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+            columns, scores = columns[best], scores[best]
+        # Highest score first, ties by product id for stable output
+        order = np.lexsort((columns, -scores))
+        neighbours[row] = [
+            (int(columns[i]), float(scores[i])) for i in order
+        ]
+    return neighbours
+
+
+def write_recommendations(features, neighbours):
+    """Replace the generated rows of the given source rows"""
+    product_ids = features.product_ids
+    sources = [int(product_ids[row]) for row in neighbours]
+    related = [
+        RelatedProduct(
+            from_product_id=int(product_ids[row]),
+            to_product_id=int(product_ids[column]),
+            score=round(score, 6),
+            is_generated=True,
+        )
+        for row, columns in neighbours.items()
+        for column, score in columns
+    ]
+    with transaction.atomic():
+        RelatedProduct.objects.filter(
+            from_product_id__in=sources, is_generated=True
+        ).delete()
+        # Pairs that are already curated keep their curated row
+        RelatedProduct.objects.bulk_create(related, ignore_conflicts=True)
+        product_versions.invalidate_products(sources)
+    return len(related)
+
+
+def get_new_product_ids():
+    """Return the ids of products without generated recommendations"""
+    generated = RelatedProduct.objects.filter(
+        from_product=OuterRef('pk'), is_generated=True
+    )
+    return list(
+        Product.objects.filter(~Exists(generated))
+        .order_by('id')
+        .values_list('id', flat=True)
+    )
+
+
+def build_recommendations(product_ids=None, top_k=None, block_size=200):
+    """Compute and store the recommendations of the given products, or of
+    every product.
+
+    Yields (products done, rows written) after every block."""
+    top_k = top_k or settings.RECOMMENDATION_TOP_K
+    features = build_features()
+    if product_ids is None:
+        rows = list(range(len(features.product_ids)))
+    else:
+        rows = [
+            features.rows[pk] for pk in product_ids if pk in features.rows
+        ]
+
+    for start in range(0, len(rows), block_size):
+        block = rows[start:start + block_size]
+        written = write_recommendations(
+            features, top_neighbours(features, block, top_k)
+        )
+        yield len(block), written
@@ -0,0 +1,114 @@
+"""Process-local caches of the small reference tables.
+
+Grades, statuses, platforms, pickup times and categories change a few
+times a year but are looked up on almost every request.  Each table is
+loaded once per process and served from memory; saving or deleting a row
+bumps the table's shared version so every worker reloads it.
+
+The cached instances are shared between requests and must be treated as
+read-only.
+"""
+from core.cache import VersionedCache
+from core.models import (
+    MainCategory,
+    PickupTime,
+    ProductGrade,
+    ProductStatus,
+    SellCategory,
+    SocialPlatform,
+    SubCategory,
+    UserGrade,
+)
+
+
+class ReferenceTable:
+    """Immutable snapshot of a reference table"""
+
+    def __init__(self, objects, name_field):
+        self.objects = tuple(objects)
+        self.by_id = {obj.pk: obj for obj in self.objects}
+        self.by_name = {}
+        for obj in self.objects:
+            # Names are not unique, the first row wins like .first() would
+            self.by_name.setdefault(getattr(obj, name_field), obj)
+
+
+class ReferenceCache:
+    """Serve get by id, get by name and full lists of a model from memory"""
+
+    def __init__(self, model, name_field):
+        self.model = model
+        self.name_field = name_field
+        self._cache = VersionedCache(
+            'reference:' + model._meta.db_table, self.load
+        )
+
+    def load(self):
+        objects = self.model.objects.order_by('pk')
+        return ReferenceTable(objects, self.name_field)
+
+    def get(self, pk):
+        """Return the row with the given primary key"""
+        try:
+            return self._cache.get().by_id[pk]
+        except KeyError:
+            raise self.model.DoesNotExist(
+                '%s matching id %r does not exist.'
+                % (self.model._meta.object_name, pk)
+            )
+
+    def get_by_name(self, name):
+        """Return the first row with the given name"""
+        try:
+            return self._cache.get().by_name[name]
+        except KeyError:
+            raise self.model.DoesNotExist(
+                '%s matching name %r does not exist.'
+                % (self.model._meta.object_name, name)
+            )
+
+    def filter_by_name(self, name):
+        """Return every row with the given name"""
+        return [
+            obj for obj in self.all()
+            if getattr(obj, self.name_field) == name
+        ]
+
+    def all(self):
+        """Return every row ordered by primary key"""
+        return self._cache.get().objects
+
+    def invalidate(self):
+        self._cache.invalidate()
+
+    def clear(self):
+        self._cache.clear()
+
+
+user_grades = ReferenceCache(UserGrade, 'grade')
+social_platforms = ReferenceCache(SocialPlatform, 'platform')
+product_grades = ReferenceCache(ProductGrade, 'name')
+product_statuses = ReferenceCache(ProductStatus, 'name')
+sell_categories = ReferenceCache(SellCategory, 'name')
+pickup_times = ReferenceCache(PickupTime, 'time')
+main_categories = ReferenceCache(MainCategory, 'name')
+sub_categories = ReferenceCache(SubCategory, 'name')
+
+REFERENCE_CACHES = {
+    cache.model: cache
+    for cache in (
+        user_grades,
+        social_platforms,
+        product_grades,
+        product_statuses,
+        sell_categories,
+        pickup_times,
+        main_categories,
+        sub_categories,
+    )
+}
+
+
+def get_reference_cache(model):
+    """Return the reference cache of a model"""
+    return REFERENCE_CACHES[model]
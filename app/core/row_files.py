@@ -0,0 +1,55 @@
+"""Reading rows of bulk imports from JSON lines and CSV files."""
+import csv
+import json
+from itertools import islice
+
+
+LIST_SEPARATOR = '|'
+
+
+def unflatten(row, list_fields=()):
+    """Turn a CSV row into the nested shape of the JSON rows.
+
+    Columns in ``list_fields`` are separated by "|" and dotted columns
+    such as "detail.color" become nested objects."""
+    item = {}
+    for key, value in row.items():
+        if key is None:
+            continue
+        value = (value or '').strip()
+        if key in list_fields:
+            item[key] = [
+                part.strip() for part in value.split(LIST_SEPARATOR)
+                if part.strip()
+            ]
+        elif '.' in key:
+            group, field = key.split('.', 1)
+            if value:
+                item.setdefault(group, {})[field] = value
+        elif value:
+            item[key] = value
+    return item
+
+
+def read_rows(stream, format, list_fields=()):
+    """Yield the rows of a JSON lines or CSV text stream"""
+    if format == 'jsonl':
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+    elif format == 'csv':
+        for row in csv.DictReader(stream):
+            yield unflatten(row, list_fields)
+    else:
+        raise ValueError('Unsupported format %r' % format)
+
+
+def batched(rows, size):
+    """Yield lists of at most size rows"""
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
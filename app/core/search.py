@@ -0,0 +1,167 @@
+"""Product search documents.
+
+Each product stores three denormalized search columns, rebuilt whenever
+the product, its brand, tags or keywords change:
+
+* ``search_document``: a weighted tsvector (name and brand, then tags and
+  keywords, then memo) for ranked full-text matching.
+* ``search_text``: the same words lowercased, trigram indexed for partial
+  matches that the word based tsvector misses (Korean words usually carry
+  particles).
+* ``search_chosung``: the Hangul initial consonants of the name and brand,
+  trigram indexed so that queries such as "ㅅㄴ" find "샤넬".
+
+pg_trgm can only use its indexes for a word of three characters or more,
+and most Korean queries are two syllables, so short queries match word
+prefixes in ``search_document`` instead, whose GIN index serves
+``word:*`` queries of any length.  The initial consonants are part of
+the document too (weight D) for two letter queries such as "ㅅㄴ".
+Documents built before that need ``manage.py rebuild_search_index``.
+"""
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramSimilarity,
+)
+from django.db.models import F, Q, Value
+
+from core.models import Product
+
+
+SEARCH_CONFIG = 'simple'
+# Shortest word the trigram indexes can answer a LIKE '%word%' with
+TRIGRAM_MIN_LENGTH = 3
+
+CHOSUNG = (
+    'ㄱ', 'ㄲ', 'ㄴ', 'ㄷ', 'ㄸ', 'ㄹ', 'ㅁ', 'ㅂ', 'ㅃ', 'ㅅ',
+    'ㅆ', 'ㅇ', 'ㅈ', 'ㅉ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ',
+)
+CHOSUNG_SET = frozenset(CHOSUNG)
+
+HANGUL_START = 0xAC00
+HANGUL_END = 0xD7A3
+# Number of syllables sharing one initial consonant (21 vowels * 28 finals)
+HANGUL_CHOSUNG_SPAN = 588
+
+
+def to_chosung(text):
+    """Return the initial consonants of the Hangul syllables in text.
+
+    Other characters are dropped except spaces, so word boundaries are
+    kept."""
+    letters = []
+    for char in text or '':
+        code = ord(char)
+        if HANGUL_START <= code <= HANGUL_END:
+            letters.append(
+                CHOSUNG[(code - HANGUL_START) // HANGUL_CHOSUNG_SPAN]
+            )
+        elif char in CHOSUNG_SET or char.isspace():
+            letters.append(char)
+    return ' '.join(''.join(letters).split())
+
+
+def is_chosung_query(query):
+    """Return True when the query only contains initial consonants"""
+    letters = [char for char in query if not char.isspace()]
+    return bool(letters) and all(char in CHOSUNG_SET for char in letters)
+
+
+def is_short_query(query):
+    """Return True when no word of the query is long enough for the
+    trigram indexes"""
+    return max(map(len, query.split()), default=0) < TRIGRAM_MIN_LENGTH
+
+
+def to_prefix_tsquery(query):
+    """Return tsquery text matching the words starting with every word of
+    the query"""
+    return ' & '.join(
+        "'%s':*" % word.replace('\\', '\\\\').replace("'", "''")
+        for word in query.split()
+    )
+
+
+def _join(*parts):
+    return ' '.join(part for part in parts if part)
+
+
+def build_document(product):
+    """Return the search column values of a product.
+
+    The brand, tags and keywords should be preloaded."""
+    brand = product.brand
+    brand_text = _join(brand.kor_name, brand.eng_name)
+    tags_text = _join(*(tag.name for tag in product.tag.all()))
+    keywords_text = _join(*(keyword.name for keyword in product.keyword.all()))
+    chosung = _join(
+        to_chosung(product.name),
+        brand.kor_letters,
+        to_chosung(brand.kor_name),
+    )
+
+    document = (
+        SearchVector(
+            Value(_join(product.name, brand_text)),
+            weight='A',
+            config=SEARCH_CONFIG,
+        )
+        + SearchVector(
+            Value(_join(tags_text, keywords_text)),
+            weight='B',
+            config=SEARCH_CONFIG,
+        )
+        + SearchVector(Value(product.memo), weight='C', config=SEARCH_CONFIG)
+        + SearchVector(Value(chosung), weight='D', config=SEARCH_CONFIG)
+    )
+    return {
+        'search_document': document,
+        'search_text': _join(
+            product.name, brand_text, tags_text, keywords_text
+        ).lower(),
+        'search_chosung': chosung,
+    }
+
+
+def update_search_documents(product_ids, chunk_size=500):
+    """Rebuild the search columns of the given products"""
+    product_ids = sorted({pk for pk in product_ids if pk is not None})
+    for start in range(0, len(product_ids), chunk_size):
+        chunk = product_ids[start:start + chunk_size]
+        products = (
+            Product.objects.filter(pk__in=chunk)
+            .select_related('brand')
+            .prefetch_related('tag', 'keyword')
+            .only('id', 'name', 'memo', 'brand')
+        )
+        for product in products:
+            Product.objects.filter(pk=product.pk).update(
+                **build_document(product)
+            )
+
+
+def search_products(queryset, query):
+    """Filter a product queryset by a search query and annotate its rank"""
+    query = ' '.join(query.split())
+    if is_short_query(query):
+        search_query = SearchQuery(
+            to_prefix_tsquery(query.lower()),
+            config=SEARCH_CONFIG,
+            search_type='raw',
+        )
+        return queryset.filter(search_document=search_query).annotate(
+            rank=SearchRank(F('search_document'), search_query)
+        )
+    if is_chosung_query(query):
+        return queryset.filter(search_chosung__contains=query).annotate(
+            rank=TrigramSimilarity('search_chosung', query)
+        )
+
+    search_query = SearchQuery(
+        query, config=SEARCH_CONFIG, search_type='plain'
+    )
+    return queryset.filter(
+        Q(search_document=search_query)
+        | Q(search_text__contains=query.lower())
+    ).annotate(rank=SearchRank(F('search_document'), search_query))
@@ -0,0 +1,327 @@
+"""Deterministic synthetic data at production scale, for benchmarks.
+
+Rows are generated from a seeded random.Random, so the same seed always
+produces the same data.  Primary keys are assigned up front, which lets
+a batch of products and all of its children be generated together and
+written with COPY on PostgreSQL; the sequences are moved past the new
+ids at the end.  Other databases fall back to bulk_create, which does not
+keep the generated auto_now_add dates.
+
+Every user shares one password hash, hashing millions of passwords would
+dominate the run.  Search documents are not built; run
+rebuild_search_index afterwards when benchmarking search.
+"""
+import io
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from core.models import (
+    Brand,
+    Image,
+    Keyword,
+    MainCategory,
+    PriceHistory,
+    Product,
+    ProductCategory,
+    ProductGrade,
+    ProductKeyword,
+    ProductStatus,
+    ProductStatusLog,
+    ProductTag,
+    SellCategory,
+    SubCategory,
+    Tag,
+    UserGrade,
+)
+from core.search import to_chosung
+
+
+BENCHMARK_PASSWORD = 'benchmark'
+GRADES = ('S', 'A', 'B', 'C')
+STATUSES = ('입고', '검수', '판매중', '판매완료')
+SELL_CATEGORIES = ('가방', '지갑', '시계', '주얼리', '의류')
+USER_GRADES = ('일반회원', '우수회원', 'VIP')
+SYLLABLES = (
+    '가', '나', '다', '라', '마', '바', '사', '아', '자', '차', '카', '타',
+    '파', '하', '루', '미', '소', '레', '도', '시',
+)
+
+
+def _escape(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return (
+        str(value).replace('\\', '\\\\').replace('\t', '\\t')
+        .replace('\n', '\\n').replace('\r', '\\r')
+    )
+
+
+def _field_value(obj, field):
+    value = getattr(obj, field.attname)
+    if value is None and (
+        getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ):
+        value = field.pre_save(obj, True)
+    return field.get_db_prep_save(value, connection)
+
+
+def write_objects(model, objects, batch_size=5000):
+    """Insert objects that already have their primary keys"""
+    if not objects:
+        return
+    if connection.vendor != 'postgresql':
+        model.objects.bulk_create(objects, batch_size=batch_size)
+        return
+    fields = model._meta.concrete_fields
+    buffer = io.StringIO()
+    for obj in objects:
+        buffer.write('\t'.join(
+            _escape(_field_value(obj, field)) for field in fields
+        ))
+        buffer.write('\n')
+    buffer.seek(0)
+    sql = 'COPY %s (%s) FROM STDIN' % (
+        connection.ops.quote_name(model._meta.db_table),
+        ', '.join(connection.ops.quote_name(f.column) for f in fields),
+    )
+    with connection.cursor() as cursor:
+        cursor.copy_expert(sql, buffer)
+
+
+def reset_sequences(models):
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+class IdAllocator:
+    """Hand out primary keys after the current maximum of each model"""
+
+    def __init__(self):
+        self.next_ids = {}
+
+    def take(self, model, count=1):
+        if model not in self.next_ids:
+            current = model.objects.aggregate(last=Max('pk'))['last'] or 0
+            self.next_ids[model] = current + 1
+        first = self.next_ids[model]
+        self.next_ids[model] += count
+        return range(first, first + count)
+
+
+class Seeder:
+    """Generate users, products and their history from a seed"""
+
+    def __init__(self, seed=0, now=None):
+        self.random = random.Random(seed)
+        self.now = now or timezone.now()
+        self.ids = IdAllocator()
+        self.written = {}
+
+    def write(self, model, objects):
+        write_objects(model, objects)
+        self.written[model] = self.written.get(model, 0) + len(objects)
+
+    def word(self, syllables=3):
+        return ''.join(
+            self.random.choice(SYLLABLES) for _ in range(syllables)
+        )
+
+    def reference(self, model, field, names):
+        return [
+            model.objects.get_or_create(**{field: name})[0].pk
+            for name in names
+        ]
+
+    def seed_reference(self, brands, tags, keywords, categories):
+        """Create the reference rows products point to"""
+        self.grade_ids = self.reference(ProductGrade, 'name', GRADES)
+        self.status_ids = self.reference(ProductStatus, 'name', STATUSES)
+        self.sell_category_ids = self.reference(
+            SellCategory, 'name', SELL_CATEGORIES
+        )
+        self.user_grade_ids = self.reference(UserGrade, 'grade', USER_GRADES)
+
+        main_ids = self.ids.take(MainCategory, len(SELL_CATEGORIES))
+        self.write(MainCategory, [
+            MainCategory(pk=pk, name=name, code='M%d' % pk)
+            for pk, name in zip(main_ids, SELL_CATEGORIES)
+        ])
+        sub_ids = self.ids.take(SubCategory, categories)
+        self.write(SubCategory, [
+            SubCategory(
+                pk=pk, name=self.word(2), code='S%d' % pk,
+                main_category_id=self.random.choice(main_ids),
+            )
+            for pk in sub_ids
+        ])
+        self.sub_category_ids = list(sub_ids)
+
+        brand_ids = self.ids.take(Brand, brands)
+        brand_objects = []
+        for pk in brand_ids:
+            name = self.word(3)
+            brand_objects.append(Brand(
+                pk=pk,
+                kor_name=name,
+                kor_letters=to_chosung(name),
+                eng_name='BRAND%d' % pk,
+            ))
+        self.write(Brand, brand_objects)
+        self.brand_ids = list(brand_ids)
+
+        tag_ids = self.ids.take(Tag, tags)
+        self.write(Tag, [Tag(pk=pk, name=self.word()) for pk in tag_ids])
+        self.tag_ids = list(tag_ids)
+        keyword_ids = self.ids.take(Keyword, keywords)
+        self.write(Keyword, [
+            Keyword(pk=pk, name=self.word()) for pk in keyword_ids
+        ])
+        self.keyword_ids = list(keyword_ids)
+
+    def seed_users(self, count, batch_size):
+        """Create users, yielding the number created after every batch"""
+        User = get_user_model()
+        password = make_password(BENCHMARK_PASSWORD)
+        self.user_ids = []
+        for start in range(0, count, batch_size):
+            size = min(batch_size, count - start)
+            ids = self.ids.take(User, size)
+            users = [
+                User(
+                    pk=pk,
+                    email='user%d@benchmark.test' % pk,
+                    password=password,
+                    name=self.word(3),
+                    phone_number='010%08d' % pk,
+                    gender=self.random.choice(('남성', '여성')),
+                    grade_id=self.random.choice(self.user_grade_ids),
+                    date_created=self.now - timedelta(
+                        days=self.random.randrange(1000)
+                    ),
+                )
+                for pk in ids
+            ]
+            with transaction.atomic():
+                self.write(User, users)
+            self.user_ids.extend(ids)
+            yield start + size
+
+    def product_batch(self, ids, price_changes, status_changes, images,
+                      tags, keywords):
+        """Return the products of ids with all of their child rows"""
+        rows = {model: [] for model in (
+            Product, PriceHistory, ProductStatusLog, Image, ProductTag,
+            ProductKeyword, ProductCategory,
+        )}
+        statuses = self.status_ids[:max(status_changes, 1)]
+        child_ids = {
+            model: iter(self.ids.take(model, len(ids) * count))
+            for model, count in (
+                (PriceHistory, price_changes),
+                (ProductStatusLog, len(statuses)),
+                (Image, images),
+                (ProductTag, tags),
+                (ProductKeyword, keywords),
+                (ProductCategory, 1),
+            )
+        }
+
+        for pk in ids:
+            created_at = self.now - timedelta(
+                seconds=self.random.randrange(2 * 365 * 24 * 3600)
+            )
+            price = Decimal(self.random.randrange(50, 50000) * 1000)
+            history = []
+            for step in range(price_changes):
+                history.append(PriceHistory(
+                    pk=next(child_ids[PriceHistory]),
+                    product_id=pk,
+                    price=price * (100 - 5 * step) / 100,
+                    created_at=created_at + timedelta(days=7 * step),
+                    is_uptodate=step == price_changes - 1,
+                ))
+            rows[Product].append(Product(
+                pk=pk,
+                brand_id=self.random.choice(self.brand_ids),
+                user_id=self.random.choice(self.user_ids),
+                name=self.word(4),
+                purchased_year=str(self.random.randrange(2010, 2021)),
+                purchased_where='백화점',
+                purchased_price=str(price),
+                wish_price=str(price),
+                memo=self.word(6),
+                price=history[-1].price if history else price,
+                current_price_id=history[-1].pk if history else None,
+                product_grade_id=self.random.choice(self.grade_ids),
+                product_status_id=statuses[-1],
+                sell_category_id=self.random.choice(self.sell_category_ids),
+                created_at=created_at,
+            ))
+            rows[PriceHistory].extend(history)
+            for step, status_id in enumerate(statuses):
+                rows[ProductStatusLog].append(ProductStatusLog(
+                    pk=next(child_ids[ProductStatusLog]),
+                    product_id=pk,
+                    product_status_id=status_id,
+                    created_at=created_at + timedelta(
+                        hours=step * self.random.randrange(1, 96)
+                    ),
+                ))
+            for number in range(images):
+                rows[Image].append(Image(
+                    pk=next(child_ids[Image]),
+                    product_id=pk,
+                    image_url='benchmark/%d/%d.jpg' % (pk, number),
+                    is_damaged=False,
+                ))
+            for tag_id in self.random.sample(self.tag_ids, tags):
+                rows[ProductTag].append(ProductTag(
+                    pk=next(child_ids[ProductTag]), product_id=pk,
+                    tag_id=tag_id,
+                ))
+            for keyword_id in self.random.sample(self.keyword_ids, keywords):
+                rows[ProductKeyword].append(ProductKeyword(
+                    pk=next(child_ids[ProductKeyword]), product_id=pk,
+                    keyword_id=keyword_id,
+                ))
+            rows[ProductCategory].append(ProductCategory(
+                pk=next(child_ids[ProductCategory]), product_id=pk,
+                sub_category_id=self.random.choice(self.sub_category_ids),
+            ))
+        return rows
+
+    def seed_products(self, count, batch_size, price_changes=3,
+                      status_changes=3, images=3, tags=3, keywords=2):
+        """Create products and their children, yielding the number of
+        products created after every batch"""
+        tags = min(tags, len(self.tag_ids))
+        keywords = min(keywords, len(self.keyword_ids))
+        for start in range(0, count, batch_size):
+            size = min(batch_size, count - start)
+            rows = self.product_batch(
+                self.ids.take(Product, size), price_changes,
+                status_changes, images, tags, keywords,
+            )
+            # Foreign keys are checked at commit, so the order within the
+            # transaction does not matter
+            with transaction.atomic():
+                for model, objects in rows.items():
+                    self.write(model, objects)
+            yield start + size
+
+    def finish(self):
+        """Move every sequence past the ids handed out"""
+        reset_sequences(list(self.ids.next_ids))
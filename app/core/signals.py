@@ -0,0 +1,232 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Subquery
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from core import product_versions, reference, search, statistics
+from core.autocomplete import brand_index
+from core.models import (
+    Brand,
+    BrandCategory,
+    Image,
+    Keyword,
+    PriceHistory,
+    Product,
+    ProductCategory,
+    ProductDetail,
+    ProductKeyword,
+    ProductTag,
+    RelatedProduct,
+    SellerReview,
+    SubCategory,
+    Tag,
+)
+
+
+SEARCH_FIELDS = {'name', 'memo', 'brand'}
+
+
+@receiver(post_init, sender=Product)
+def remember_product_status(sender, instance, **kwargs):
+    """Keep the loaded status so saves can tell when it changed"""
+    # Deferred fields are missing from __dict__; reading them would query
+    instance._loaded_product_status_id = instance.__dict__.get(
+        'product_status_id'
+    )
+
+
+@receiver(post_save, sender=Product)
+def track_product_sale(sender, instance, created, raw, update_fields,
+                       **kwargs):
+    """Update the sell statistics when a product is sold or cancelled"""
+    if raw:
+        return
+    if update_fields is not None and 'product_status' not in update_fields:
+        return
+    previous = None if created else instance._loaded_product_status_id
+    if previous != instance.product_status_id:
+        statistics.product_status_changed(
+            instance, previous, instance.product_status_id
+        )
+    instance._loaded_product_status_id = instance.product_status_id
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, raw, update_fields, **kwargs):
+    """Rebuild the search document of a saved product"""
+    if raw:
+        return
+    if update_fields is not None and not SEARCH_FIELDS & set(update_fields):
+        return
+    search.update_search_documents([instance.pk])
+
+
+@receiver(post_save, sender=ProductTag)
+@receiver(post_delete, sender=ProductTag)
+@receiver(post_save, sender=ProductKeyword)
+@receiver(post_delete, sender=ProductKeyword)
+def index_product_labels(sender, instance, raw=False, **kwargs):
+    """Rebuild the search document when a tag or keyword is attached"""
+    if raw or instance.product_id is None:
+        return
+    search.update_search_documents([instance.product_id])
+
+
+@receiver(post_save, sender=Tag)
+def index_tagged_products(sender, instance, created, raw, **kwargs):
+    """Rebuild the search documents of the products using a tag"""
+    if raw or created:
+        return
+    search.update_search_documents(
+        ProductTag.objects.filter(tag=instance).values_list(
+            'product_id', flat=True
+        )
+    )
+
+
+@receiver(post_save, sender=Keyword)
+def index_keyword_products(sender, instance, created, raw, **kwargs):
+    """Rebuild the search documents of the products using a keyword"""
+    if raw or created:
+        return
+    search.update_search_documents(
+        ProductKeyword.objects.filter(keyword=instance).values_list(
+            'product_id', flat=True
+        )
+    )
+
+
+@receiver(post_save, sender=Brand)
+def index_brand_products(sender, instance, created, raw, **kwargs):
+    """Rebuild the search documents of the products of a brand"""
+    if raw or created:
+        return
+    search.update_search_documents(
+        Product.objects.filter(brand=instance).values_list('id', flat=True)
+    )
+
+
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+@receiver(post_save, sender=BrandCategory)
+@receiver(post_delete, sender=BrandCategory)
+def invalidate_brand_index(sender, **kwargs):
+    """Rebuild the brand autocomplete index in every process"""
+    brand_index.invalidate()
+
+
+def invalidate_reference_cache(sender, **kwargs):
+    """Reload a reference table in every process"""
+    reference.get_reference_cache(sender).invalidate()
+
+
+for reference_model in reference.REFERENCE_CACHES:
+    post_save.connect(invalidate_reference_cache, sender=reference_model)
+    post_delete.connect(invalidate_reference_cache, sender=reference_model)
+
+
+def invalidate_product_and_related_pages(product_id):
+    """Refresh the detail page of a product and of the pages listing it
+    as a related product"""
+    product_versions.invalidate_products([product_id])
+    product_versions.invalidate_products(
+        RelatedProduct.objects.filter(to_product_id=product_id).values_list(
+            'from_product_id', flat=True
+        )
+    )
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_page(sender, instance, **kwargs):
+    """Refresh the pages showing a product"""
+    invalidate_product_and_related_pages(instance.pk)
+
+
+@receiver(post_save, sender=PriceHistory)
+@receiver(post_delete, sender=PriceHistory)
+def invalidate_price_pages(sender, instance, **kwargs):
+    """Refresh the pages showing the price of a product, which
+    record_price changes with update()"""
+    if instance.product_id is not None:
+        invalidate_product_and_related_pages(instance.product_id)
+
+
+def invalidate_page_of_row(sender, instance, **kwargs):
+    """Refresh the detail page showing a row of a product"""
+    product_versions.invalidate_products([instance.product_id])
+
+
+for page_model in (
+    ProductDetail,
+    Image,
+    ProductTag,
+    ProductKeyword,
+    ProductCategory,
+):
+    post_save.connect(invalidate_page_of_row, sender=page_model)
+    post_delete.connect(invalidate_page_of_row, sender=page_model)
+
+
+@receiver(post_save, sender=RelatedProduct)
+@receiver(post_delete, sender=RelatedProduct)
+def invalidate_related_page(sender, instance, **kwargs):
+    """Refresh the detail page listing a related product"""
+    product_versions.invalidate_products([instance.from_product_id])
+
+
+@receiver(post_save, sender=SellerReview)
+@receiver(post_delete, sender=SellerReview)
+def invalidate_seller_pages(sender, instance, **kwargs):
+    """Refresh the pages of every product of the reviewed seller, which
+    all show the latest reviews of the seller"""
+    seller = Product.objects.filter(pk=instance.product_id).values(
+        'user_id'
+    )[:1]
+    product_versions.invalidate_products([instance.product_id])
+    product_versions.invalidate_products(
+        Product.objects.filter(user_id=Subquery(seller)).values_list(
+            'id', flat=True
+        )
+    )
+
+
+@receiver(post_init, sender=get_user_model())
+def remember_user_name(sender, instance, **kwargs):
+    """Keep the loaded name so saves can tell when it changed"""
+    instance._loaded_name = instance.__dict__.get('name')
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_user_pages(sender, instance, created, raw, update_fields,
+                          **kwargs):
+    """Refresh the pages showing the name of a seller when it changed"""
+    if created or raw:
+        return
+    if update_fields is not None and 'name' not in update_fields:
+        return
+    # A deferred name that was never assigned is not in __dict__
+    name = instance.__dict__.get('name', instance._loaded_name)
+    if name == instance._loaded_name:
+        return
+    instance._loaded_name = name
+    product_versions.invalidate_products(
+        Product.objects.filter(user=instance).values_list('id', flat=True)
+    )
+
+
+def invalidate_catalogue(sender, created=False, raw=False, **kwargs):
+    """Refresh every product page when a row they may show changes.
+
+    A new row is on no page yet; products linking it refresh their own
+    page."""
+    if created or raw:
+        return
+    product_versions.invalidate_catalogue()
+
+
+for catalogue_model in (Brand, Tag, Keyword, SubCategory) + tuple(
+    reference.REFERENCE_CACHES
+):
+    post_save.connect(invalidate_catalogue, sender=catalogue_model)
+    post_delete.connect(invalidate_catalogue, sender=catalogue_model)
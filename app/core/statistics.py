@@ -0,0 +1,244 @@
+"""Incremental maintenance of the SellStatistic rollups.
+
+Every sale is written once to SellRecord and added to the total, brand,
+sell category and day rows of SellStatistic with F() expressions, so the
+rollups stay exact under concurrent sales and reading one is a single
+unique-index lookup.  Cancelling a sale subtracts exactly what the record
+added.  Both run inside the caller's transaction, so a rollback reverts
+the deltas together with the status change that caused them.
+
+Reconciliation recomputes the rollups from the products in a sold status
+rather than from every SellRecord, so a missing or stale record shows up
+instead of being summed into the expected values.  A sold product with a
+record counts with the values of its record, which is what cancelling it
+subtracts later; one without is recomputed from the product and its
+status log, which is what recording it again stores.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Value, When
+from django.utils import timezone
+
+from core import reference, user_counters
+from core.models import Product, ProductStatusLog, SellRecord, SellStatistic
+
+
+def get_sold_status_ids():
+    """Return the ids of the statuses that mark a product as sold"""
+    return {
+        status.id
+        for status in reference.product_statuses.filter_by_name(
+            settings.SOLD_PRODUCT_STATUS
+        )
+    }
+
+
+def get_scope_keys(brand_id, sell_category_id, sold_at):
+    """Return the (scope, key) rows a sale contributes to"""
+    keys = [
+        (SellStatistic.TOTAL, ''),
+        (SellStatistic.BRAND, str(brand_id)),
+        (SellStatistic.DAY, timezone.localdate(sold_at).isoformat()),
+    ]
+    if sell_category_id is not None:
+        keys.append((SellStatistic.SELL_CATEGORY, str(sell_category_id)))
+    # Always lock the rows in the same order to avoid deadlocks
+    return sorted(keys)
+
+
+def apply_delta(keys, price, count, period):
+    """Add a delta to every given rollup row, creating missing rows"""
+    for scope, key in keys:
+        SellStatistic.objects.get_or_create(
+            scope=scope,
+            key=key,
+            defaults={
+                'total_price': 0,
+                'total_count': 0,
+                'total_period': 0,
+                'average_period': 0,
+            },
+        )
+        SellStatistic.objects.filter(scope=scope, key=key).update(
+            total_price=F('total_price') + price,
+            total_count=F('total_count') + count,
+            total_period=F('total_period') + period,
+            average_period=Case(
+                When(total_count=-count, then=Value(0)),
+                default=(
+                    (F('total_period') + period) / (F('total_count') + count)
+                ),
+                output_field=IntegerField(),
+            ),
+        )
+
+
+def record_sale(product, sold_at=None):
+    """Add a sold product to the rollups and the seller's sell total"""
+    sold_at = sold_at or timezone.now()
+    with transaction.atomic():
+        if SellRecord.objects.filter(product=product).exists():
+            return None
+        record = SellRecord.objects.create(
+            product=product,
+            seller_id=product.user_id,
+            brand_id=product.brand_id,
+            sell_category_id=product.sell_category_id,
+            price=product.price or Decimal('0'),
+            period=max((sold_at - product.created_at).days, 0),
+            sold_at=sold_at,
+        )
+        apply_delta(
+            get_scope_keys(
+                record.brand_id, record.sell_category_id, record.sold_at
+            ),
+            record.price,
+            1,
+            record.period,
+        )
+        user_counters.add_sale(record.seller_id, record.price)
+    return record
+
+
+def cancel_sale(product):
+    """Remove a previously recorded sale from the rollups and the
+    seller's sell total"""
+    with transaction.atomic():
+        record = (
+            SellRecord.objects.select_for_update()
+            .filter(product=product)
+            .first()
+        )
+        if record is None:
+            return None
+        apply_delta(
+            get_scope_keys(
+                record.brand_id, record.sell_category_id, record.sold_at
+            ),
+            -record.price,
+            -1,
+            -record.period,
+        )
+        seller_id = record.seller_id
+        if seller_id is None:
+            # Recorded before the seller was stored
+            seller_id = product.user_id
+        user_counters.cancel_sale(seller_id, record.price)
+        record.delete()
+    return record
+
+
+def product_status_changed(product, previous_status_id, status_id):
+    """Record or cancel a sale when a product enters or leaves sold"""
+    sold_ids = get_sold_status_ids()
+    was_sold = previous_status_id in sold_ids
+    is_sold = status_id in sold_ids
+    if is_sold and not was_sold:
+        return record_sale(product)
+    if was_sold and not is_sold:
+        return cancel_sale(product)
+    return None
+
+
+def _iter_sold_products(sold_ids, chunk_size):
+    """Yield the sold products in ascending chunks"""
+    products = Product.objects.filter(
+        product_status_id__in=sold_ids
+    ).order_by('pk').values(
+        'pk', 'user_id', 'brand_id', 'sell_category_id', 'price',
+        'created_at',
+    )
+    last = 0
+    while True:
+        chunk = list(products.filter(pk__gt=last)[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1]['pk']
+
+
+def _expected_sale(product, sold_at):
+    return {
+        'product_id': product['pk'],
+        'seller_id': product['user_id'],
+        'brand_id': product['brand_id'],
+        'sell_category_id': product['sell_category_id'],
+        'price': product['price'] or Decimal('0'),
+        'period': max((sold_at - product['created_at']).days, 0),
+        'sold_at': sold_at,
+    }
+
+
+def iter_expected_sales(chunk_size=2000):
+    """Yield chunks of [(sale, has record)] of the products in a sold
+    status, without reading the rollups.
+
+    A product with a sell record counts with the values of its record.
+    Otherwise the sale is recomputed from the product, dated when the
+    status log last shows it entering a sold status, or by its creation
+    when the log does not."""
+    sold_ids = get_sold_status_ids()
+    for products in _iter_sold_products(sold_ids, chunk_size):
+        ids = [product['pk'] for product in products]
+        recorded = {
+            record['product_id']: record
+            for record in SellRecord.objects.filter(
+                product_id__in=ids
+            ).values(
+                'product_id', 'seller_id', 'brand_id', 'sell_category_id',
+                'price', 'period', 'sold_at',
+            )
+        }
+        logged = dict(
+            ProductStatusLog.objects.filter(
+                product_id__in=ids, product_status_id__in=sold_ids
+            ).exclude(product_id__in=recorded)
+            .order_by().values('product_id')
+            .annotate(sold_at=Max('created_at'))
+            .values_list('product_id', 'sold_at')
+        )
+        yield [
+            (recorded[product['pk']], True)
+            if product['pk'] in recorded
+            else (
+                _expected_sale(product, (
+                    logged.get(product['pk']) or product['created_at']
+                )),
+                False,
+            )
+            for product in products
+        ]
+
+
+def get_stale_records():
+    """Return the sell records of products that are no longer sold or
+    were deleted"""
+    return SellRecord.objects.exclude(
+        product__product_status_id__in=get_sold_status_ids()
+    ).select_related('product').order_by('pk')
+
+
+def compute_rollups(chunk_size=2000):
+    """Recompute every rollup row from the sold products, streaming them
+    in chunks.
+
+    Returns the rollups as a dict mapping (scope, key) to [total_price,
+    total_count, total_period], and the expected sales of sold products
+    without a sell record."""
+    totals = defaultdict(lambda: [Decimal('0'), 0, 0])
+    missing = []
+    for chunk in iter_expected_sales(chunk_size):
+        for sale, has_record in chunk:
+            if not has_record:
+                missing.append(sale)
+            for scope_key in get_scope_keys(
+                sale['brand_id'], sale['sell_category_id'], sale['sold_at']
+            ):
+                row = totals[scope_key]
+                row[0] += sale['price']
+                row[1] += 1
+                row[2] += sale['period']
+    return totals, missing
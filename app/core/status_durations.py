@@ -0,0 +1,172 @@
+"""Time products spend in each status, computed from ProductStatusLog.
+
+The log is streamed in (product, created_at) order through a server-side
+cursor and turned into NumPy arrays one chunk at a time.  A product stays
+in a status from its log entry until its next one, so the durations of a
+chunk are the differences between consecutive rows of the same product;
+the last row of a chunk is carried over to the next one.  The status a
+product is currently in has no end yet and is not counted.
+
+The durations are then grouped by status for every product, brand and
+sell category, and their mean and percentiles are stored in
+StatusDurationStatistic.
+"""
+import numpy as np
+
+from django.db import transaction
+
+from core.models import (
+    ProductStatusLog,
+    SellStatistic,
+    StatusDurationStatistic,
+)
+
+
+MISSING = -1
+PERCENTILES = (50, 90, 95)
+COLUMNS = ('product_id', 'status', 'brand', 'sell_category', 'time')
+
+
+def _to_arrays(rows):
+    """Turn a chunk of log rows into one array per column"""
+    product_ids, statuses, brands, categories, times = zip(*rows)
+
+    def ids(values):
+        return np.array(
+            [MISSING if value is None else value for value in values],
+            dtype=np.int64,
+        )
+
+    return {
+        'product_id': ids(product_ids),
+        'status': ids(statuses),
+        'brand': ids(brands),
+        'sell_category': ids(categories),
+        'time': np.array([value.timestamp() for value in times]),
+    }
+
+
+def _chunk_durations(chunk):
+    """Return the completed durations of a chunk as arrays of status,
+    brand, sell category and seconds"""
+    same_product = chunk['product_id'][1:] == chunk['product_id'][:-1]
+    keep = same_product & (chunk['status'][:-1] != MISSING)
+    seconds = chunk['time'][1:] - chunk['time'][:-1]
+    return {
+        'status': chunk['status'][:-1][keep],
+        'brand': chunk['brand'][:-1][keep],
+        'sell_category': chunk['sell_category'][:-1][keep],
+        'seconds': seconds[keep],
+    }
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def compute_durations(chunk_size=10000):
+    """Stream the log and return the durations of every completed status
+    stay, as arrays of status, brand, sell category and seconds"""
+    log = ProductStatusLog.objects.filter(
+        product__isnull=False
+    ).order_by('product_id', 'created_at', 'id').values_list(
+        'product_id',
+        'product_status_id',
+        'product__brand_id',
+        'product__sell_category_id',
+        'created_at',
+    )
+
+    parts = []
+    carry = None
+    for rows in _chunks(log.iterator(chunk_size=chunk_size), chunk_size):
+        chunk = _to_arrays(rows)
+        if carry is not None:
+            chunk = {
+                column: np.concatenate((carry[column], chunk[column]))
+                for column in COLUMNS
+            }
+        parts.append(_chunk_durations(chunk))
+        carry = {column: chunk[column][-1:] for column in COLUMNS}
+
+    if not parts:
+        return {
+            'status': np.empty(0, dtype=np.int64),
+            'brand': np.empty(0, dtype=np.int64),
+            'sell_category': np.empty(0, dtype=np.int64),
+            'seconds': np.empty(0),
+        }
+    return {
+        column: np.concatenate([part[column] for part in parts])
+        for column in parts[0]
+    }
+
+
+def summarize(statuses, keys, seconds):
+    """Return {(key, status): (count, mean, p50, p90, p95)} of durations
+    grouped by key and status"""
+    valid = keys != MISSING
+    statuses, keys, seconds = statuses[valid], keys[valid], seconds[valid]
+    if not len(seconds):
+        return {}
+    order = np.lexsort((statuses, keys))
+    statuses, keys, seconds = statuses[order], keys[order], seconds[order]
+    groups = np.flatnonzero(
+        (np.diff(keys) != 0) | (np.diff(statuses) != 0)
+    ) + 1
+    summary = {}
+    for start, end in zip(
+        np.concatenate(([0], groups)),
+        np.concatenate((groups, [len(seconds)])),
+    ):
+        values = seconds[start:end]
+        summary[int(keys[start]), int(statuses[start])] = (
+            len(values),
+            float(values.mean()),
+            *(float(value) for value in np.percentile(values, PERCENTILES)),
+        )
+    return summary
+
+
+def compute_statistics(chunk_size=10000):
+    """Return the StatusDurationStatistic rows of the whole log"""
+    durations = compute_durations(chunk_size)
+    seconds = durations['seconds']
+    scopes = (
+        (SellStatistic.TOTAL, np.zeros(len(seconds), dtype=np.int64)),
+        (SellStatistic.BRAND, durations['brand']),
+        (SellStatistic.SELL_CATEGORY, durations['sell_category']),
+    )
+
+    statistics = []
+    for scope, keys in scopes:
+        summary = summarize(durations['status'], keys, seconds)
+        for (key, status_id), values in sorted(summary.items()):
+            count, average, p50, p90, p95 = values
+            statistics.append(StatusDurationStatistic(
+                scope=scope,
+                key='' if scope == SellStatistic.TOTAL else str(key),
+                product_status_id=status_id,
+                count=count,
+                average_seconds=average,
+                p50_seconds=p50,
+                p90_seconds=p90,
+                p95_seconds=p95,
+            ))
+    return statistics
+
+
+def rebuild_statistics(chunk_size=10000):
+    """Replace every StatusDurationStatistic row and return the new rows"""
+    statistics = compute_statistics(chunk_size)
+    with transaction.atomic():
+        StatusDurationStatistic.objects.all().delete()
+        StatusDurationStatistic.objects.bulk_create(statistics)
+    return statistics
@@ -0,0 +1,136 @@
+"""Test helpers that guard against query regressions.
+
+QueryRegressionMixin adds two assertions to Django test cases:
+
+* ``assertMaxQueries(n)`` fails when a block runs more than ``n`` queries
+  and lists the queries that ran;
+* ``assertUsesIndex(queryset)`` runs EXPLAIN with sequential scans
+  disabled and fails when the plan still reads one of LARGE_TABLES
+  sequentially, which means no index can serve the query.
+
+Test databases are small, so the planner would pick sequential scans on
+its own; disabling them shows whether an index exists rather than which
+plan the tiny table gets.  Plans are written as JSON files to the
+QUERY_PLAN_DIR directory when that environment variable is set.
+"""
+import json
+import os
+import re
+from contextlib import contextmanager
+
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+
+
+LARGE_TABLES = frozenset((
+    'products',
+    'price_histories',
+    'product_status_log',
+    'related_produtcs',
+    'seller_reviews',
+    'phone_authorizations',
+))
+
+
+def explain(queryset):
+    """Return the EXPLAIN plan of a queryset as a dict"""
+    plan = queryset.explain(format='json')
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']
+
+
+def iter_nodes(plan):
+    """Yield every node of a plan"""
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from iter_nodes(child)
+
+
+def find_seq_scans(plan, tables=LARGE_TABLES):
+    """Return the tables of the plan read with a sequential scan"""
+    return sorted({
+        node['Relation Name'] for node in iter_nodes(plan)
+        if node['Node Type'] == 'Seq Scan'
+        and node.get('Relation Name') in tables
+    })
+
+
+def find_indexes(plan):
+    """Return the names of the indexes the plan reads"""
+    return sorted({
+        node['Index Name'] for node in iter_nodes(plan)
+        if 'Index Name' in node
+    })
+
+
+def find_indexed_tables(plan):
+    """Return the tables the plan reads through an index"""
+    return sorted({
+        node['Relation Name'] for node in iter_nodes(plan)
+        if 'Index Name' in node and 'Relation Name' in node
+    })
+
+
+@contextmanager
+def seq_scans_disabled():
+    with connection.cursor() as cursor:
+        cursor.execute('SET enable_seqscan = off')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute('RESET enable_seqscan')
+
+
+def save_plan(name, plan):
+    directory = os.environ.get('QUERY_PLAN_DIR')
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    filename = re.sub(r'[^\w.-]+', '_', name) + '.json'
+    with open(os.path.join(directory, filename), 'w') as stream:
+        json.dump(plan, stream, indent=2)
+
+
+class QueryRegressionMixin:
+    """Assertions on the number and the plans of queries"""
+    large_tables = LARGE_TABLES
+
+    @contextmanager
+    def assertMaxQueries(self, maximum, using='default'):
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        executed = len(context.captured_queries)
+        if executed > maximum:
+            self.fail('%d queries executed, at most %d expected:\n%s' % (
+                executed, maximum, '\n'.join(
+                    '%d. %s' % (number, query['sql'])
+                    for number, query in enumerate(
+                        context.captured_queries, start=1
+                    )
+                ),
+            ))
+
+    def assertUsesIndex(self, queryset, index=None, table=None, name=None):
+        """Assert the queryset reads no large table sequentially, and
+        reads ``index``, or any index of ``table``, if given.  Returns
+        the plan."""
+        with seq_scans_disabled():
+            plan = explain(queryset)
+        save_plan(name or self.id(), plan)
+
+        scanned = find_seq_scans(plan, self.large_tables)
+        if scanned:
+            self.fail('Sequential scan on %s:\n%s' % (
+                ', '.join(scanned), json.dumps(plan, indent=2)
+            ))
+        if index is not None and index not in find_indexes(plan):
+            self.fail('Index %s not used:\n%s' % (
+                index, json.dumps(plan, indent=2)
+            ))
+        if table is not None and table not in find_indexed_tables(plan):
+            self.fail('No index of %s used:\n%s' % (
+                table, json.dumps(plan, indent=2)
+            ))
+        return plan
@@ -0,0 +1,210 @@
+from unittest.mock import Mock, patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.contrib.admin import site
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core import models
+from core.admin import ProductAdmin
+from core.admin_pagination import EstimatedCountPaginator
+from core.testing import QueryRegressionMixin
+
+
+PRODUCTS_URL = reverse('admin:core_product_changelist')
+
+
+def sample_product(user, brand, **params):
+    defaults = {
+        'name': 'bag',
+        'purchased_year': '2019',
+        'purchased_where': 'store',
+        'purchased_price': '100000',
+        'wish_price': '80000',
+    }
+    defaults.update(params)
+    return models.Product.objects.create(user=user, brand=brand, **defaults)
+
+
+class ProductAdminTests(QueryRegressionMixin, TestCase):
+
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(
+            'admin@test.com', 'testpass'
+        )
+        self.client.force_login(self.admin)
+        self.brand = models.Brand.objects.create(
+            kor_name='샤넬', eng_name='Chanel', kor_letters='ㅅㄴ'
+        )
+        self.status = models.ProductStatus.objects.create(name='판매중')
+        self.products = [
+            sample_product(
+                self.admin, self.brand, name='bag %d' % i,
+                product_status=self.status,
+            )
+            for i in range(5)
+        ]
+
+    def get_products(self, params=None):
+        with patch.object(ProductAdmin, 'list_per_page', 2):
+            return self.client.get(PRODUCTS_URL, params or {})
+
+    def test_keyset_pages(self):
+        """Test the changelist pages by id, newest first"""
+        res = self.get_products()
+
+        self.assertEqual(res.status_code, 200)
+        cl = res.context['cl']
+        self.assertTrue(cl.keyset)
+        ids = [product.pk for product in cl.result_list]
+        self.assertEqual(ids, [self.products[4].pk, self.products[3].pk])
+        self.assertEqual(cl.next_cursor, self.products[3].pk)
+
+        res = self.get_products({'cursor': cl.next_cursor})
+
+        cl = res.context['cl']
+        ids = [product.pk for product in cl.result_list]
+        self.assertEqual(ids, [self.products[2].pk, self.products[1].pk])
+
+    def test_last_page_has_no_next(self):
+        """Test the last page links to no further page"""
+        res = self.get_products({'cursor': self.products[1].pk})
+
+        cl = res.context['cl']
+        self.assertEqual(list(cl.result_list), [self.products[0]])
+        self.assertIsNone(cl.next_page_url)
+
+    def test_keyset_with_filter(self):
+        """Test the cursor combines with list filters"""
+        other = models.ProductStatus.objects.create(name='판매완료')
+        models.Product.objects.filter(pk=self.products[3].pk).update(
+            product_status=other
+        )
+
+        res = self.get_products({
+            'product_status__id__exact': self.status.pk,
+            'cursor': self.products[4].pk,
+        })
+
+        cl = res.context['cl']
+        ids = [product.pk for product in cl.result_list]
+        self.assertEqual(ids, [self.products[2].pk, self.products[1].pk])
+
+    def test_invalid_cursor(self):
+        """Test an invalid cursor redirects like an invalid filter"""
+        res = self.get_products({'cursor': 'abc'})
+
+        self.assertEqual(res.status_code, 302)
+        self.assertIn('e=1', res.url)
+
+    def test_sorted_list_uses_page_numbers(self):
+        """Test sorting by another column falls back to numbered pages"""
+        res = self.get_products({'o': '2'})
+
+        cl = res.context['cl']
+        self.assertFalse(cl.keyset)
+        self.assertEqual(len(cl.result_list), 2)
+
+    def test_related_columns_are_joined(self):
+        """Test the brand, seller and status columns need no query per
+        row"""
+        with self.assertMaxQueries(12):
+            res = self.client.get(PRODUCTS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertFalse(res.context['cl'].show_full_result_count)
+
+    def test_user_search_matches_email_start(self):
+        """Test searching users matches the start of the email"""
+        get_user_model().objects.create_user('seller@test.com', 'testpass')
+
+        res = self.client.get(
+            reverse('admin:core_user_changelist'), {'q': 'sell'}
+        )
+
+        emails = [user.email for user in res.context['cl'].result_list]
+        self.assertEqual(emails, ['seller@test.com'])
+
+    def test_price_change_is_recorded(self):
+        """Test a price saved in the admin becomes the current price"""
+        product = self.products[0]
+        product.price = 50000
+        form = Mock(changed_data=['price'])
+
+        ProductAdmin(models.Product, site).save_model(
+            RequestFactory().post('/'), product, form, True
+        )
+
+        product.refresh_from_db()
+        self.assertEqual(product.current_price.price, 50000)
+        self.assertTrue(product.current_price.is_uptodate)
+
+    def test_add_user_hashes_password(self):
+        """Test users added in the admin can sign in with their password"""
+        res = self.client.post(reverse('admin:core_user_add'), {
+            'email': 'seller@test.com',
+            'name': 'seller',
+            'phone_number': '01012345678',
+            'password1': 'Tr0ub4dor&3x',
+            'password2': 'Tr0ub4dor&3x',
+        })
+
+        self.assertEqual(res.status_code, 302)
+        user = get_user_model().objects.get(email='seller@test.com')
+        self.assertTrue(user.check_password('Tr0ub4dor&3x'))
+
+    def test_password_is_not_editable(self):
+        """Test the change form does not take a raw password"""
+        res = self.client.get(
+            reverse('admin:core_user_change', args=[self.admin.pk])
+        )
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.context['adminform'].form.fields[
+            'password'
+        ].disabled)
+
+
+class EstimatedCountPaginatorTests(TestCase):
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            'seller@test.com', 'testpass'
+        )
+        brand = models.Brand.objects.create(
+            kor_name='샤넬', eng_name='Chanel', kor_letters='ㅅㄴ'
+        )
+        for i in range(3):
+            sample_product(user, brand, name='bag %d' % i)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE products')
+
+    def test_small_results_are_counted(self):
+        """Test results below the threshold are counted exactly"""
+        paginator = EstimatedCountPaginator(
+            models.Product.objects.order_by('-pk'), 2
+        )
+
+        self.assertEqual(paginator.count, 3)
+        self.assertFalse(paginator.estimated)
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1)
+    def test_large_table_is_estimated(self):
+        """Test the whole table is counted from the statistics"""
+        paginator = EstimatedCountPaginator(
+            models.Product.objects.order_by('-pk'), 2
+        )
+
+        self.assertGreater(paginator.count, 0)
+        self.assertTrue(paginator.estimated)
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1)
+    def test_filtered_results_are_estimated(self):
+        """Test a filtered list is counted with the plan estimate"""
+        paginator = EstimatedCountPaginator(
+            models.Product.objects.filter(name='bag 1').order_by('-pk'), 2
+        )
+
+        self.assertGreaterEqual(paginator.count, 1)
+        self.assertTrue(paginator.estimated)
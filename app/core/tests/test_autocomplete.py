@@ -0,0 +1,82 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, TransactionTestCase
+
+from core import models
+from core.autocomplete import BrandIndex, autocomplete_brands, brand_index
+
+
+BRANDS = [
+    {'id': 1, 'kor_name': '샤넬', 'kor_letters': 'ㅅㄴ', 'eng_name': 'CHANEL'},
+    {'id': 2, 'kor_name': '구찌', 'kor_letters': 'ㄱㅉ', 'eng_name': 'GUCCI'},
+    {'id': 3, 'kor_name': '생로랑', 'kor_letters': 'ㅅㄹㄹ',
+     'eng_name': 'SAINT LAURENT'},
+]
+
+
+class BrandIndexTests(SimpleTestCase):
+
+    def setUp(self):
+        self.index = BrandIndex(BRANDS, {1: {10}, 3: {10, 20}})
+
+    def ids(self, *args, **kwargs):
+        return [brand['id'] for brand in self.index.lookup(*args, **kwargs)]
+
+    def test_lookup_by_korean_name(self):
+        """Test brands are found by a prefix of the Korean name"""
+        self.assertEqual(self.ids('샤'), [1])
+
+    def test_lookup_by_chosung(self):
+        """Test brands are found by a prefix of their initial consonants"""
+        self.assertEqual(self.ids('ㅅ'), [1, 3])
+
+    def test_lookup_by_english_name(self):
+        """Test brands are found case and space insensitively"""
+        self.assertEqual(self.ids('saint l'), [3])
+        self.assertEqual(self.ids('Gu'), [2])
+
+    def test_lookup_by_sell_category(self):
+        """Test results can be limited to a sell category"""
+        self.assertEqual(self.ids('ㅅ', sell_category=20), [3])
+        self.assertEqual(self.ids('ㄱ', sell_category=10), [])
+
+    def test_lookup_limit_and_empty_prefix(self):
+        """Test the limit is honoured and empty prefixes match nothing"""
+        self.assertEqual(len(self.ids('ㅅ', limit=1)), 1)
+        self.assertEqual(self.ids(''), [])
+
+
+class BrandIndexInvalidationTests(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        brand_index.clear()
+        brand_index.check_interval = 0
+
+    def tearDown(self):
+        brand_index.check_interval = None
+
+    def test_index_follows_brand_changes(self):
+        """Test saving and deleting brands updates the index"""
+        brand = models.Brand.objects.create(
+            kor_name='샤넬', kor_letters='ㅅㄴ', eng_name='CHANEL'
+        )
+        self.assertEqual(autocomplete_brands('cha'), [{
+            'id': brand.id,
+            'kor_name': '샤넬',
+            'kor_letters': 'ㅅㄴ',
+            'eng_name': 'CHANEL',
+        }])
+
+        brand.delete()
+
+        self.assertEqual(autocomplete_brands('cha'), [])
+
+    def test_index_answers_without_queries(self):
+        """Test a warm index does not query the database"""
+        models.Brand.objects.create(
+            kor_name='구찌', kor_letters='ㄱㅉ', eng_name='GUCCI'
+        )
+        autocomplete_brands('구')
+
+        with self.assertNumQueries(0):
+            autocomplete_brands('구')
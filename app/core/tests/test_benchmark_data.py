@@ -0,0 +1,193 @@
+import json
+import os
+import tempfile
+from datetime import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import benchmark, models
+from core.seeding import BENCHMARK_PASSWORD, Seeder
+
+
+NOW = timezone.make_aware(datetime(2020, 6, 1))
+
+
+def seed(seed=0, users=20, products=30):
+    seeder = Seeder(seed=seed, now=NOW)
+    seeder.seed_reference(brands=4, tags=10, keywords=10, categories=5)
+    list(seeder.seed_users(users, batch_size=8))
+    list(seeder.seed_products(products, batch_size=8))
+    seeder.finish()
+    return seeder
+
+
+class SeedBenchmarkDataTests(TestCase):
+
+    def test_seed_counts(self):
+        """Test every product gets its history, images and labels"""
+        seed(users=20, products=30)
+
+        self.assertEqual(get_user_model().objects.count(), 20)
+        self.assertEqual(models.Product.objects.count(), 30)
+        self.assertEqual(models.PriceHistory.objects.count(), 90)
+        self.assertEqual(models.ProductStatusLog.objects.count(), 90)
+        self.assertEqual(models.Image.objects.count(), 90)
+        self.assertEqual(models.ProductTag.objects.count(), 90)
+        self.assertEqual(models.ProductKeyword.objects.count(), 60)
+        self.assertEqual(models.ProductCategory.objects.count(), 30)
+
+    def test_current_price_is_latest(self):
+        """Test the price of a product is its up to date price history"""
+        seed(products=10)
+
+        for product in models.Product.objects.select_related(
+            'current_price'
+        ):
+            self.assertTrue(product.current_price.is_uptodate)
+            self.assertEqual(product.price, product.current_price.price)
+
+    def test_same_seed_same_data(self):
+        """Test a seed always generates the same rows"""
+        seed(seed=7)
+        first = list(models.Product.objects.order_by('id').values_list(
+            'name', 'price', 'brand__kor_name'
+        ))
+        models.Product.objects.all().delete()
+        models.Brand.objects.all().delete()
+        get_user_model().objects.all().delete()
+
+        seed(seed=7)
+        second = list(models.Product.objects.order_by('id').values_list(
+            'name', 'price', 'brand__kor_name'
+        ))
+        self.assertEqual(first, second)
+
+    def test_sequences_reset(self):
+        """Test rows created after seeding get new ids"""
+        seed(products=5)
+        brand = models.Brand.objects.first()
+
+        product = models.Product.objects.create(
+            name='클래식 플랩백',
+            brand=brand,
+            purchased_year='2019',
+            purchased_where='백화점',
+            purchased_price='7000000',
+            wish_price='6000000',
+        )
+
+        self.assertGreater(
+            product.pk,
+            models.Product.objects.exclude(pk=product.pk).order_by(
+                '-pk'
+            ).first().pk,
+        )
+
+    def test_users_share_benchmark_password(self):
+        """Test seeded users can log in with the benchmark password"""
+        seed(users=3, products=1)
+        user = get_user_model().objects.first()
+
+        self.assertTrue(user.check_password(BENCHMARK_PASSWORD))
+
+    def test_seed_command(self):
+        """Test the command seeds the requested volumes"""
+        out = StringIO()
+        call_command(
+            'seed_benchmark_data', users=5, products=12, brands=3, tags=5,
+            keywords=5, categories=3, batch_size=5, stdout=out,
+        )
+
+        self.assertEqual(models.Product.objects.count(), 12)
+        self.assertIn('12 products', out.getvalue())
+
+
+class RunBenchmarksTests(TestCase):
+
+    def setUp(self):
+        seed(users=5, products=20)
+
+    def test_summary(self):
+        """Test the percentiles and queries of a scenario are reported"""
+        summary = benchmark.run_scenario(
+            benchmark.product_detail, benchmark.Samples(), 5, warmup=1
+        )
+
+        self.assertEqual(summary['requests'], 5)
+        self.assertLessEqual(summary['p50_ms'], summary['p99_ms'])
+        self.assertGreater(summary['queries_per_request'], 0)
+
+    def test_error_responses_fail(self):
+        """Test a scenario answered with an error is not timed"""
+        with self.assertRaises(benchmark.BenchmarkError):
+            benchmark.run_scenario(
+                lambda client, samples, number: benchmark._get(
+                    client, '/api/product/missing/'
+                ),
+                benchmark.Samples(), 1, warmup=0,
+            )
+
+    def test_host_is_allowed(self):
+        """Test requests use a host of ALLOWED_HOSTS"""
+        with override_settings(ALLOWED_HOSTS=['.example.com', 'other']):
+            self.assertEqual(benchmark.get_host(), 'example.com')
+        with override_settings(ALLOWED_HOSTS=['*']):
+            self.assertEqual(benchmark.get_host(), 'testserver')
+
+    def test_writes_rolled_back(self):
+        """Test write scenarios leave the data unchanged"""
+        histories = models.PriceHistory.objects.count()
+        logs = models.ProductStatusLog.objects.count()
+
+        benchmark.run_benchmarks(
+            ['price_change', 'product_sale'], iterations=3, warmup=0
+        )
+
+        self.assertEqual(models.PriceHistory.objects.count(), histories)
+        self.assertEqual(models.ProductStatusLog.objects.count(), logs)
+        self.assertFalse(models.SellRecord.objects.exists())
+
+    def test_unknown_scenario(self):
+        """Test unknown scenario names are refused"""
+        with self.assertRaises(benchmark.BenchmarkError):
+            benchmark.run_benchmarks(['missing'])
+
+    def test_command_writes_report(self):
+        """Test the command writes a report and compares it"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'report.json')
+            call_command(
+                'run_benchmarks', scenarios=['product_list', 'login'],
+                iterations=2, warmup=0, output=path, stdout=StringIO(),
+            )
+            with open(path) as stream:
+                report = json.load(stream)
+
+            out = StringIO()
+            call_command(
+                'run_benchmarks', scenarios=['product_list'],
+                iterations=2, warmup=0, compare=path, stdout=out,
+            )
+
+        self.assertEqual(
+            set(report['scenarios']), {'product_list', 'login'}
+        )
+        self.assertEqual(report['rows']['products'], 20)
+        self.assertIn('product_list p95_ms', out.getvalue())
+
+    def test_compare(self):
+        """Test the change of every shared metric is computed"""
+        baseline = {'scenarios': {'a': {'requests': 2, 'p50_ms': 10.0}}}
+        report = {'scenarios': {
+            'a': {'requests': 2, 'p50_ms': 12.0},
+            'b': {'requests': 2, 'p50_ms': 1.0},
+        }}
+
+        self.assertEqual(
+            benchmark.compare(baseline, report),
+            [('a', 'p50_ms', 10.0, 12.0, 20.0)],
+        )
@@ -0,0 +1,43 @@
+from unittest.mock import MagicMock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core.cache import VersionedCache, bump_version, get_version
+
+
+class VersionedCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.loader = MagicMock(side_effect=[1, 2])
+        self.versioned = VersionedCache('test', self.loader, check_interval=0)
+
+    def test_value_is_loaded_once(self):
+        """Test the loader only runs while the version is unchanged"""
+        self.assertEqual(self.versioned.get(), 1)
+        self.assertEqual(self.versioned.get(), 1)
+        self.assertEqual(self.loader.call_count, 1)
+
+    def test_value_is_reloaded_after_version_bump(self):
+        """Test bumping the shared version rebuilds the value"""
+        self.versioned.get()
+        bump_version('test')
+
+        self.assertEqual(self.versioned.get(), 2)
+
+    def test_version_is_not_checked_within_interval(self):
+        """Test the shared version is trusted for the check interval"""
+        versioned = VersionedCache('test', self.loader, check_interval=60)
+        versioned.get()
+        bump_version('test')
+
+        self.assertEqual(versioned.get(), 1)
+
+    def test_bump_version_moves_forward(self):
+        """Test every bump returns a new version"""
+        first = bump_version('test')
+        second = bump_version('test')
+
+        self.assertGreater(second, first)
+        self.assertEqual(get_version('test'), second)
@@ -1,9 +1,13 @@
-from unittest.mock import patch
+from io import StringIO
+from unittest.mock import MagicMock, patch
 
 from django.core.management import call_command
-from django.db.utils import OperationalError
+from django.core.management.base import CommandError
+from django.db.utils import OperationalError, ProgrammingError
 from django.test import TestCase
 
+from core.db import warm_up
+
 
 class CommandsTestCase(TestCase):
 
@@ -11,15 +15,50 @@ class CommandsTestCase(TestCase):
         """Test waiting for db when db is available"""
 
         with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.return_value = True
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 1)
+            connection = MagicMock()
+            gi.return_value = connection
+            call_command('wait_for_db', stdout=StringIO())
+            self.assertEqual(connection.ensure_connection.call_count, 1)
+            cursor = connection.cursor.return_value.__enter__.return_value
+            cursor.execute.assert_called_once_with('SELECT 1')
 
     @patch('time.sleep', return_value=None)
     def test_wait_for_db(self, ts):
         """Test waiting for db"""
 
         with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.side_effect = [OperationalError] * 5 + [True]
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 6)
+            connection = MagicMock()
+            connection.ensure_connection.side_effect = (
+                [OperationalError] * 5 + [None]
+            )
+            gi.return_value = connection
+            call_command('wait_for_db', stdout=StringIO())
+            self.assertEqual(connection.ensure_connection.call_count, 6)
+
+        delays = [call.args[0] for call in ts.call_args_list]
+        self.assertEqual(delays, [0.5, 1, 2, 4, 5])
+
+    @patch('time.sleep', return_value=None)
+    @patch('time.monotonic')
+    def test_wait_for_db_timeout(self, monotonic, ts):
+        """Test giving up when the database stays unavailable"""
+        monotonic.side_effect = [0, 1, 2, 61]
+
+        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
+            connection = MagicMock()
+            connection.ensure_connection.side_effect = OperationalError
+            gi.return_value = connection
+            with self.assertRaises(CommandError):
+                call_command('wait_for_db', '--timeout', '60',
+                             stdout=StringIO())
+
+        self.assertEqual(ts.call_count, 2)
+
+    def test_warm_up_before_migrate(self):
+        """Test a worker starts when the tables do not exist yet"""
+        with patch('core.reference.ReferenceCache.all') as load:
+            load.side_effect = ProgrammingError('relation does not exist')
+            with self.assertLogs('core.db', 'WARNING') as logs:
+                warm_up()
+
+        self.assertIn('relation does not exist', logs.output[0])
@@ -0,0 +1,197 @@
+import csv
+import io
+import os
+import tempfile
+import zipfile
+from decimal import Decimal
+from xml.dom import minidom
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import exports, models
+
+
+def sample_user(email='seller@test.com', **params):
+    return get_user_model().objects.create_user(email, 'testpass', **params)
+
+
+def sample_product(user, brand, **params):
+    defaults = {
+        'name': 'bag',
+        'purchased_year': '2019',
+        'purchased_where': 'store',
+        'purchased_price': '100000',
+        'wish_price': '80000',
+        'price': Decimal('80000.00'),
+    }
+    defaults.update(params)
+    return models.Product.objects.create(user=user, brand=brand, **defaults)
+
+
+def read_csv(chunks):
+    text = ''.join(chunks)
+    return list(csv.reader(io.StringIO(text.lstrip('\ufeff'))))
+
+
+def cell_text(cell):
+    if cell.getAttribute('t') == 'inlineStr':
+        nodes = cell.getElementsByTagName('t')
+    else:
+        nodes = cell.getElementsByTagName('v')
+    return ''.join(
+        text.data for node in nodes for text in node.childNodes
+    )
+
+
+def read_sheet(data):
+    archive = zipfile.ZipFile(io.BytesIO(data))
+    sheet = minidom.parseString(archive.read('xl/worksheets/sheet1.xml'))
+    return [
+        [cell_text(cell) for cell in row.getElementsByTagName('c')]
+        for row in sheet.getElementsByTagName('row')
+    ]
+
+
+class ExportTests(TestCase):
+
+    def setUp(self):
+        grade = models.UserGrade.objects.create(grade='VIP')
+        self.user = sample_user(name='seller', grade=grade)
+        self.brand = models.Brand.objects.create(
+            kor_name='샤넬', eng_name='Chanel', kor_letters='ㅅㄴ'
+        )
+        self.status = models.ProductStatus.objects.create(name='판매중')
+        self.export = exports.EXPORTS['product']
+
+    def test_csv_resolves_related_names(self):
+        """Test the product export shows brand, seller and status names"""
+        product = sample_product(
+            self.user, self.brand, product_status=self.status
+        )
+
+        rows = read_csv(exports.stream_export(
+            self.export, models.Product.objects.all(), 'csv'
+        ))
+
+        self.assertEqual(rows[0], self.export.headers)
+        row = dict(zip(self.export.paths, rows[1]))
+        self.assertEqual(row['id'], str(product.id))
+        self.assertEqual(row['brand__kor_name'], '샤넬')
+        self.assertEqual(row['user__email'], 'seller@test.com')
+        self.assertEqual(row['product_status__name'], '판매중')
+        self.assertEqual(row['product_grade__name'], '')
+
+    def test_export_uses_one_query(self):
+        """Test related names are joined instead of looked up per row"""
+        for i in range(5):
+            sample_product(self.user, self.brand, name='bag %d' % i)
+
+        with CaptureQueriesContext(connection) as queries:
+            rows = read_csv(exports.stream_export(
+                self.export, models.Product.objects.all(), 'csv',
+                chunk_size=2,
+            ))
+
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(len(queries), 1)
+
+    def test_csv_escapes_formulas(self):
+        """Test text starting like a formula is exported as text"""
+        sample_product(self.user, self.brand, name='=HYPERLINK("x")')
+
+        rows = read_csv(exports.stream_export(
+            self.export, models.Product.objects.all(), 'csv'
+        ))
+
+        name = rows[1][self.export.paths.index('name')]
+        self.assertEqual(name, '\'=HYPERLINK("x")')
+
+    def test_xlsx_workbook(self):
+        """Test the XLSX export is a workbook with a row per product"""
+        sample_product(self.user, self.brand, name='<bag> & "box"\x01')
+        sample_product(self.user, self.brand, price=None)
+
+        data = b''.join(exports.stream_export(
+            self.export, models.Product.objects.all(), 'xlsx'
+        ))
+
+        archive = zipfile.ZipFile(io.BytesIO(data))
+        self.assertIsNone(archive.testzip())
+        self.assertIn('xl/workbook.xml', archive.namelist())
+        rows = read_sheet(data)
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0], self.export.headers)
+        price = self.export.paths.index('price')
+        self.assertEqual(rows[1][price], '80000.00')
+        self.assertEqual(rows[2][price], '')
+        self.assertEqual(
+            rows[1][self.export.paths.index('name')], '<bag> & "box"'
+        )
+
+    def test_xlsx_streams_in_chunks(self):
+        """Test a large sheet is sent in several chunks"""
+        rows = (('row %d' % i, i) for i in range(20000))
+
+        chunks = list(exports.stream_xlsx(['name', 'number'], rows))
+
+        self.assertGreater(len(chunks), 2)
+        self.assertEqual(len(read_sheet(b''.join(chunks))), 20001)
+
+
+class ExportAdminTests(TestCase):
+
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(
+            'admin@test.com', 'testpass'
+        )
+        self.client.force_login(self.admin)
+
+    def test_admin_export_action(self):
+        """Test the admin action streams the selected users"""
+        user = sample_user(name='buyer')
+
+        res = self.client.post(reverse('admin:core_user_changelist'), {
+            'action': 'export_csv',
+            '_selected_action': [user.pk],
+        })
+
+        self.assertTrue(res.streaming)
+        self.assertIn('attachment', res['Content-Disposition'])
+        rows = read_csv(
+            chunk.decode() for chunk in res.streaming_content
+        )
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1], 'seller@test.com')
+
+
+class ExportTableCommandTests(TestCase):
+
+    def test_export_csv_to_stdout(self):
+        """Test the command writes the users as CSV"""
+        sample_user()
+        out = io.StringIO()
+
+        call_command('export_table', 'user', stdout=out)
+
+        rows = read_csv([out.getvalue()])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1], 'seller@test.com')
+
+    def test_export_xlsx_to_file(self):
+        """Test the command writes a workbook"""
+        sample_user()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'users.xlsx')
+
+            call_command(
+                'export_table', 'user', '--format', 'xlsx',
+                '--output', path, stderr=io.StringIO(),
+            )
+
+            with open(path, 'rb') as stream:
+                self.assertEqual(len(read_sheet(stream.read())), 2)
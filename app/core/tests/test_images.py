@@ -0,0 +1,121 @@
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from PIL import Image as PILImage
+
+from core import images, models
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def sample_image_file(name='photo.jpg', size=(2000, 1000)):
+    """Return an uploaded JPEG of the given size"""
+    with tempfile.TemporaryFile() as stream:
+        PILImage.new('RGB', size, 'red').save(stream, 'JPEG')
+        stream.seek(0)
+        return SimpleUploadedFile(name, stream.read(), 'image/jpeg')
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    IMAGE_DERIVATIVE_SIZES={'thumbnail': 200, 'large': 1000},
+    IMAGE_DERIVATIVE_FORMATS=('JPEG', 'WEBP'),
+)
+class ImageDerivativeTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        brand = models.Brand.objects.create(
+            kor_name='샤넬', kor_letters='ㅅㄴ', eng_name='CHANEL'
+        )
+        self.product = models.Product.objects.create(
+            name='클래식 플랩백',
+            brand=brand,
+            purchased_year='2019',
+            purchased_where='백화점',
+            purchased_price='7000000',
+            wish_price='6000000',
+        )
+
+    def test_generate_derivatives(self):
+        """Test every size is rendered in every format"""
+        image = models.Image.objects.create(
+            product=self.product,
+            image_url=sample_image_file(),
+            is_damaged=False,
+        )
+
+        done, errors = images.generate_derivatives([image], workers=0)
+
+        self.assertEqual((done, errors), (1, {}))
+        derivatives = {
+            (d.size, d.format): (d.width, d.height)
+            for d in image.derivatives.all()
+        }
+        self.assertEqual(derivatives, {
+            ('thumbnail', 'JPEG'): (200, 100),
+            ('thumbnail', 'WEBP'): (200, 100),
+            ('large', 'JPEG'): (1000, 500),
+            ('large', 'WEBP'): (1000, 500),
+        })
+
+    def test_generate_derivatives_twice_replaces_rows(self):
+        """Test rendering again does not duplicate derivatives"""
+        image = models.Image.objects.create(
+            product=self.product,
+            image_url=sample_image_file(),
+            is_damaged=False,
+        )
+
+        images.generate_derivatives([image], workers=0)
+        images.generate_derivatives([image], workers=0)
+
+        self.assertEqual(image.derivatives.count(), 4)
+
+    def test_missing_source_is_reported(self):
+        """Test a missing file is reported instead of raising"""
+        image = models.Image.objects.create(
+            product=self.product,
+            image_url='products/missing.jpg',
+            is_damaged=False,
+        )
+
+        done, errors = images.generate_derivatives([image], workers=0)
+
+        self.assertEqual(done, 0)
+        self.assertIn(image.id, errors)
+        self.assertFalse(image.derivatives.exists())
+
+    def test_command_starts_one_pool(self):
+        """Test the backfill renders every chunk in the same pool"""
+        for _ in range(3):
+            models.Image.objects.create(
+                product=self.product,
+                image_url=sample_image_file(size=(400, 200)),
+                is_damaged=False,
+            )
+
+        with patch(
+            'core.management.commands.generate_image_derivatives.'
+            'ProcessPoolExecutor',
+            side_effect=ThreadPoolExecutor,
+        ) as pool:
+            call_command(
+                'generate_image_derivatives', '--chunk-size', '1',
+                '--workers', '2', stdout=StringIO(),
+            )
+
+        pool.assert_called_once_with(max_workers=2)
+        self.assertEqual(models.ImageDerivative.objects.count(), 12)
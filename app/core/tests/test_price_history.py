@@ -0,0 +1,66 @@
+from decimal import Decimal
+
+from django.db import IntegrityError
+from django.test import TestCase
+
+from core import models
+
+
+def sample_product(name='클래식 플랩백'):
+    brand = models.Brand.objects.create(
+        kor_name='샤넬', kor_letters='ㅅㄴ', eng_name='CHANEL'
+    )
+    return models.Product.objects.create(
+        name=name,
+        brand=brand,
+        purchased_year='2019',
+        purchased_where='백화점',
+        purchased_price='7000000',
+        wish_price='6000000',
+    )
+
+
+class PriceHistoryTests(TestCase):
+
+    def setUp(self):
+        self.product = sample_product()
+
+    def test_record_price_sets_current_price(self):
+        """Test recording a price updates the product pointer and price"""
+        history = models.PriceHistory.objects.record_price(
+            self.product, Decimal('5000000.00')
+        )
+
+        self.product.refresh_from_db()
+        self.assertTrue(history.is_uptodate)
+        self.assertEqual(self.product.current_price, history)
+        self.assertEqual(self.product.price, Decimal('5000000.00'))
+
+    def test_record_price_replaces_previous_price(self):
+        """Test only the latest recorded price stays up to date"""
+        old = models.PriceHistory.objects.record_price(
+            self.product, Decimal('5000000.00')
+        )
+        new = models.PriceHistory.objects.record_price(
+            self.product, Decimal('4500000.00'), Decimal('500000.00')
+        )
+
+        old.refresh_from_db()
+        self.product.refresh_from_db()
+        self.assertFalse(old.is_uptodate)
+        self.assertTrue(new.is_uptodate)
+        self.assertEqual(self.product.current_price, new)
+        self.assertEqual(self.product.price, Decimal('4500000.00'))
+
+    def test_only_one_uptodate_price_per_product(self):
+        """Test the database rejects two up to date prices"""
+        models.PriceHistory.objects.record_price(
+            self.product, Decimal('5000000.00')
+        )
+
+        with self.assertRaises(IntegrityError):
+            models.PriceHistory.objects.create(
+                product=self.product,
+                price=Decimal('4000000.00'),
+                is_uptodate=True,
+            )
@@ -0,0 +1,171 @@
+from django.db import connection
+from django.db.models import Subquery
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from core import models, search
+from core.seeding import Seeder
+from core.testing import QueryRegressionMixin
+
+from product.tests.test_product_api import (
+    sample_brand,
+    sample_product,
+    sample_user,
+)
+
+
+class QueryPlanTests(QueryRegressionMixin, TestCase):
+    """Test the key queries are served by indexes"""
+
+    def setUp(self):
+        self.user = sample_user()
+        self.product = sample_product(self.user, sample_brand(), price=100)
+
+    def test_product_list_pages(self):
+        """Test listing pages read the keyset indexes"""
+        self.assertUsesIndex(
+            models.Product.objects.filter(
+                created_at__lt=timezone.now()
+            ).order_by('-created_at', '-id')[:20],
+            index='products_created_id_idx',
+        )
+        self.assertUsesIndex(
+            models.Product.objects.filter(
+                price__gt=0
+            ).order_by('price', 'id')[:20],
+            index='products_price_id_idx',
+        )
+
+    def seed(self):
+        """Seed enough products and history for realistic statistics"""
+        seeder = Seeder(seed=0)
+        seeder.seed_reference(brands=10, tags=10, keywords=10, categories=5)
+        list(seeder.seed_users(50, batch_size=50))
+        list(seeder.seed_products(2000, batch_size=500))
+        seeder.finish()
+        with connection.cursor() as cursor:
+            for table in (
+                'products', 'price_histories', 'product_status_log'
+            ):
+                cursor.execute('ANALYZE %s' % table)
+
+    def test_products_by_status_and_seller(self):
+        """Test status listings and seller pages read their indexes"""
+        self.seed()
+        product = models.Product.objects.order_by('pk').last()
+
+        self.assertUsesIndex(
+            models.Product.objects.filter(
+                product_status=product.product_status
+            ).order_by('-created_at', '-id')[:20],
+            index='products_status_created_idx',
+        )
+        self.assertUsesIndex(
+            models.Product.objects.filter(
+                user=product.user
+            ).order_by('-created_at')[:20],
+            index='products_user_created_idx',
+        )
+
+    def test_short_search_queries(self):
+        """Test two letter queries, too short for the trigram indexes,
+        are served by the search document index"""
+        self.seed()
+        search.update_search_documents(
+            models.Product.objects.values_list('pk', flat=True)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE products')
+
+        for query in ('상품', 'ㅅㄴ'):
+            self.assertUsesIndex(
+                search.search_products(models.Product.objects.all(), query),
+                index='products_search_doc_idx',
+            )
+
+    def test_price_history_and_status_log(self):
+        """Test the history of a product is read from an index"""
+        self.seed()
+        product = models.Product.objects.order_by('pk').last()
+
+        self.assertUsesIndex(
+            models.PriceHistory.objects.filter(
+                product=product
+            ).order_by('-created_at')[:20],
+            table='price_histories',
+        )
+        self.assertUsesIndex(
+            models.ProductStatusLog.objects.filter(
+                product=product
+            ).order_by('created_at'),
+            table='product_status_log',
+        )
+
+    def test_detail_page_sections(self):
+        """Test related products and seller reviews use indexes"""
+        self.assertUsesIndex(
+            models.RelatedProduct.objects.filter(
+                from_product=self.product
+            ).order_by('is_generated', '-score')[:12],
+            index='related_from_score_idx',
+        )
+        seller = models.Product.objects.filter(
+            pk=self.product.pk
+        ).values('user_id')[:1]
+        self.assertUsesIndex(
+            models.SellerReview.objects.filter(
+                product__user_id=Subquery(seller)
+            ).order_by('-created_at')[:10]
+        )
+
+    def test_phone_verification_lookup(self):
+        """Test the latest code of a number is read from the index"""
+        self.assertUsesIndex(
+            models.PhoneAuthorization.objects.filter(
+                phone_number='01055525672',
+                issued_at__gt=timezone.now(),
+            ).order_by('-issued_at')[:1],
+            index='phone_auth_number_issued_idx',
+        )
+
+
+class EndpointQueryBudgetTests(QueryRegressionMixin, TestCase):
+    """Test the number of queries of the public endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user()
+        brand = sample_brand()
+        self.products = [
+            sample_product(self.user, brand, name='상품 %d' % i)
+            for i in range(5)
+        ]
+        # warm the process-local reference caches
+        self.client.get(reverse('product:product-list'))
+
+    def test_product_list_budget(self):
+        """Test the list runs one query per prefetched relation"""
+        with self.assertMaxQueries(6):
+            self.client.get(reverse('product:product-list'))
+
+    def test_product_list_with_facets_budget(self):
+        """Test all facets add a single query"""
+        with self.assertMaxQueries(7):
+            self.client.get(
+                reverse('product:product-list'), {'facets': 'all'}
+            )
+
+    def test_product_detail_budget(self):
+        """Test the detail page runs a fixed number of queries"""
+        url = reverse('product:product-detail', args=[self.products[0].id])
+
+        with self.assertMaxQueries(10):
+            self.client.get(url)
+
+    def test_product_search_budget(self):
+        """Test searching runs one query per prefetched relation"""
+        with self.assertMaxQueries(6):
+            self.client.get(reverse('product:product-search'), {'q': '상품'})
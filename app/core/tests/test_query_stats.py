@@ -0,0 +1,137 @@
+import tempfile
+from io import StringIO
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import (
+    AsyncClient,
+    RequestFactory,
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from core import async_orm, models, query_stats
+from core.middleware import QueryInstrumentationMiddleware
+
+
+PRODUCT_LIST_URL = reverse('product:product-list')
+ASYNC_PRODUCT_LIST_URL = reverse('product-async:product-list')
+
+
+class QueryTrackerTests(TestCase):
+
+    def test_count_duplicates_and_repeated(self):
+        """Test duplicate and repeated statements are told apart"""
+        tracker = query_stats.QueryTracker()
+        with connection.execute_wrapper(tracker):
+            models.Brand.objects.filter(pk=1).exists()
+            models.Brand.objects.filter(pk=1).exists()
+            for pk in range(2, 6):
+                models.Brand.objects.filter(pk=pk).exists()
+
+        self.assertEqual(tracker.count, 6)
+        self.assertEqual(tracker.duplicates, 1)
+        self.assertEqual(len(tracker.repeated(5)), 1)
+        self.assertEqual(tracker.repeated(5)[0][1], 5)
+        self.assertEqual(tracker.repeated(6), [])
+
+
+@override_settings(
+    SQL_INSTRUMENTATION=True,
+    SQL_STATS_FLUSH_INTERVAL=0,
+    SQL_SLOW_REQUEST_MS=60000,
+)
+class QueryInstrumentationMiddlewareTests(TestCase):
+
+    def setUp(self):
+        query_stats.view_stats.flush()
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+        async_orm.shutdown()
+
+    def test_server_timing_header(self):
+        """Test the database time and query count are sent to clients"""
+        res = self.client.get(PRODUCT_LIST_URL)
+
+        self.assertIn('db;dur=', res['Server-Timing'])
+        self.assertIn('queries"', res['Server-Timing'])
+
+    def test_totals_by_view(self):
+        """Test the requests of a view are added to the shared totals"""
+        self.client.get(PRODUCT_LIST_URL)
+        self.client.get(PRODUCT_LIST_URL)
+
+        totals = query_stats.read_stats()['product:product-list']
+        self.assertEqual(totals['requests'], 2)
+        self.assertGreater(totals['queries'], 0)
+
+    @override_settings(SQL_SLOW_REQUEST_MS=0, SQL_SLOW_SAMPLE_RATE=1)
+    def test_slow_requests_logged(self):
+        """Test slow requests are logged with their query counts"""
+        with self.assertLogs('core.middleware', 'WARNING') as logs:
+            self.client.get(PRODUCT_LIST_URL)
+
+        self.assertIn('product:product-list', logs.output[0])
+        totals = query_stats.read_stats()['product:product-list']
+        self.assertEqual(totals['slow_requests'], 1)
+
+    @override_settings(SQL_INSTRUMENTATION=False)
+    def test_disabled(self):
+        """Test nothing is measured when instrumentation is off"""
+        res = self.client.get(PRODUCT_LIST_URL)
+
+        self.assertFalse(res.has_header('Server-Timing'))
+        self.assertEqual(query_stats.read_stats(), {})
+
+    def test_async_view_queries_counted(self):
+        """Test queries run in the ORM thread pool count for the request"""
+        res = async_to_sync(AsyncClient().get)(ASYNC_PRODUCT_LIST_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertNotIn('"0 queries"', res['Server-Timing'])
+
+    def test_async_chain_stays_async(self):
+        """Test async views are not run through sync_to_async"""
+        async def get_response(request):
+            return HttpResponse()
+
+        middleware = QueryInstrumentationMiddleware(get_response)
+        res = async_to_sync(middleware)(RequestFactory().get('/'))
+
+        self.assertTrue(iscoroutinefunction(middleware))
+        self.assertIn('db;dur=', res['Server-Timing'])
+
+    def test_sql_stats_command(self):
+        """Test the command lists views and resets the totals"""
+        with tempfile.TemporaryDirectory() as location, override_settings(
+            CACHES={'default': {
+                'BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': location,
+            }}
+        ):
+            self.client.get(PRODUCT_LIST_URL)
+
+            out = StringIO()
+            call_command('sql_stats', stdout=out)
+            self.assertIn(
+                'product:product-list: 1 requests', out.getvalue()
+            )
+
+            call_command('sql_stats', reset=True, stdout=StringIO())
+            self.assertEqual(query_stats.read_stats(), {})
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }})
+    def test_sql_stats_requires_shared_cache(self):
+        """Test the command refuses a cache local to each process"""
+        with self.assertRaises(CommandError):
+            call_command('sql_stats', stdout=StringIO())
@@ -0,0 +1,108 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core import models, recommendations
+
+
+def sample_product(brand, tags=(), status=None, name='클래식 플랩백'):
+    product = models.Product.objects.create(
+        name=name,
+        brand=brand,
+        purchased_year='2019',
+        purchased_where='백화점',
+        purchased_price='7000000',
+        wish_price='6000000',
+        product_status=status,
+    )
+    for tag in tags:
+        models.ProductTag.objects.create(product=product, tag=tag)
+    return product
+
+
+class RecommendationTests(TestCase):
+
+    def setUp(self):
+        self.chanel = models.Brand.objects.create(
+            kor_name='샤넬', kor_letters='ㅅㄴ', eng_name='CHANEL'
+        )
+        self.gucci = models.Brand.objects.create(
+            kor_name='구찌', kor_letters='ㄱㅉ', eng_name='GUCCI'
+        )
+        self.vintage = models.Tag.objects.create(name='빈티지')
+        self.luxury = models.Tag.objects.create(name='명품')
+
+    def get_related(self, product):
+        return list(
+            models.RelatedProduct.objects.filter(from_product=product)
+            .order_by('is_generated', '-score')
+            .values_list('to_product_id', flat=True)
+        )
+
+    def build(self, **kwargs):
+        return list(recommendations.build_recommendations(**kwargs))
+
+    def test_similar_products_ranked_first(self):
+        """Test products sharing more features are recommended first"""
+        flap = sample_product(self.chanel, [self.vintage, self.luxury])
+        boy = sample_product(self.chanel, [self.vintage, self.luxury])
+        marmont = sample_product(self.gucci, [self.luxury])
+        other = sample_product(self.gucci)
+
+        self.build()
+
+        self.assertEqual(self.get_related(flap), [boy.id, marmont.id])
+        self.assertNotIn(flap.id, self.get_related(flap))
+        # A brand alone does not relate products
+        self.assertEqual(self.get_related(other), [])
+
+    def test_same_brand_ranked_first(self):
+        """Test the brand breaks ties between equally similar products"""
+        flap = sample_product(self.chanel, [self.luxury])
+        marmont = sample_product(self.gucci, [self.luxury])
+        boy = sample_product(self.chanel, [self.luxury])
+
+        self.build()
+
+        self.assertEqual(self.get_related(flap), [boy.id, marmont.id])
+
+    def test_top_k_and_sold_products(self):
+        """Test only the best unsold products are kept"""
+        sold = models.ProductStatus.objects.create(name='판매완료')
+        flap = sample_product(self.chanel, [self.vintage])
+        sample_product(self.chanel, [self.vintage], status=sold)
+        boy = sample_product(self.chanel, [self.vintage])
+        sample_product(self.chanel)
+
+        self.build(top_k=1)
+
+        self.assertEqual(self.get_related(flap), [boy.id])
+
+    def test_curated_rows_are_kept(self):
+        """Test rebuilding keeps curated rows and lists them first"""
+        flap = sample_product(self.chanel, [self.vintage])
+        boy = sample_product(self.chanel, [self.vintage])
+        marmont = sample_product(self.gucci)
+        models.RelatedProduct.objects.create(
+            from_product=flap, to_product=marmont
+        )
+
+        self.build()
+        self.build()
+
+        self.assertEqual(self.get_related(flap), [marmont.id, boy.id])
+
+    def test_incremental_build(self):
+        """Test --new only computes products without recommendations"""
+        flap = sample_product(self.chanel, [self.vintage])
+        boy = sample_product(self.chanel, [self.vintage])
+        self.build()
+        new = sample_product(self.chanel, [self.vintage])
+
+        out = StringIO()
+        call_command('build_recommendations', '--new', stdout=out)
+
+        self.assertIn('for 1 products', out.getvalue())
+        self.assertCountEqual(self.get_related(new), [flap.id, boy.id])
+        self.assertEqual(self.get_related(flap), [boy.id])
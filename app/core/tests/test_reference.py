@@ -0,0 +1,76 @@
+from django.db import transaction
+from django.test import TestCase
+
+from core import models, reference
+
+
+class ReferenceCacheTests(TestCase):
+
+    def setUp(self):
+        self.listed = models.ProductStatus.objects.create(name='판매중')
+        self.sold = models.ProductStatus.objects.create(name='판매완료')
+
+    def test_lookups_are_served_from_memory(self):
+        """Test a loaded reference table answers without queries"""
+        reference.product_statuses.all()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                reference.product_statuses.get(self.sold.id), self.sold
+            )
+            self.assertEqual(
+                reference.product_statuses.get_by_name('판매중'), self.listed
+            )
+            self.assertEqual(
+                list(reference.product_statuses.all()),
+                [self.listed, self.sold]
+            )
+
+    def test_missing_rows_raise_does_not_exist(self):
+        """Test unknown ids and names raise the model's DoesNotExist"""
+        with self.assertRaises(models.ProductStatus.DoesNotExist):
+            reference.product_statuses.get(0)
+        with self.assertRaises(models.ProductStatus.DoesNotExist):
+            reference.product_statuses.get_by_name('반품')
+
+    def test_changes_invalidate_cache(self):
+        """Test saving and deleting rows reloads the table"""
+        reference.product_statuses.all()
+
+        returned = models.ProductStatus.objects.create(name='반품')
+        self.assertEqual(
+            reference.product_statuses.get_by_name('반품'), returned
+        )
+
+        self.sold.delete()
+        with self.assertRaises(models.ProductStatus.DoesNotExist):
+            reference.product_statuses.get(self.sold.id)
+
+    def test_rollback_drops_uncommitted_rows(self):
+        """Test rows loaded in a rolled back transaction are dropped"""
+        reference.product_statuses.all()
+
+        try:
+            with transaction.atomic():
+                models.ProductStatus.objects.create(name='반품')
+                reference.product_statuses.get_by_name('반품')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        with self.assertRaises(models.ProductStatus.DoesNotExist):
+            reference.product_statuses.get_by_name('반품')
+
+    def test_every_reference_model_is_cached(self):
+        """Test grades, platforms and categories have caches"""
+        grade = models.UserGrade.objects.create(grade='일반회원')
+        main = models.MainCategory.objects.create(name='가방', code='B')
+        sub = models.SubCategory.objects.create(
+            name='숄더백', code='B01', main_category=main
+        )
+
+        self.assertEqual(reference.user_grades.get_by_name('일반회원'), grade)
+        self.assertEqual(
+            reference.get_reference_cache(models.SubCategory).get(sub.id),
+            sub
+        )
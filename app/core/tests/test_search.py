@@ -0,0 +1,79 @@
+from django.test import SimpleTestCase, TestCase
+
+from core import models, search
+
+
+class ChosungTests(SimpleTestCase):
+
+    def test_to_chosung(self):
+        """Test extracting initial consonants from Hangul text"""
+        self.assertEqual(search.to_chosung('샤넬 클래식'), 'ㅅㄴ ㅋㄹㅅ')
+        self.assertEqual(search.to_chosung('구찌 GG 마몽'), 'ㄱㅉ ㅁㅁ')
+        self.assertEqual(search.to_chosung(None), '')
+
+    def test_is_chosung_query(self):
+        """Test detecting queries made only of initial consonants"""
+        self.assertTrue(search.is_chosung_query('ㅅㄴ'))
+        self.assertTrue(search.is_chosung_query('ㅅㄴ ㅋㄹㅅ'))
+        self.assertFalse(search.is_chosung_query('샤넬'))
+        self.assertFalse(search.is_chosung_query('ㅅㄴ bag'))
+        self.assertFalse(search.is_chosung_query(' '))
+
+    def test_short_queries_match_word_prefixes(self):
+        """Test queries too short for the trigram indexes become prefix
+        queries"""
+        self.assertTrue(search.is_short_query('샤넬'))
+        self.assertTrue(search.is_short_query('ㅅㄴ ㅋㄹ'))
+        self.assertFalse(search.is_short_query('샤넬 플랩백'))
+        self.assertEqual(
+            search.to_prefix_tsquery("샤넬 it's"), "'샤넬':* & 'it''s':*"
+        )
+
+
+class SearchDocumentTests(TestCase):
+
+    def setUp(self):
+        self.brand = models.Brand.objects.create(
+            kor_name='샤넬', kor_letters='ㅅㄴ', eng_name='CHANEL'
+        )
+        self.product = models.Product.objects.create(
+            name='클래식 플랩백',
+            brand=self.brand,
+            purchased_year='2019',
+            purchased_where='백화점',
+            purchased_price='7000000',
+            wish_price='6000000',
+        )
+
+    def search(self, query):
+        return list(
+            search.search_products(models.Product.objects.all(), query)
+        )
+
+    def test_search_by_name_and_brand(self):
+        """Test products are found by name words and brand names"""
+        self.assertEqual(self.search('플랩백'), [self.product])
+        self.assertEqual(self.search('chanel'), [self.product])
+        self.assertEqual(self.search('에르메스'), [])
+
+    def test_search_by_partial_word(self):
+        """Test products are found by part of a word"""
+        self.assertEqual(self.search('플랩'), [self.product])
+
+    def test_search_by_chosung(self):
+        """Test products are found by the initial consonants"""
+        self.assertEqual(self.search('ㅅㄴ'), [self.product])
+        self.assertEqual(self.search('ㅍㄹㅂ'), [self.product])
+
+    def test_tag_changes_update_document(self):
+        """Test attaching a tag makes the product searchable by it"""
+        tag = models.Tag.objects.create(name='빈티지')
+        models.ProductTag.objects.create(product=self.product, tag=tag)
+
+        self.assertEqual(self.search('빈티지'), [self.product])
+
+        tag.name = '레트로'
+        tag.save()
+
+        self.assertEqual(self.search('빈티지'), [])
+        self.assertEqual(self.search('레트로'), [self.product])
@@ -0,0 +1,173 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core import models
+
+
+def sample_product(brand, sell_category, price='1000.00'):
+    return models.Product.objects.create(
+        name='클래식 플랩백',
+        brand=brand,
+        sell_category=sell_category,
+        purchased_year='2019',
+        purchased_where='백화점',
+        purchased_price='7000000',
+        wish_price='6000000',
+        price=Decimal(price),
+        product_status=models.ProductStatus.objects.create(name='판매중'),
+    )
+
+
+class SellStatisticTests(TestCase):
+
+    def setUp(self):
+        self.brand = models.Brand.objects.create(
+            kor_name='샤넬', kor_letters='ㅅㄴ', eng_name='CHANEL'
+        )
+        self.category = models.SellCategory.objects.create(name='가방')
+        self.sold = models.ProductStatus.objects.create(name='판매완료')
+
+    def get_statistic(self, scope, key=''):
+        return models.SellStatistic.objects.get(scope=scope, key=key)
+
+    def sell(self, product):
+        product.product_status = self.sold
+        product.save()
+
+    def test_sale_updates_rollups(self):
+        """Test selling products adds them to every rollup"""
+        self.sell(sample_product(self.brand, self.category, '1000.00'))
+        self.sell(sample_product(self.brand, self.category, '500.00'))
+
+        for scope, key in [
+            (models.SellStatistic.TOTAL, ''),
+            (models.SellStatistic.BRAND, str(self.brand.id)),
+            (models.SellStatistic.SELL_CATEGORY, str(self.category.id)),
+        ]:
+            statistic = self.get_statistic(scope, key)
+            self.assertEqual(statistic.total_count, 2)
+            self.assertEqual(statistic.total_price, Decimal('1500.00'))
+        self.assertEqual(
+            models.SellStatistic.objects.filter(
+                scope=models.SellStatistic.DAY
+            ).count(),
+            1
+        )
+
+    def test_saving_sold_product_again_is_counted_once(self):
+        """Test saving an already sold product does not add it twice"""
+        product = sample_product(self.brand, self.category)
+        self.sell(product)
+        product.memo = '검수 완료'
+        product.save()
+
+        total = self.get_statistic(models.SellStatistic.TOTAL)
+        self.assertEqual(total.total_count, 1)
+
+    def test_cancel_sale_reverts_rollups(self):
+        """Test moving a product out of sold removes its contribution"""
+        product = sample_product(self.brand, self.category)
+        self.sell(product)
+
+        product.product_status = models.ProductStatus.objects.create(
+            name='판매중'
+        )
+        product.save()
+
+        total = self.get_statistic(models.SellStatistic.TOTAL)
+        self.assertEqual(total.total_count, 0)
+        self.assertEqual(total.total_price, Decimal('0'))
+        self.assertEqual(total.average_period, 0)
+        self.assertFalse(
+            models.SellRecord.objects.filter(product=product).exists()
+        )
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        """Test the reconcile command corrects drifted rows"""
+        self.sell(sample_product(self.brand, self.category))
+        models.SellStatistic.objects.filter(
+            scope=models.SellStatistic.TOTAL
+        ).update(total_count=5)
+
+        out = StringIO()
+        call_command('reconcile_sell_statistics', '--fix', stdout=out)
+
+        self.assertIn('Fixed 1 drifted rows', out.getvalue())
+        total = self.get_statistic(models.SellStatistic.TOTAL)
+        self.assertEqual(total.total_count, 1)
+
+    def test_reconcile_without_drift(self):
+        """Test the reconcile command reports consistent rollups"""
+        self.sell(sample_product(self.brand, self.category))
+
+        out = StringIO()
+        call_command('reconcile_sell_statistics', stdout=out)
+
+        self.assertIn('No drift found', out.getvalue())
+
+    def test_reconcile_keeps_recorded_sales(self):
+        """Test a sale counts with the values of its record, which is what
+        cancelling it subtracts, after the product changed"""
+        product = sample_product(self.brand, self.category, '1000.00')
+        self.sell(product)
+        models.Product.objects.filter(pk=product.pk).update(
+            price=Decimal('700.00'), sell_category=None
+        )
+
+        out = StringIO()
+        call_command('reconcile_sell_statistics', '--fix', stdout=out)
+        self.assertIn('No drift found', out.getvalue())
+
+        product.refresh_from_db()
+        product.product_status = models.ProductStatus.objects.create(
+            name='판매중'
+        )
+        product.save()
+
+        total = self.get_statistic(models.SellStatistic.TOTAL)
+        self.assertEqual(total.total_count, 0)
+        self.assertEqual(total.total_price, Decimal('0'))
+
+    def test_reconcile_recreates_missing_records(self):
+        """Test sold products without a sell record are reported and
+        recorded again, dated by the status log"""
+        product = sample_product(self.brand, self.category)
+        self.sell(product)
+        models.SellRecord.objects.all().delete()
+        log = models.ProductStatusLog.objects.create(
+            product=product, product_status=self.sold
+        )
+
+        out = StringIO()
+        call_command('reconcile_sell_statistics', '--fix', stdout=out)
+
+        self.assertIn(
+            'product %d: sold without a sell record' % product.id,
+            out.getvalue()
+        )
+        record = models.SellRecord.objects.get(product=product)
+        self.assertEqual(record.sold_at, log.created_at)
+        self.assertEqual(
+            self.get_statistic(models.SellStatistic.TOTAL).total_count, 1
+        )
+
+    def test_reconcile_removes_stale_records(self):
+        """Test sell records of products no longer sold are removed along
+        with their contribution"""
+        product = sample_product(self.brand, self.category)
+        self.sell(product)
+        models.Product.objects.filter(pk=product.pk).update(
+            product_status=models.ProductStatus.objects.create(name='판매중')
+        )
+
+        out = StringIO()
+        call_command('reconcile_sell_statistics', '--fix', stdout=out)
+
+        self.assertIn('1 stale sell records', out.getvalue())
+        self.assertFalse(models.SellRecord.objects.exists())
+        total = self.get_statistic(models.SellStatistic.TOTAL)
+        self.assertEqual(total.total_count, 0)
+        self.assertEqual(total.total_price, Decimal('0'))
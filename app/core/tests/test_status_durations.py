@@ -0,0 +1,102 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from core import models, status_durations
+
+
+def sample_product(brand, sell_category=None):
+    return models.Product.objects.create(
+        name='클래식 플랩백',
+        brand=brand,
+        sell_category=sell_category,
+        purchased_year='2019',
+        purchased_where='백화점',
+        purchased_price='7000000',
+        wish_price='6000000',
+    )
+
+
+class StatusDurationTests(TestCase):
+
+    def setUp(self):
+        self.brand = models.Brand.objects.create(
+            kor_name='샤넬', kor_letters='ㅅㄴ', eng_name='CHANEL'
+        )
+        self.category = models.SellCategory.objects.create(name='가방')
+        self.intake = models.ProductStatus.objects.create(name='입고')
+        self.inspection = models.ProductStatus.objects.create(name='검수')
+        self.listed = models.ProductStatus.objects.create(name='판매중')
+        self.start = timezone.now() - timedelta(days=10)
+
+    def log(self, product, status, hours):
+        entry = models.ProductStatusLog.objects.create(
+            product=product, product_status=status
+        )
+        # created_at is auto_now_add
+        models.ProductStatusLog.objects.filter(pk=entry.pk).update(
+            created_at=self.start + timedelta(hours=hours)
+        )
+
+    def get_statistic(self, scope, key, status):
+        return models.StatusDurationStatistic.objects.get(
+            scope=scope, key=key, product_status=status
+        )
+
+    def test_durations_per_status(self):
+        """Test every completed stay in a status is counted"""
+        first = sample_product(self.brand, self.category)
+        self.log(first, self.intake, 0)
+        self.log(first, self.inspection, 2)
+        self.log(first, self.listed, 5)
+        second = sample_product(self.brand)
+        self.log(second, self.intake, 1)
+        self.log(second, self.inspection, 5)
+
+        # a chunk size of 2 splits products across chunks
+        status_durations.rebuild_statistics(chunk_size=2)
+
+        total = models.SellStatistic.TOTAL
+        intake = self.get_statistic(total, '', self.intake)
+        self.assertEqual(intake.count, 2)
+        self.assertEqual(intake.average_seconds, 3 * 3600)
+        self.assertEqual(intake.p50_seconds, 3 * 3600)
+        inspection = self.get_statistic(total, '', self.inspection)
+        self.assertEqual(inspection.count, 1)
+        self.assertEqual(inspection.p95_seconds, 3 * 3600)
+        # the current status of a product has no end yet
+        self.assertFalse(
+            models.StatusDurationStatistic.objects.filter(
+                product_status=self.listed
+            ).exists()
+        )
+        category = self.get_statistic(
+            models.SellStatistic.SELL_CATEGORY, str(self.category.id),
+            self.intake,
+        )
+        self.assertEqual(category.count, 1)
+        self.assertEqual(category.average_seconds, 2 * 3600)
+        brand = self.get_statistic(
+            models.SellStatistic.BRAND, str(self.brand.id), self.intake
+        )
+        self.assertEqual(brand.count, 2)
+
+    def test_rebuild_replaces_rows(self):
+        """Test rebuilding twice does not duplicate statistics"""
+        product = sample_product(self.brand)
+        self.log(product, self.intake, 0)
+        self.log(product, self.listed, 1)
+
+        out = StringIO()
+        call_command('compute_status_durations', stdout=out)
+        call_command('compute_status_durations', stdout=out)
+
+        self.assertIn('Wrote 2 statistics', out.getvalue())
+        self.assertEqual(models.StatusDurationStatistic.objects.count(), 2)
+
+    def test_empty_log(self):
+        """Test an empty log produces no statistics"""
+        self.assertEqual(status_durations.rebuild_statistics(), [])
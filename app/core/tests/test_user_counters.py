@@ -0,0 +1,132 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from core import models, user_counters
+
+
+def sample_user(email='seller@test.com', **params):
+    return get_user_model().objects.create_user(email, 'testpass', **params)
+
+
+def sample_product(user, brand, price='1000.00'):
+    return models.Product.objects.create(
+        name='클래식 플랩백',
+        user=user,
+        brand=brand,
+        purchased_year='2019',
+        purchased_where='백화점',
+        purchased_price='7000000',
+        wish_price='6000000',
+        price=Decimal(price),
+        product_status=models.ProductStatus.objects.create(name='판매중'),
+    )
+
+
+class UserCounterTests(TestCase):
+
+    def setUp(self):
+        self.user = sample_user()
+
+    def get_user(self):
+        return get_user_model().objects.get(pk=self.user.pk)
+
+    def test_purchases_are_added(self):
+        """Test purchases add to the count and total of the buyer"""
+        user_counters.add_purchase(self.user.pk, Decimal('1000.00'))
+        user_counters.add_purchase(self.user.pk, Decimal('500.00'))
+        user_counters.cancel_purchase(self.user.pk, Decimal('500.00'))
+
+        user = self.get_user()
+        self.assertEqual(user.purchase_count, 1)
+        self.assertEqual(user.purchase_total, Decimal('1000.00'))
+
+    def test_saving_user_keeps_counters(self):
+        """Test saving a user loaded earlier does not write back its
+        outdated counters"""
+        stale = self.get_user()
+        user_counters.add_purchase(self.user.pk, Decimal('1000.00'))
+
+        stale.name = 'seller'
+        stale.save()
+
+        user = self.get_user()
+        self.assertEqual(user.name, 'seller')
+        self.assertEqual(user.purchase_count, 1)
+
+    def test_spend_points(self):
+        """Test points can be spent down to zero and no further"""
+        user_counters.add_points(self.user.pk, 100)
+        user_counters.add_points(self.user.pk, -100)
+
+        with self.assertRaises(user_counters.InsufficientPoints):
+            user_counters.add_points(self.user.pk, -1)
+        self.assertEqual(self.get_user().point, 0)
+
+
+class SellTotalTests(TestCase):
+
+    def setUp(self):
+        self.seller = sample_user()
+        self.brand = models.Brand.objects.create(
+            kor_name='샤넬', kor_letters='ㅅㄴ', eng_name='CHANEL'
+        )
+        self.sold = models.ProductStatus.objects.create(name='판매완료')
+
+    def get_sell_total(self):
+        return get_user_model().objects.get(pk=self.seller.pk).sell_total
+
+    def sell(self, product):
+        product.product_status = self.sold
+        product.save()
+
+    def test_sale_adds_to_seller(self):
+        """Test selling and cancelling products updates the seller"""
+        first = sample_product(self.seller, self.brand, '1000.00')
+        self.sell(first)
+        self.sell(sample_product(self.seller, self.brand, '500.00'))
+        self.assertEqual(self.get_sell_total(), Decimal('1500.00'))
+
+        first.product_status = models.ProductStatus.objects.create(
+            name='판매중'
+        )
+        first.save()
+
+        self.assertEqual(self.get_sell_total(), Decimal('500.00'))
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        """Test the command reports drift and fixes it with --fix"""
+        self.sell(sample_product(self.seller, self.brand, '1000.00'))
+        other = sample_user('other@test.com')
+        get_user_model().objects.filter(pk=self.seller.pk).update(
+            sell_total=Decimal('1.00')
+        )
+        get_user_model().objects.filter(pk=other.pk).update(
+            sell_total=Decimal('5.00')
+        )
+
+        out = StringIO()
+        call_command('reconcile_user_counters', '--chunk-size', '1',
+                     stdout=out)
+        self.assertIn('2 sell totals drifted', out.getvalue())
+        self.assertEqual(self.get_sell_total(), Decimal('1.00'))
+
+        call_command('reconcile_user_counters', '--fix', stdout=StringIO())
+
+        self.assertEqual(self.get_sell_total(), Decimal('1000.00'))
+        other.refresh_from_db()
+        self.assertEqual(other.sell_total, Decimal('0'))
+
+    def test_records_without_seller_count_for_product_owner(self):
+        """Test sales recorded before the seller was stored are counted
+        for the seller of the product"""
+        self.sell(sample_product(self.seller, self.brand, '1000.00'))
+        models.SellRecord.objects.update(seller=None)
+
+        out = StringIO()
+        call_command('reconcile_user_counters', stdout=out)
+
+        self.assertIn('No drift found', out.getvalue())
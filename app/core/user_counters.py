@@ -0,0 +1,143 @@
+"""Atomic maintenance of the counters stored on the users row.
+
+``point``, ``purchase_count``, ``purchase_total`` and ``sell_total`` are
+read on every seller dashboard, so they stay denormalized on the users
+row, but are only ever changed with F() expressions: the database adds
+the delta under the row lock, and concurrent sales of one seller queue
+on that lock instead of overwriting each other's totals.
+
+sell_total follows SellRecord: core.statistics adds a sale and removes a
+cancelled one in the same transaction as the record, and
+reconcile_sell_totals recomputes it from the records.  Purchases and
+points have no record in this code base yet; code completing or
+cancelling an order calls add_purchase, cancel_purchase and add_points.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Coalesce
+
+from core.models import SellRecord
+
+
+class InsufficientPoints(ValueError):
+    """Raised when spending more points than a user has"""
+
+
+def _add(user_id, **deltas):
+    get_user_model().objects.filter(pk=user_id).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+
+
+def add_sale(seller_id, price):
+    """Add a sale to the seller's sell_total"""
+    if seller_id is not None:
+        _add(seller_id, sell_total=price)
+
+
+def cancel_sale(seller_id, price):
+    """Remove a cancelled sale from the seller's sell_total"""
+    if seller_id is not None:
+        _add(seller_id, sell_total=-price)
+
+
+def add_purchase(user_id, amount):
+    """Count a completed purchase of the buyer"""
+    _add(user_id, purchase_count=1, purchase_total=amount)
+
+
+def cancel_purchase(user_id, amount):
+    """Remove a cancelled purchase of the buyer"""
+    _add(user_id, purchase_count=-1, purchase_total=-amount)
+
+
+def add_points(user_id, points):
+    """Add points to a user, or spend them when ``points`` is negative.
+
+    Raises InsufficientPoints instead of going below zero; the check and
+    the change are one statement, so two concurrent spends cannot both
+    pass it."""
+    changed = get_user_model().objects.filter(
+        pk=user_id, point__gte=-points
+    ).update(point=F('point') + points)
+    if not changed:
+        raise InsufficientPoints('User %s has fewer than %d points' % (
+            user_id, -points
+        ))
+
+
+def compute_sell_totals(user_ids):
+    """Return {user id: sum of the sell records} of the given users"""
+    totals = defaultdict(lambda: Decimal('0'))
+    rows = (
+        SellRecord.objects
+        .filter(
+            Q(seller_id__in=user_ids)
+            | Q(seller__isnull=True, product__user_id__in=user_ids)
+        )
+        .annotate(counted_seller=Coalesce('seller_id', 'product__user_id'))
+        .order_by()
+        .values('counted_seller')
+        .annotate(total=Sum('price'))
+    )
+    for row in rows:
+        totals[row['counted_seller']] = row['total']
+    return totals
+
+
+def iter_user_chunks(chunk_size):
+    """Yield the user ids in ascending chunks"""
+    users = get_user_model().objects.order_by('pk')
+    last = 0
+    while True:
+        ids = list(
+            users.filter(pk__gt=last).values_list('pk', flat=True)[
+                :chunk_size
+            ]
+        )
+        if not ids:
+            return
+        yield ids
+        last = ids[-1]
+
+
+def find_sell_total_drift(user_ids):
+    """Return [(user id, stored, expected)] of the users whose sell_total
+    differs from their sell records.
+
+    Without a lock, a sale committing between the two reads shows up as
+    drift; reconcile_sell_totals confirms it."""
+    expected = compute_sell_totals(user_ids)
+    stored = get_user_model().objects.filter(pk__in=user_ids).values_list(
+        'pk', 'sell_total'
+    )
+    return [
+        (pk, total, expected[pk])
+        for pk, total in stored if total != expected[pk]
+    ]
+
+
+def reconcile_sell_totals(user_ids, fix=True):
+    """Compare the sell totals of users with their sell records under a
+    lock, overwriting the drifted ones when ``fix`` is set.
+
+    The users rows are locked first, so a sale still in progress either
+    committed before the sums are read or adds its delta afterwards.
+    Returns the drifted [(user id, stored, expected)]."""
+    with transaction.atomic():
+        locked = list(
+            get_user_model().objects.select_for_update()
+            .filter(pk__in=user_ids).order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        drifted = find_sell_total_drift(locked)
+        if fix:
+            for pk, _, expected in drifted:
+                get_user_model().objects.filter(pk=pk).update(
+                    sell_total=expected
+                )
+    return drifted
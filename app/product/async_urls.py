@@ -0,0 +1,11 @@
+from django.urls import path
+
+from product import async_views
+
+
+app_name = 'product-async'
+
+urlpatterns = [
+    path('', async_views.product_list, name='product-list'),
+    path('<int:pk>/', async_views.product_detail, name='product-detail'),
+]
@@ -0,0 +1,75 @@
+"""Async versions of the browse and detail endpoints for the ASGI
+application.
+
+The sections of the detail page are independent, so they are loaded
+concurrently through the ORM thread pool instead of one after the other.
+"""
+from django.http import JsonResponse
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+from core import product_versions
+from core.async_orm import gather_orm, run_orm
+from core.models import Product
+
+from product import detail, detail_cache, views
+
+
+def _json(data, status=200):
+    return JsonResponse(
+        data, status=status, encoder=JSONEncoder,
+        json_dumps_params={'ensure_ascii': False},
+    )
+
+
+def _load_product_page(request):
+    """Run the synchronous list view and return its payload"""
+    view = views.ProductListView()
+    view.setup(request)
+    view.request = Request(request)
+    view.format_kwarg = None
+    return view.list(view.request).data
+
+
+async def product_list(request):
+    """List products newest first, paginated by keyset"""
+    if request.method != 'GET':
+        return _json({'detail': 'Method not allowed.'}, status=405)
+    try:
+        data = await run_orm(_load_product_page, request)
+    except APIException as exc:
+        return _json({'detail': exc.detail}, status=exc.status_code)
+    return _json(data)
+
+
+async def product_detail(request, pk):
+    """Return a product with its details, images, price history, related
+    products and seller reviews, loaded concurrently.
+
+    Conditional requests and cached pages are handled like in
+    ProductDetailView."""
+    if request.method != 'GET':
+        return _json({'detail': 'Method not allowed.'}, status=405)
+    try:
+        versions = await run_orm(product_versions.get_versions, pk)
+    except Product.DoesNotExist:
+        return _json({'detail': 'Not found.'}, status=404)
+    response = detail_cache.not_modified(request, versions)
+    if response is not None:
+        return response
+
+    page = detail_cache.detail_cache.get(pk, versions)
+    if page is None:
+        try:
+            results = await gather_orm(
+                *((loader, pk) for _, loader in detail.SECTIONS)
+            )
+        except Product.DoesNotExist:
+            return _json({'detail': 'Not found.'}, status=404)
+        page = {
+            name: result
+            for (name, _), result in zip(detail.SECTIONS, results)
+        }
+        detail_cache.detail_cache.set(pk, versions, page)
+    return detail_cache.set_validators(_json(page), versions)
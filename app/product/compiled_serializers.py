@@ -0,0 +1,256 @@
+"""Read-only serializers compiled to work on ``values()`` rows.
+
+A ModelSerializer calls get_attribute and to_representation for every
+field of every instance, and needs the instances and their prefetched
+relations first.  CompiledSerializer reads the field declarations of a
+serializer once and turns them into:
+
+* the ``values()`` paths to select, following nested serializers of
+  foreign keys with joins;
+* one accessor per field, a plain item getter for fields that return
+  database values unchanged and the field's to_representation otherwise;
+* one query per nested ``many=True`` serializer, grouped by parent id,
+  compiled in turn.
+
+The output is the same as the serializer's.  Fields that need the
+instance (SerializerMethodField, ``source='*'``, properties) are not
+supported and raise ImproperlyConfigured when compiling.
+"""
+import functools
+from collections import defaultdict
+from operator import itemgetter
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models.fields.files import FieldFile
+from rest_framework import fields as drf_fields
+from rest_framework import relations, serializers
+
+
+# Fields whose to_representation returns database values unchanged
+PASSTHROUGH_FIELDS = (
+    drf_fields.BooleanField,
+    drf_fields.CharField,
+    drf_fields.FloatField,
+    drf_fields.IntegerField,
+    drf_fields.ReadOnlyField,
+    relations.PrimaryKeyRelatedField,
+)
+UNSUPPORTED_FIELDS = (
+    drf_fields.SerializerMethodField,
+    drf_fields.HiddenField,
+    relations.ManyRelatedField,
+    relations.HyperlinkedRelatedField,
+)
+
+
+def _model_field(model, name):
+    """Return the field of a model by name or reverse accessor name"""
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        for relation in model._meta.related_objects:
+            if relation.get_accessor_name() == name:
+                return relation
+        raise
+
+
+class Relation:
+    """A nested ``many=True`` serializer, loaded with one query"""
+
+    def __init__(self, model, name, field):
+        self.name = name
+        model_field = _model_field(model, field.source)
+        if model_field.many_to_many and not model_field.auto_created:
+            # Read the through table, in the order the rows were linked
+            through = model_field.remote_field.through
+            self.manager = through._default_manager
+            self.parent_path = model_field.m2m_field_name()
+            prefix = model_field.m2m_reverse_field_name() + '__'
+        elif model_field.one_to_many:
+            self.manager = model_field.related_model._default_manager
+            self.parent_path = model_field.field.name
+            prefix = ''
+        else:
+            raise ImproperlyConfigured(
+                'Cannot compile %s.%s, only many to many and reverse '
+                'foreign keys may be nested with many=True'
+                % (model.__name__, name)
+            )
+        self.child = CompiledSerializer(type(field.child), prefix=prefix)
+
+    def fetch(self, parent_ids, context):
+        """Return {parent id: [serialized rows]}"""
+        grouped = defaultdict(list)
+        if not parent_ids:
+            return grouped
+        rows = list(
+            self.manager.filter(**{self.parent_path + '__in': parent_ids})
+            .order_by(self.parent_path, 'pk')
+            .values(self.parent_path, *self.child.columns)
+        )
+        for row, data in zip(rows, self.child.serialize(rows, context)):
+            grouped[row[self.parent_path]].append(data)
+        return grouped
+
+
+class CompiledSerializer:
+    """The read-only output of ``serializer_class`` built from rows"""
+
+    def __init__(self, serializer_class, prefix=''):
+        serializer = serializer_class()
+        self.serializer_class = serializer_class
+        self.model = serializer.Meta.model
+        # Rows read through a relation have every column prefixed
+        self.pk_path = prefix + self.model._meta.pk.attname
+        self.columns = [self.pk_path]
+        self.relations = []
+        self.plan = self._compile(serializer, self.model, prefix)
+
+    def _add_column(self, path):
+        if path not in self.columns:
+            self.columns.append(path)
+        return path
+
+    def _compile(self, serializer, model, prefix):
+        """Return [(name, kind, details)] of the readable fields"""
+        plan = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.ListSerializer):
+                if prefix:
+                    raise ImproperlyConfigured(
+                        'Cannot compile %s.%s, many=True is only supported '
+                        'on the top level serializer' % (
+                            type(serializer).__name__, name
+                        )
+                    )
+                self.relations.append(Relation(model, name, field))
+                plan.append((name, 'relation', None))
+                continue
+            if isinstance(field, UNSUPPORTED_FIELDS) or field.source == '*':
+                raise ImproperlyConfigured(
+                    'Cannot compile %s.%s, %s needs the instance' % (
+                        type(serializer).__name__, name,
+                        type(field).__name__,
+                    )
+                )
+
+            path = prefix + '__'.join(field.source_attrs)
+            if isinstance(field, serializers.BaseSerializer):
+                related = model
+                for attr in field.source_attrs:
+                    related = _model_field(related, attr).related_model
+                # A null foreign key serializes as None
+                pk_path = self._add_column(
+                    path + '__' + related._meta.pk.attname
+                )
+                plan.append((name, 'nested', (
+                    pk_path, self._compile(field, related, path + '__')
+                )))
+            elif isinstance(field, drf_fields.FileField):
+                self._add_column(path)
+                owner = model
+                for attr in field.source_attrs[:-1]:
+                    owner = _model_field(owner, attr).related_model
+                model_field = _model_field(owner, field.source_attrs[-1])
+                plan.append((name, 'file', (path, model_field, field)))
+            else:
+                self._add_column(path)
+                plan.append((name, 'value', (path, field)))
+        return plan
+
+    def _accessors(self, plan, related, request):
+        """Return [(name, function of a row)] of a compiled plan"""
+        accessors = []
+        for name, kind, details in plan:
+            if kind == 'relation':
+                accessors.append((name, self._relation_accessor(
+                    related[name]
+                )))
+            elif kind == 'nested':
+                pk_path, nested_plan = details
+                accessors.append((name, self._nested_accessor(
+                    pk_path, self._accessors(nested_plan, related, request)
+                )))
+            elif kind == 'file':
+                accessors.append((name, self._file_accessor(
+                    *details, request
+                )))
+            else:
+                accessors.append((name, self._value_accessor(*details)))
+        return accessors
+
+    def _value_accessor(self, path, field):
+        # Subclasses may change the output, only the exact classes pass
+        if type(field) in PASSTHROUGH_FIELDS:
+            return itemgetter(path)
+        to_representation = field.to_representation
+
+        def access(row):
+            value = row[path]
+            return None if value is None else to_representation(value)
+        return access
+
+    def _file_accessor(self, path, model_field, field, request):
+        use_url = getattr(field, 'use_url', True)
+
+        def access(row):
+            name = row[path]
+            if not name:
+                return None
+            if not use_url:
+                return name
+            url = FieldFile(None, model_field, name).url
+            if request is not None:
+                return request.build_absolute_uri(url)
+            return url
+        return access
+
+    def _nested_accessor(self, pk_path, accessors):
+        def access(row):
+            if row[pk_path] is None:
+                return None
+            return {name: accessor(row) for name, accessor in accessors}
+        return access
+
+    def _relation_accessor(self, grouped):
+        pk_path = self.pk_path
+
+        def access(row):
+            return grouped.get(row[pk_path], [])
+        return access
+
+    def values(self, queryset, extra=()):
+        """Return the values() queryset of the columns to serialize.
+
+        ``extra`` adds columns needed by the caller, such as the fields a
+        paginator orders by."""
+        columns = list(self.columns)
+        for path in extra:
+            if path not in columns:
+                columns.append(path)
+        return queryset.prefetch_related(None).values(*columns)
+
+    def serialize(self, rows, context=None):
+        """Return the serialized data of values() rows"""
+        rows = list(rows)
+        context = context or {}
+        parent_ids = [row[self.pk_path] for row in rows]
+        related = {
+            relation.name: relation.fetch(parent_ids, context)
+            for relation in self.relations
+        }
+        accessors = self._accessors(
+            self.plan, related, context.get('request')
+        )
+        return [
+            {name: accessor(row) for name, accessor in accessors}
+            for row in rows
+        ]
+
+
+@functools.lru_cache(maxsize=None)
+def compile_serializer(serializer_class):
+    """Return the compiled form of a serializer class, compiled once"""
+    return CompiledSerializer(serializer_class)
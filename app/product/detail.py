@@ -0,0 +1,93 @@
+"""Loaders of the sections of the product detail page.
+
+Every section only needs the product id, so the sections can be loaded
+one after the other (ProductDetailView) or concurrently (the async
+views).  Each loader returns serialized data so that nothing is loaded
+lazily once the result leaves the thread that ran the query.
+"""
+from django.db.models import Subquery
+
+from core.models import (
+    Image,
+    PriceHistory,
+    Product,
+    ProductDetail,
+    RelatedProduct,
+    SellerReview,
+)
+
+from product import serializers
+
+
+PRICE_HISTORY_LIMIT = 20
+RELATED_PRODUCTS_LIMIT = 12
+SELLER_REVIEWS_LIMIT = 10
+
+
+def load_product(pk):
+    """Return the product, raising Product.DoesNotExist if missing"""
+    product = (
+        Product.objects.select_related('brand', 'user')
+        .prefetch_related('tag', 'keyword', 'category')
+        .get(pk=pk)
+    )
+    return serializers.ProductSerializer(product).data
+
+
+def load_details(pk):
+    details = ProductDetail.objects.filter(product_id=pk).order_by('id')
+    return serializers.ProductDetailSerializer(details, many=True).data
+
+
+def load_images(pk):
+    images = (
+        Image.objects.filter(product_id=pk)
+        .prefetch_related('derivatives')
+        .order_by('id')
+    )
+    return serializers.ImageSerializer(images, many=True).data
+
+
+def load_price_history(pk, limit=PRICE_HISTORY_LIMIT):
+    history = PriceHistory.objects.filter(product_id=pk).order_by(
+        '-created_at'
+    )[:limit]
+    return serializers.PriceHistorySerializer(history, many=True).data
+
+
+def load_related_products(pk, limit=RELATED_PRODUCTS_LIMIT):
+    """Return curated related products first, then the best scored ones.
+
+    Reads the related_from_score_idx index in order."""
+    related = (
+        RelatedProduct.objects.filter(from_product_id=pk)
+        .select_related('to_product__brand')
+        .order_by('is_generated', '-score')[:limit]
+    )
+    return serializers.ProductSummarySerializer(
+        [row.to_product for row in related], many=True
+    ).data
+
+
+def load_seller_reviews(pk, limit=SELLER_REVIEWS_LIMIT):
+    """Return the latest reviews of the products of the same seller"""
+    seller = Product.objects.filter(pk=pk).values('user_id')[:1]
+    reviews = SellerReview.objects.filter(
+        product__user_id=Subquery(seller)
+    ).order_by('-created_at')[:limit]
+    return serializers.SellerReviewSerializer(reviews, many=True).data
+
+
+SECTIONS = (
+    ('product', load_product),
+    ('details', load_details),
+    ('images', load_images),
+    ('price_history', load_price_history),
+    ('related_products', load_related_products),
+    ('seller_reviews', load_seller_reviews),
+)
+
+
+def load_detail_page(pk):
+    """Load every section one after the other"""
+    return {name: loader(pk) for name, loader in SECTIONS}
@@ -0,0 +1,84 @@
+"""In-process cache of product detail pages, with conditional GET.
+
+Pages are kept by product id together with the versions they were built
+for (see core.product_versions) and evicted least recently used first,
+PRODUCT_DETAIL_CACHE_SIZE pages per process.  A page is only served for
+the versions it was built for, so a change shows up as soon as its
+version is touched.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from core import product_versions
+
+
+class DetailCache:
+    """Least recently used pages by product id"""
+
+    def __init__(self, size=None):
+        self.size = size
+        self._lock = threading.Lock()
+        self._pages = OrderedDict()
+
+    def get_size(self):
+        if self.size is not None:
+            return self.size
+        return settings.PRODUCT_DETAIL_CACHE_SIZE
+
+    def get(self, pk, versions):
+        """Return the page of the product at these versions, or None"""
+        with self._lock:
+            entry = self._pages.get(pk)
+            if entry is None or entry[0] != versions:
+                return None
+            self._pages.move_to_end(pk)
+            return entry[1]
+
+    def set(self, pk, versions, page):
+        with self._lock:
+            self._pages[pk] = (versions, page)
+            self._pages.move_to_end(pk)
+            while len(self._pages) > self.get_size():
+                self._pages.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+
+detail_cache = DetailCache()
+
+
+def get_page(pk, versions, loader):
+    """Return the cached page of the product, loading it on a miss"""
+    page = detail_cache.get(pk, versions)
+    if page is None:
+        # The versions were read before loading, so a change committed
+        # while loading makes this entry outdated right away
+        page = loader(pk)
+        detail_cache.set(pk, versions, page)
+    return page
+
+
+def not_modified(request, versions):
+    """Return a 304 response if the client has this version of the page"""
+    return get_conditional_response(
+        request,
+        etag=product_versions.get_etag(versions),
+        last_modified=product_versions.get_last_modified(versions),
+    )
+
+
+def set_validators(response, versions):
+    """Add the ETag and Last-Modified of the page, and make clients
+    revalidate instead of guessing how long the page stays fresh"""
+    response['ETag'] = product_versions.get_etag(versions)
+    response['Last-Modified'] = http_date(
+        product_versions.get_last_modified(versions)
+    )
+    patch_cache_control(response, no_cache=True)
+    return response
@@ -0,0 +1,220 @@
+"""Filters of the product listing and the facet counts that go with them.
+
+All requested facets are counted by a single query: the filtered products
+are joined to their categories once and grouped with GROUPING SETS, one
+set per facet, counting distinct products so the category join does not
+inflate the other facets.  Results are cached for FACET_CACHE_TIMEOUT
+seconds under the normalized filter set.
+"""
+import hashlib
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Exists, OuterRef
+
+from core.models import Product, ProductCategory, SubCategory
+
+
+# Query parameter, named after the product field: column filtered on
+FIELD_FILTERS = {
+    'brand': 'brand_id',
+    'product_grade': 'product_grade_id',
+    'product_status': 'product_status_id',
+    'sell_category': 'sell_category_id',
+}
+CATEGORY_FILTERS = {
+    'sub_category': 'sub_category_id',
+    'main_category': 'sub_category__main_category_id',
+}
+FACETS = tuple(FIELD_FILTERS) + tuple(CATEGORY_FILTERS) + ('price',)
+
+CACHE_KEY_PREFIX = 'facets:'
+
+
+def _parse_ids(value):
+    ids = set()
+    for part in value.split(','):
+        part = part.strip()
+        if part.isdigit():
+            ids.add(int(part))
+    return sorted(ids)
+
+
+def _parse_decimal(value):
+    if value is None:
+        return None
+    try:
+        value = Decimal(value)
+    except InvalidOperation:
+        return None
+    return value if value.is_finite() else None
+
+
+def parse_filters(params):
+    """Return the normalized filters of query parameters.
+
+    Id filters take comma separated ids; unknown or malformed values are
+    ignored like the price bounds always were."""
+    filters = {}
+    for name in tuple(FIELD_FILTERS) + tuple(CATEGORY_FILTERS):
+        ids = _parse_ids(params.get(name, ''))
+        if ids:
+            filters[name] = ids
+    for name in ('min_price', 'max_price'):
+        value = _parse_decimal(params.get(name))
+        if value is not None:
+            filters[name] = value
+    return filters
+
+
+def parse_facets(value):
+    """Return the requested facets of a comma separated list"""
+    if not value:
+        return []
+    if value.strip() == 'all':
+        return list(FACETS)
+    requested = {part.strip() for part in value.split(',')}
+    return [facet for facet in FACETS if facet in requested]
+
+
+def filter_products(queryset, filters):
+    """Apply normalized filters to a product queryset"""
+    for name, field in FIELD_FILTERS.items():
+        if name in filters:
+            queryset = queryset.filter(**{field + '__in': filters[name]})
+    for name, field in CATEGORY_FILTERS.items():
+        if name in filters:
+            # EXISTS instead of a join, so products are not duplicated
+            queryset = queryset.filter(Exists(ProductCategory.objects.filter(
+                product=OuterRef('pk'), **{field + '__in': filters[name]}
+            )))
+    if 'min_price' in filters:
+        queryset = queryset.filter(price__gte=filters['min_price'])
+    if 'max_price' in filters:
+        queryset = queryset.filter(price__lte=filters['max_price'])
+    return queryset
+
+
+def _column(model, field):
+    return connection.ops.quote_name(model._meta.get_field(field).column)
+
+
+def _facet_expressions():
+    """Return the SQL expression grouped by for every facet"""
+    expressions = {
+        name: 'p.' + _column(Product, name) for name in FIELD_FILTERS
+    }
+    expressions['sub_category'] = 'pc.' + _column(
+        ProductCategory, 'sub_category'
+    )
+    expressions['main_category'] = 'sc.' + _column(
+        SubCategory, 'main_category'
+    )
+    # The boundaries come from the settings, not from the request, and
+    # are inlined so the expression is identical in every clause
+    boundaries = ', '.join(
+        str(Decimal(boundary)) for boundary in settings.FACET_PRICE_BUCKETS
+    )
+    expressions['price'] = 'width_bucket(p.%s, ARRAY[%s]::numeric[])' % (
+        _column(Product, 'price'), boundaries
+    )
+    return expressions
+
+
+def count_facets(filters, facets):
+    """Count the products of every facet value with one query.
+
+    Returns {facet: [{'id': value, 'count': n}, ...]}; price buckets are
+    returned as {'min', 'max', 'count'} using FACET_PRICE_BUCKETS."""
+    if not facets:
+        return {}
+    products = filter_products(Product.objects.order_by(), filters)
+    products_sql, params = products.values('pk').query.sql_with_params()
+
+    expressions = _facet_expressions()
+    selected = [expressions[facet] for facet in facets]
+    joins = ''
+    if 'sub_category' in facets or 'main_category' in facets:
+        joins = (
+            ' LEFT JOIN {pc} pc ON pc.{pc_product} = p.{pk}'
+            ' LEFT JOIN {sc} sc ON sc.{pk} = pc.{pc_sub}'
+        ).format(
+            pc=connection.ops.quote_name(ProductCategory._meta.db_table),
+            sc=connection.ops.quote_name(SubCategory._meta.db_table),
+            pc_product=_column(ProductCategory, 'product'),
+            pc_sub=_column(ProductCategory, 'sub_category'),
+            pk=connection.ops.quote_name('id'),
+        )
+    sql = (
+        'SELECT GROUPING({columns}), {columns}, COUNT(DISTINCT p.{pk}) '
+        'FROM {products} p{joins} '
+        'WHERE p.{pk} IN ({filtered}) '
+        'GROUP BY GROUPING SETS ({sets})'
+    ).format(
+        columns=', '.join(selected),
+        pk=connection.ops.quote_name('id'),
+        products=connection.ops.quote_name(Product._meta.db_table),
+        joins=joins,
+        filtered=products_sql,
+        sets=', '.join('(%s)' % expression for expression in selected),
+    )
+
+    counts = {facet: [] for facet in facets}
+    last = len(facets) - 1
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        for grouping, *values, count in cursor.fetchall():
+            # GROUPING() sets the bit of every column not grouped by
+            index = next(
+                i for i in range(len(facets))
+                if not grouping & (1 << (last - i))
+            )
+            value = values[index]
+            if value is not None:
+                counts[facets[index]].append({'id': value, 'count': count})
+
+    for facet in facets:
+        counts[facet].sort(key=lambda item: item['id'])
+    if 'price' in counts:
+        counts['price'] = _price_buckets(counts['price'])
+    return counts
+
+
+def _price_buckets(rows):
+    boundaries = list(settings.FACET_PRICE_BUCKETS)
+    buckets = []
+    for row in rows:
+        # width_bucket returns 0 below the first boundary and len() above
+        # the last one
+        index = row['id']
+        buckets.append({
+            'min': boundaries[index - 1] if index > 0 else None,
+            'max': boundaries[index] if index < len(boundaries) else None,
+            'count': row['count'],
+        })
+    return buckets
+
+
+def cache_key(filters, facets):
+    normalized = json.dumps(
+        {'filters': filters, 'facets': sorted(facets)},
+        sort_keys=True, default=str,
+    )
+    return CACHE_KEY_PREFIX + hashlib.sha1(
+        normalized.encode('utf-8')
+    ).hexdigest()
+
+
+def get_facets(filters, facets):
+    """Return the facet counts of a filter set, cached for a short time"""
+    if not facets:
+        return {}
+    key = cache_key(filters, facets)
+    counts = cache.get(key)
+    if counts is None:
+        counts = count_facets(filters, facets)
+        cache.set(key, counts, settings.FACET_CACHE_TIMEOUT)
+    return counts
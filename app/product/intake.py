@@ -0,0 +1,268 @@
+"""Bulk product intake.
+
+A batch of validated ProductIntakeSerializer rows is written with one
+bulk_create per table inside a single transaction.  Brands, sellers,
+tags and keywords are resolved with one query per batch and reference
+rows come from core.reference, so the number of queries does not depend
+on the size of the batch.
+
+bulk_create does not send save signals, so the search documents and sell
+statistics the signals would maintain are updated here explicitly.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+
+from core import reference, row_files, search, statistics
+from core.models import (
+    Agreement,
+    Brand,
+    Consignment,
+    Image,
+    Keyword,
+    PriceHistory,
+    Product,
+    ProductCategory,
+    ProductDetail,
+    ProductKeyword,
+    ProductTag,
+    Tag,
+)
+
+
+LIST_FIELDS = ('tags', 'keywords', 'categories', 'images')
+
+
+class IntakeError(Exception):
+    """Raised when rows of a batch reference rows that do not exist"""
+
+    def __init__(self, errors):
+        super().__init__('Invalid intake batch')
+        self.errors = errors
+
+
+def read_rows(stream, format):
+    """Yield the product rows of a JSON lines or CSV text stream"""
+    return row_files.read_rows(stream, format, LIST_FIELDS)
+
+
+def _resolve_brands(values):
+    """Map brand ids, Korean and English names to brand ids"""
+    ids = {int(value) for value in values if value.isdigit()}
+    brands = Brand.objects.filter(
+        Q(id__in=ids) | Q(kor_name__in=values) | Q(eng_name__in=values)
+    ).order_by('id').values_list('id', 'kor_name', 'eng_name')
+    resolved = {}
+    for pk, kor_name, eng_name in brands:
+        resolved.setdefault(str(pk), pk)
+        resolved.setdefault(kor_name, pk)
+        resolved.setdefault(eng_name, pk)
+    return resolved
+
+
+def _resolve_sellers(emails):
+    User = get_user_model()
+    return dict(
+        User.objects.filter(email__in=emails).values_list('email', 'id')
+    )
+
+
+def _get_or_create_names(model, names):
+    """Map names to ids, creating the missing rows in one statement"""
+    resolved = {}
+    existing = model.objects.filter(name__in=names).order_by('id')
+    for pk, name in existing.values_list('id', 'name'):
+        resolved.setdefault(name, pk)
+    missing = [
+        model(name=name) for name in sorted(set(names) - set(resolved))
+    ]
+    for obj in model.objects.bulk_create(missing):
+        resolved[obj.name] = obj.pk
+    return resolved
+
+
+def _resolve_reference(cache, name, field, errors):
+    if not name:
+        return None
+    try:
+        return cache.get_by_name(name).pk
+    except cache.model.DoesNotExist:
+        errors[field] = ['Unknown %s "%s".' % (field, name)]
+        return None
+
+
+def _resolve_rows(rows, seller, seller_column):
+    """Resolve every reference of the batch or raise IntakeError"""
+    brands = _resolve_brands({row['brand'] for row in rows})
+    sellers = {}
+    if seller_column:
+        sellers = _resolve_sellers(
+            {row['seller'] for row in rows if row.get('seller')}
+        )
+    sub_categories = {
+        category.code: category.pk
+        for category in reference.sub_categories.all()
+    }
+
+    resolved = []
+    all_errors = {}
+    for index, row in enumerate(rows):
+        errors = {}
+        brand_id = brands.get(row['brand'])
+        if brand_id is None:
+            errors['brand'] = ['Unknown brand "%s".' % row['brand']]
+
+        seller_id = seller.pk if seller is not None else None
+        if seller_column and row.get('seller'):
+            seller_id = sellers.get(row['seller'])
+            if seller_id is None:
+                errors['seller'] = ['Unknown seller "%s".' % row['seller']]
+
+        category_ids = []
+        for code in row['categories']:
+            if code not in sub_categories:
+                errors['categories'] = ['Unknown category "%s".' % code]
+            else:
+                category_ids.append(sub_categories[code])
+
+        pickup_time_id = None
+        if row.get('consignment'):
+            pickup_time_id = _resolve_reference(
+                reference.pickup_times,
+                row['consignment'].get('pickup_time'),
+                'pickup_time',
+                errors,
+            )
+
+        resolved.append({
+            'brand_id': brand_id,
+            'user_id': seller_id,
+            'sell_category_id': _resolve_reference(
+                reference.sell_categories, row.get('sell_category'),
+                'sell_category', errors,
+            ),
+            'product_grade_id': _resolve_reference(
+                reference.product_grades, row.get('product_grade'),
+                'product_grade', errors,
+            ),
+            'product_status_id': _resolve_reference(
+                reference.product_statuses, row.get('product_status'),
+                'product_status', errors,
+            ),
+            'category_ids': category_ids,
+            'pickup_time_id': pickup_time_id,
+        })
+        if errors:
+            all_errors[index] = errors
+
+    if all_errors:
+        raise IntakeError(all_errors)
+    return resolved
+
+
+def import_batch(rows, seller=None, seller_column=True):
+    """Create the products of a validated batch and return them.
+
+    Rows without a seller are assigned to ``seller``.  Without
+    ``seller_column`` the seller column of the rows is ignored and every
+    product is assigned to ``seller``."""
+    resolved = _resolve_rows(rows, seller, seller_column)
+
+    with transaction.atomic():
+        tag_ids = _get_or_create_names(
+            Tag, {name for row in rows for name in row['tags']}
+        )
+        keyword_ids = _get_or_create_names(
+            Keyword, {name for row in rows for name in row['keywords']}
+        )
+
+        agreements = Agreement.objects.bulk_create([
+            Agreement(**row['agreement'])
+            for row in rows if row.get('agreement')
+        ])
+        agreements = iter(agreements)
+
+        products = []
+        for row, refs in zip(rows, resolved):
+            products.append(Product(
+                product_code=row['product_code'],
+                brand_id=refs['brand_id'],
+                user_id=refs['user_id'],
+                name=row['name'],
+                purchased_year=row['purchased_year'],
+                purchased_where=row['purchased_where'],
+                purchased_price=row['purchased_price'],
+                wish_price=row['wish_price'],
+                memo=row['memo'],
+                price=row.get('price'),
+                sell_category_id=refs['sell_category_id'],
+                product_grade_id=refs['product_grade_id'],
+                product_status_id=refs['product_status_id'],
+                agreement=(
+                    next(agreements) if row.get('agreement') else None
+                ),
+            ))
+        products = Product.objects.bulk_create(products)
+
+        # What record_price does for one product: the price is the
+        # up-to-date row of the history and the current price
+        histories = PriceHistory.objects.bulk_create([
+            PriceHistory(product=product, price=product.price,
+                         is_uptodate=True)
+            for product in products if product.price is not None
+        ])
+        for history in histories:
+            history.product.current_price = history
+        Product.objects.bulk_update(
+            [history.product for history in histories], ['current_price']
+        )
+
+        details = []
+        consignments = []
+        images = []
+        product_tags = []
+        product_keywords = []
+        product_categories = []
+        for product, row, refs in zip(products, rows, resolved):
+            if row.get('detail'):
+                details.append(ProductDetail(product=product, **row['detail']))
+            if row.get('consignment'):
+                consignments.append(Consignment(
+                    product=product,
+                    address_id=refs['user_id'],
+                    date=row['consignment']['date'],
+                    pickup_time_id=refs['pickup_time_id'],
+                    is_pickup=row['consignment']['is_pickup'],
+                ))
+            images.extend(
+                Image(product=product, image_url=path, is_damaged=False)
+                for path in row['images']
+            )
+            product_tags.extend(
+                ProductTag(product=product, tag_id=tag_ids[name])
+                for name in dict.fromkeys(row['tags'])
+            )
+            product_keywords.extend(
+                ProductKeyword(product=product, keyword_id=keyword_ids[name])
+                for name in dict.fromkeys(row['keywords'])
+            )
+            product_categories.extend(
+                ProductCategory(product=product, sub_category_id=pk)
+                for pk in dict.fromkeys(refs['category_ids'])
+            )
+
+        ProductDetail.objects.bulk_create(details)
+        Consignment.objects.bulk_create(consignments)
+        Image.objects.bulk_create(images)
+        ProductTag.objects.bulk_create(product_tags)
+        ProductKeyword.objects.bulk_create(product_keywords)
+        ProductCategory.objects.bulk_create(product_categories)
+
+        search.update_search_documents(product.pk for product in products)
+        for product in products:
+            if product.product_status_id is not None:
+                statistics.product_status_changed(
+                    product, None, product.product_status_id
+                )
+
+    return products
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from core.models import Product
+
+
+HOST = 'localhost'
+
+
+def summarize(mode, latencies, elapsed):
+    latencies = sorted(latencies)
+    return {
+        'mode': mode,
+        'requests': len(latencies),
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'p95_ms': round(
+            latencies[int(len(latencies) * 0.95) - 1] * 1000, 2
+        ),
+    }
+
+
+class Command(BaseCommand):
+    """Django command to compare the WSGI and ASGI browse endpoints"""
+    help = (
+        'Send the same product detail and list requests through the WSGI '
+        'and ASGI handlers in process and compare throughput. Network and '
+        'server overhead are not included.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument(
+            '--json', action='store_true', help='Print the report as JSON'
+        )
+
+    def get_paths(self, count):
+        ids = list(
+            Product.objects.order_by('-id').values_list('id', flat=True)[:50]
+        )
+        if not ids:
+            raise CommandError('There are no products to request')
+        paths = []
+        for index in range(count):
+            if index % 5 == 0:
+                paths.append(('product:product-list',
+                              'product-async:product-list', None))
+            else:
+                paths.append(('product:product-detail',
+                              'product-async:product-detail',
+                              ids[index % len(ids)]))
+        return paths
+
+    def run_sync(self, paths, concurrency):
+        def fetch(path):
+            client = Client(HTTP_HOST=HOST)
+            started = time.perf_counter()
+            response = client.get(path)
+            elapsed = time.perf_counter() - started
+            close_old_connections()
+            if response.status_code != 200:
+                raise CommandError('%s returned %d' % (
+                    path, response.status_code
+                ))
+            return elapsed
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = list(executor.map(fetch, paths))
+        return summarize('wsgi', latencies, time.perf_counter() - started)
+
+    async def run_async(self, paths, concurrency):
+        client = AsyncClient(HTTP_HOST=HOST)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(path):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path)
+                elapsed = time.perf_counter() - started
+            if response.status_code != 200:
+                raise CommandError('%s returned %d' % (
+                    path, response.status_code
+                ))
+            return elapsed
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(fetch(path) for path in paths))
+        return summarize('asgi', latencies, time.perf_counter() - started)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        routes = self.get_paths(options['requests'])
+        sync_paths = []
+        async_paths = []
+        for sync_name, async_name, pk in routes:
+            args = [pk] if pk is not None else []
+            sync_paths.append(reverse(sync_name, args=args))
+            async_paths.append(reverse(async_name, args=args))
+
+        report = [
+            self.run_sync(sync_paths, options['concurrency']),
+            asyncio.run(
+                self.run_async(async_paths, options['concurrency'])
+            ),
+        ]
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        for row in report:
+            self.stdout.write(
+                '{mode}: {requests} requests in {seconds}s, '
+                '{requests_per_second} req/s, p50 {p50_ms} ms, '
+                'p95 {p95_ms} ms'.format(**row)
+            )
@@ -0,0 +1,74 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.utils.encoders import JSONEncoder
+
+from core.models import Product
+
+from product.compiled_serializers import compile_serializer
+from product.serializers import ProductListSerializer
+
+
+def measure(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return result, round(statistics.median(timings) * 1000, 2)
+
+
+class Command(BaseCommand):
+    """Django command to compare ModelSerializer with its compiled form"""
+    help = (
+        'Serialize the newest products with ProductListSerializer on model '
+        'instances and with the compiled serializer on values() rows, and '
+        'report the median time of each, queries included.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        rows, repeat = options['rows'], options['repeat']
+        queryset = Product.objects.order_by('-created_at', '-id')
+        context = {'request': Request(
+            APIRequestFactory().get('/', HTTP_HOST='localhost')
+        )}
+        compiled = compile_serializer(ProductListSerializer)
+
+        def model_serializer():
+            products = list(queryset.with_relations()[:rows])
+            return ProductListSerializer(
+                products, many=True, context=context
+            ).data
+
+        def compiled_serializer():
+            return compiled.serialize(
+                compiled.values(queryset)[:rows], context
+            )
+
+        expected, model_ms = measure(model_serializer, repeat)
+        result, compiled_ms = measure(compiled_serializer, repeat)
+        if not expected:
+            raise CommandError('There are no products to serialize')
+
+        def dump(data):
+            return json.dumps(data, cls=JSONEncoder, sort_keys=True)
+
+        if dump(expected) != dump(result):
+            raise CommandError('The compiled serializer output differs')
+
+        self.stdout.write('%d rows, median of %d runs' % (
+            len(result), repeat
+        ))
+        self.stdout.write('ModelSerializer: %s ms' % model_ms)
+        self.stdout.write('Compiled: %s ms (%.1fx)' % (
+            compiled_ms, model_ms / compiled_ms if compiled_ms else 0
+        ))
@@ -0,0 +1,89 @@
+import csv
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.row_files import batched
+from product import intake
+from product.serializers import ProductIntakeSerializer
+
+
+class Command(BaseCommand):
+    """Django command to register products from a JSON lines or CSV file"""
+    help = 'Import products in batches from a JSON lines or CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'),
+            help='Input format, guessed from the file extension by default',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--seller', help='Email of the seller of rows without a seller'
+        )
+
+    def get_seller(self, email):
+        if not email:
+            return None
+        try:
+            return get_user_model().objects.get(email=email)
+        except get_user_model().DoesNotExist:
+            raise CommandError('Unknown seller "%s"' % email)
+
+    def import_batches(self, rows, options, seller):
+        """Import the rows batch by batch, yielding (created, failed)"""
+        offset = 0
+        started = time.monotonic()
+        for batch in batched(rows, options['batch_size']):
+            created = failed = 0
+            serializer = ProductIntakeSerializer(data=batch, many=True)
+            try:
+                if not serializer.is_valid():
+                    raise intake.IntakeError({
+                        index: errors
+                        for index, errors in enumerate(serializer.errors)
+                        if errors
+                    })
+                created = len(intake.import_batch(
+                    serializer.validated_data, seller=seller
+                ))
+            except intake.IntakeError as exc:
+                failed = len(batch)
+                for index, errors in sorted(exc.errors.items()):
+                    self.stderr.write(
+                        'Row %d: %s' % (offset + index + 1, errors)
+                    )
+            offset += len(batch)
+
+            elapsed = time.monotonic() - started
+            self.stdout.write('%d rows processed, %.0f rows/sec' % (
+                offset, offset / elapsed if elapsed else offset
+            ))
+            yield created, failed
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.lower().endswith('.csv') else 'jsonl'
+        )
+        seller = self.get_seller(options['seller'])
+
+        with open(path, newline='', encoding='utf-8') as stream:
+            rows = intake.read_rows(stream, file_format)
+            try:
+                batches = list(self.import_batches(rows, options, seller))
+            except (ValueError, csv.Error) as exc:
+                raise CommandError('Invalid input: %s' % exc)
+
+        created = sum(batch_created for batch_created, _ in batches)
+        failed = sum(batch_failed for _, batch_failed in batches)
+        message = 'Imported %d products' % created
+        if failed:
+            self.stdout.write(self.style.WARNING(
+                '%s, %d rows in rejected batches' % (message, failed)
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
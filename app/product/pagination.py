@@ -0,0 +1,157 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Paginate by the (ordering field, id) key instead of OFFSET so that
+    deep pages cost the same as the first one.
+
+    Views may set ``keyset_orderings`` to the orderings clients can pick
+    with ``?ordering=``; the first one is the default.  Every ordering
+    needs a matching (field, id) index.  Rows where a nullable field is
+    NULL are listed last, by id."""
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    default_orderings = ('-created_at',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, view)
+        field_name = self.ordering.lstrip('-')
+        descending = self.ordering.startswith('-')
+        self.field_name = field_name
+        self.field = self.get_ordering_field(queryset, field_name)
+        sign = '-' if descending else ''
+
+        # Rows without a value come last, ordered by id.  They are read
+        # with a query of their own once the rows with a value run out,
+        # so both parts stay index range scans.
+        position = self.decode_cursor(request)
+        limit = self.page_size + 1
+        results = []
+        if position is None or position[0] is not None:
+            valued = queryset.order_by(sign + field_name, sign + 'id')
+            if self.field.null:
+                valued = valued.filter(**{field_name + '__isnull': False})
+            if position is not None:
+                valued = self.filter_after(valued, descending, *position)
+            results = list(valued[:limit])
+        if self.field.null and len(results) < limit:
+            nulls = queryset.filter(
+                **{field_name + '__isnull': True}
+            ).order_by(sign + 'id')
+            if position is not None and position[0] is None:
+                lookup = 'id__lt' if descending else 'id__gt'
+                nulls = nulls.filter(**{lookup: position[1]})
+            results.extend(nulls[:limit - len(results)])
+
+        self.has_next = len(results) > self.page_size
+        results = results[:self.page_size]
+        self.next_position = None
+        if self.has_next:
+            self.next_position = self.get_position(results[-1])
+        return results
+
+    def filter_after(self, queryset, descending, value, pk):
+        """Return the rows with a value after the (value, id) position"""
+        field_name = self.field_name
+        # The plain bound on the field keeps the index range scan tight,
+        # the OR only breaks ties between rows of equal value.
+        if descending:
+            queryset = queryset.filter(**{field_name + '__lte': value})
+            return queryset.filter(
+                Q(**{field_name + '__lt': value}) | Q(id__lt=pk)
+            )
+        queryset = queryset.filter(**{field_name + '__gte': value})
+        return queryset.filter(
+            Q(**{field_name + '__gt': value}) | Q(id__gt=pk)
+        )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_ordering(self, request, view):
+        orderings = getattr(view, 'keyset_orderings', self.default_orderings)
+        ordering = request.query_params.get(self.ordering_query_param)
+        if ordering in orderings:
+            return ordering
+        return orderings[0]
+
+    def get_ordering_field(self, queryset, field_name):
+        """Return the model field or annotation output field ordered by"""
+        annotation = queryset.query.annotations.get(field_name)
+        if annotation is not None:
+            return annotation.output_field
+        return queryset.model._meta.get_field(field_name)
+
+    def get_position(self, item):
+        """Return the (field value, id) key of a row or a values() dict"""
+        if isinstance(item, dict):
+            return item[self.field_name], item['id']
+        return getattr(item, self.field_name), item.pk
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode('ascii'))
+            value, pk = json.loads(raw.decode('utf-8'))
+            value = self.field.to_python(value)
+            pk = int(pk)
+        except (binascii.Error, UnicodeError, ValueError, TypeError,
+                ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if value is None and not self.field.null:
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk
+
+    def encode_cursor(self, position):
+        value, pk = position
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        elif value is not None:
+            value = str(value)
+        raw = json.dumps([value, pk])
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            self.encode_cursor(self.next_position),
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
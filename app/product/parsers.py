@@ -0,0 +1,33 @@
+import codecs
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from product import intake
+
+
+class IntakeParser(BaseParser):
+    """Parse a text upload into a list of intake rows"""
+    format = None
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            text = codecs.getreader(encoding)(stream)
+            return list(intake.read_rows(text, self.format))
+        except (ValueError, UnicodeError) as exc:
+            raise ParseError('%s parse error - %s' % (self.format, exc))
+
+
+class JSONLinesParser(IntakeParser):
+    """Parse one JSON object per line"""
+    media_type = 'application/x-ndjson'
+    format = 'jsonl'
+
+
+class CSVParser(IntakeParser):
+    """Parse a CSV file with a header row"""
+    media_type = 'text/csv'
+    format = 'csv'
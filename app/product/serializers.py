@@ -0,0 +1,239 @@
+from rest_framework import serializers
+
+from core import reference
+from core.models import (
+    Agreement,
+    Brand,
+    Image,
+    ImageDerivative,
+    Keyword,
+    PriceHistory,
+    Product,
+    ProductDetail,
+    ProductGrade,
+    ProductStatus,
+    SellCategory,
+    SellerReview,
+    SubCategory,
+    Tag,
+)
+
+
+class ReferenceNameField(serializers.Field):
+    """Render a foreign key to a reference table by name, read from the
+    process-local reference cache instead of a join"""
+
+    def __init__(self, model, **kwargs):
+        self.reference = reference.get_reference_cache(model)
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        try:
+            return str(self.reference.get(value))
+        except self.reference.model.DoesNotExist:
+            return None
+
+
+class BrandSerializer(serializers.ModelSerializer):
+    """Serializer for brand objects"""
+
+    class Meta:
+        model = Brand
+        fields = ('id', 'kor_name', 'eng_name')
+        read_only_fields = ('id',)
+
+
+class TagSerializer(serializers.ModelSerializer):
+    """Serializer for tag objects"""
+
+    class Meta:
+        model = Tag
+        fields = ('id', 'name')
+        read_only_fields = ('id',)
+
+
+class KeywordSerializer(serializers.ModelSerializer):
+    """Serializer for keyword objects"""
+
+    class Meta:
+        model = Keyword
+        fields = ('id', 'name')
+        read_only_fields = ('id',)
+
+
+class SubCategorySerializer(serializers.ModelSerializer):
+    """Serializer for sub category objects"""
+
+    class Meta:
+        model = SubCategory
+        fields = ('id', 'name', 'code')
+        read_only_fields = ('id',)
+
+
+class ImageDerivativeSerializer(serializers.ModelSerializer):
+    """Serializer for the resized variants of an image"""
+
+    class Meta:
+        model = ImageDerivative
+        fields = ('size', 'format', 'file', 'width', 'height')
+        read_only_fields = fields
+
+
+class ImageSerializer(serializers.ModelSerializer):
+    """Serializer for product images"""
+    derivatives = ImageDerivativeSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Image
+        fields = ('id', 'image_url', 'is_damaged', 'derivatives')
+        read_only_fields = ('id',)
+
+
+class ProductListSerializer(serializers.ModelSerializer):
+    """Serializer for the product list"""
+    brand = BrandSerializer(read_only=True)
+    product_grade = ReferenceNameField(ProductGrade, source='product_grade_id')
+    product_status = ReferenceNameField(
+        ProductStatus, source='product_status_id'
+    )
+    sell_category = ReferenceNameField(SellCategory, source='sell_category_id')
+    seller = serializers.CharField(source='user.name', default=None)
+    tags = TagSerializer(source='tag', many=True, read_only=True)
+    keywords = KeywordSerializer(source='keyword', many=True, read_only=True)
+    categories = SubCategorySerializer(
+        source='category', many=True, read_only=True
+    )
+    images = ImageSerializer(source='image_set', many=True, read_only=True)
+
+    class Meta:
+        model = Product
+        fields = (
+            'id', 'product_code', 'name', 'price', 'discount_percentage',
+            'brand', 'product_grade', 'product_status', 'sell_category',
+            'seller', 'tags', 'keywords', 'categories', 'images',
+            'created_at',
+        )
+        read_only_fields = fields
+
+
+class ProductSerializer(ProductListSerializer):
+    """Serializer for the product shown on its detail page, whose images
+    are loaded separately"""
+    images = None
+
+    class Meta(ProductListSerializer.Meta):
+        fields = tuple(
+            field for field in ProductListSerializer.Meta.fields
+            if field != 'images'
+        ) + ('memo', 'purchased_year')
+        read_only_fields = fields
+
+
+class ProductSummarySerializer(serializers.ModelSerializer):
+    """Serializer for products linked from another product"""
+    brand = BrandSerializer(read_only=True)
+
+    class Meta:
+        model = Product
+        fields = ('id', 'name', 'price', 'brand')
+        read_only_fields = fields
+
+
+class PriceHistorySerializer(serializers.ModelSerializer):
+    """Serializer for the price changes of a product"""
+
+    class Meta:
+        model = PriceHistory
+        fields = ('price', 'discounted_amount', 'is_uptodate', 'created_at')
+        read_only_fields = fields
+
+
+class SellerReviewSerializer(serializers.ModelSerializer):
+    """Serializer for the reviews of a seller"""
+
+    class Meta:
+        model = SellerReview
+        fields = ('id', 'comment', 'rating', 'created_at')
+        read_only_fields = fields
+
+
+class ProductDetailSerializer(serializers.ModelSerializer):
+    """Serializer for the details of an incoming product"""
+
+    class Meta:
+        model = ProductDetail
+        exclude = ('id', 'product')
+
+
+class AgreementSerializer(serializers.ModelSerializer):
+    """Serializer for the agreements of an incoming product"""
+
+    class Meta:
+        model = Agreement
+        exclude = ('id',)
+
+
+class ConsignmentIntakeSerializer(serializers.Serializer):
+    """Serializer for the pickup request of an incoming product"""
+    date = serializers.CharField(max_length=50, required=False, default='')
+    pickup_time = serializers.CharField(required=False, allow_null=True)
+    is_pickup = serializers.BooleanField()
+
+
+class ProductIntakeSerializer(serializers.Serializer):
+    """Serializer for one product of a bulk intake batch.
+
+    Brands are given by id, Korean or English name, reference rows by name
+    and sub categories by code; they are resolved for the whole batch at
+    once by product.intake."""
+    product_code = serializers.CharField(
+        max_length=500, required=False, default='', allow_blank=True
+    )
+    brand = serializers.CharField(max_length=50)
+    name = serializers.CharField(max_length=200)
+    purchased_year = serializers.CharField(
+        max_length=200, required=False, default='', allow_blank=True
+    )
+    purchased_where = serializers.CharField(
+        max_length=200, required=False, default='', allow_blank=True
+    )
+    purchased_price = serializers.CharField(
+        max_length=200, required=False, default='', allow_blank=True
+    )
+    wish_price = serializers.CharField(
+        max_length=200, required=False, default='', allow_blank=True
+    )
+    memo = serializers.CharField(
+        max_length=2000, required=False, default='', allow_blank=True
+    )
+    price = serializers.DecimalField(
+        max_digits=12, decimal_places=2, required=False, allow_null=True
+    )
+    sell_category = serializers.CharField(required=False, allow_null=True)
+    product_grade = serializers.CharField(required=False, allow_null=True)
+    product_status = serializers.CharField(required=False, allow_null=True)
+    seller = serializers.EmailField(required=False, allow_null=True)
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=100),
+        required=False,
+        default=list,
+    )
+    keywords = serializers.ListField(
+        child=serializers.CharField(max_length=100),
+        required=False,
+        default=list,
+    )
+    categories = serializers.ListField(
+        child=serializers.CharField(max_length=50),
+        required=False,
+        default=list,
+    )
+    images = serializers.ListField(
+        child=serializers.CharField(max_length=2000),
+        required=False,
+        default=list,
+    )
+    detail = ProductDetailSerializer(required=False)
+    agreement = AgreementSerializer(required=False)
+    consignment = ConsignmentIntakeSerializer(required=False)
@@ -0,0 +1,106 @@
+import json
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.utils.encoders import JSONEncoder
+
+from core import models
+
+from product.compiled_serializers import CompiledSerializer
+from product.serializers import ProductListSerializer
+from product.tests.test_product_api import (
+    sample_brand,
+    sample_product,
+    sample_user,
+)
+
+
+def dump(data):
+    return json.dumps(data, cls=JSONEncoder, sort_keys=True)
+
+
+class ProductMethodSerializer(serializers.ModelSerializer):
+    label = serializers.SerializerMethodField()
+
+    class Meta:
+        model = models.Product
+        fields = ('id', 'label')
+
+    def get_label(self, product):
+        return product.name
+
+
+class CompiledSerializerTests(TestCase):
+
+    def setUp(self):
+        self.user = sample_user()
+        self.brand = sample_brand()
+        self.compiled = CompiledSerializer(ProductListSerializer)
+        self.context = {'request': Request(APIRequestFactory().get('/'))}
+
+    def serialize_both(self):
+        products = models.Product.objects.with_relations().order_by('id')
+        expected = ProductListSerializer(
+            products, many=True, context=self.context
+        ).data
+        result = self.compiled.serialize(
+            self.compiled.values(products), self.context
+        )
+        return expected, result
+
+    def test_same_output_as_serializer(self):
+        """Test the compiled output equals the ModelSerializer output"""
+        product = sample_product(self.user, self.brand)
+        extra = models.Tag.objects.create(name='샤넬백')
+        models.ProductTag.objects.create(product=product, tag=extra)
+        models.ImageDerivative.objects.create(
+            image=product.image_set.get(), size='thumbnail', format='JPEG',
+            file='derivatives/1.jpg', width=240, height=240,
+        )
+        sample_product(self.user, self.brand, name='보이백')
+
+        expected, result = self.serialize_both()
+
+        self.assertEqual(dump(result), dump(expected))
+        self.assertEqual(len(result[0]['tags']), 2)
+        self.assertTrue(result[0]['images'][0]['image_url'].startswith(
+            'http://testserver/'
+        ))
+
+    def test_null_relations(self):
+        """Test missing sellers and relations serialize like the
+        serializer"""
+        models.Product.objects.create(
+            brand=self.brand,
+            name='보이백',
+            purchased_year='2019',
+            purchased_where='백화점',
+            purchased_price='7000000',
+            wish_price='6000000',
+        )
+
+        expected, result = self.serialize_both()
+
+        self.assertEqual(dump(result), dump(expected))
+        self.assertIsNone(result[0]['seller'])
+        self.assertEqual(result[0]['tags'], [])
+
+    def test_queries_per_page(self):
+        """Test a page takes one query per nested list"""
+        for number in range(5):
+            sample_product(self.user, self.brand, name='상품 %d' % number)
+        rows = list(self.compiled.values(models.Product.objects.all()))
+        # Loads the reference tables
+        self.compiled.serialize(rows, self.context)
+
+        # tags, keywords, categories, images and image derivatives
+        with self.assertNumQueries(5):
+            self.compiled.serialize(rows, self.context)
+
+    def test_method_fields_refused(self):
+        """Test fields that need the instance cannot be compiled"""
+        with self.assertRaises(ImproperlyConfigured):
+            CompiledSerializer(ProductMethodSerializer)
@@ -0,0 +1,107 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+
+from product import facets
+from product.tests.test_product_api import (
+    sample_brand,
+    sample_product,
+    sample_user,
+)
+
+
+PRODUCTS_URL = reverse('product:product-list')
+
+
+@override_settings(FACET_PRICE_BUCKETS=(100, 500))
+class ProductFacetTests(TestCase):
+    """Test the facet counts of the product list"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = sample_user()
+        self.chanel = sample_brand()
+        self.gucci = sample_brand('구찌', 'ㄱㅉ', 'GUCCI')
+        self.flap = sample_product(self.user, self.chanel, price=50)
+        self.boy = sample_product(self.user, self.chanel, price=300)
+        self.marmont = sample_product(self.user, self.gucci, price=900)
+
+    def test_list_without_facets(self):
+        """Test facets are only counted when requested"""
+        res = self.client.get(PRODUCTS_URL)
+
+        self.assertNotIn('facets', res.data)
+
+    def test_facets_counted_in_one_query(self):
+        """Test every requested facet is counted by a single query"""
+        with self.assertNumQueries(1):
+            counts = facets.count_facets({}, list(facets.FACETS))
+
+        self.assertEqual(counts['brand'], [
+            {'id': self.chanel.id, 'count': 2},
+            {'id': self.gucci.id, 'count': 1},
+        ])
+        self.assertEqual(len(counts['sub_category']), 3)
+        self.assertEqual(
+            sum(item['count'] for item in counts['main_category']), 3
+        )
+        self.assertEqual(counts['price'], [
+            {'min': None, 'max': 100, 'count': 1},
+            {'min': 100, 'max': 500, 'count': 1},
+            {'min': 500, 'max': None, 'count': 1},
+        ])
+
+    def test_facets_follow_filters(self):
+        """Test the counts and the listing use the same filters"""
+        res = self.client.get(PRODUCTS_URL, {
+            'brand': str(self.chanel.id),
+            'max_price': '400',
+            'facets': 'brand,price',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {item['id'] for item in res.data['results']},
+            {self.flap.id, self.boy.id}
+        )
+        self.assertEqual(
+            res.data['facets']['brand'],
+            [{'id': self.chanel.id, 'count': 2}]
+        )
+        self.assertNotIn('product_grade', res.data['facets'])
+
+    def test_filter_by_category(self):
+        """Test filtering by sub category does not duplicate products"""
+        sub_category = self.flap.category.get()
+        models.ProductCategory.objects.create(
+            product=self.boy, sub_category=sub_category
+        )
+
+        res = self.client.get(
+            PRODUCTS_URL, {'sub_category': str(sub_category.id)}
+        )
+
+        self.assertEqual(
+            sorted(item['id'] for item in res.data['results']),
+            [self.flap.id, self.boy.id]
+        )
+
+    def test_facets_are_cached(self):
+        """Test the counts of a filter set are served from the cache"""
+        params = {'brand': '%d,%d' % (self.gucci.id, self.chanel.id)}
+        filters = facets.parse_filters(params)
+        facets.get_facets(filters, ['brand'])
+
+        reordered = facets.parse_filters(
+            {'brand': '%d,%d' % (self.chanel.id, self.gucci.id)}
+        )
+        with self.assertNumQueries(0):
+            counts = facets.get_facets(reordered, ['brand'])
+
+        self.assertEqual(len(counts['brand']), 2)
@@ -0,0 +1,221 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+
+
+INTAKE_URL = reverse('product:product-intake')
+
+CSV_BATCH = (
+    'brand,name,price,tags,keywords,categories,images,'
+    'detail.color,consignment.is_pickup,consignment.pickup_time\n'
+    '샤넬,클래식 플랩백,5000000,명품|빈티지,플랩,B01,products/1.jpg,'
+    '블랙,true,오전\n'
+    'GUCCI,마몽 숄더백,1500000,명품,,,,,,\n'
+)
+
+
+def sample_user(email='seller@test.com', password='testpass'):
+    """Create a sample seller"""
+    return get_user_model().objects.create_user(
+        email=email,
+        password=password,
+        phone_number='01055525672',
+        name='kim',
+        gender='남성'
+    )
+
+
+class ProductIntakeTests(TestCase):
+    """Test registering products in bulk"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user()
+        self.client.force_authenticate(self.user)
+        self.chanel = models.Brand.objects.create(
+            kor_name='샤넬', kor_letters='ㅅㄴ', eng_name='CHANEL'
+        )
+        self.gucci = models.Brand.objects.create(
+            kor_name='구찌', kor_letters='ㄱㅉ', eng_name='GUCCI'
+        )
+        main_category = models.MainCategory.objects.create(
+            name='가방', code='B'
+        )
+        self.sub_category = models.SubCategory.objects.create(
+            name='숄더백', code='B01', main_category=main_category
+        )
+        models.PickupTime.objects.create(time='오전')
+        models.Tag.objects.create(name='명품')
+
+    def test_intake_requires_login(self):
+        """Test anonymous users cannot register products"""
+        res = APIClient().post(INTAKE_URL, [], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_intake_json_batch(self):
+        """Test registering products with their related rows"""
+        payload = [{
+            'brand': '샤넬',
+            'name': '클래식 플랩백',
+            'price': '5000000',
+            'tags': ['명품', '빈티지'],
+            'keywords': ['플랩'],
+            'categories': ['B01'],
+            'images': ['products/1.jpg', 'products/2.jpg'],
+            'detail': {'color': '블랙', 'size': 'M'},
+            'agreement': {
+                'agreement_1': True,
+                'agreement_2': True,
+                'agreement_3': True,
+                'agreement_4': False,
+            },
+            'consignment': {'is_pickup': True, 'pickup_time': '오전'},
+        }, {
+            'brand': str(self.gucci.id),
+            'name': '마몽 숄더백',
+            'tags': ['명품'],
+        }]
+
+        res = self.client.post(INTAKE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['created'], 2)
+        flap = models.Product.objects.get(name='클래식 플랩백')
+        self.assertEqual(flap.brand, self.chanel)
+        self.assertEqual(flap.user, self.user)
+        self.assertEqual(
+            sorted(tag.name for tag in flap.tag.all()), ['명품', '빈티지']
+        )
+        self.assertEqual(list(flap.category.all()), [self.sub_category])
+        self.assertEqual(flap.image_set.count(), 2)
+        self.assertEqual(flap.productdetail_set.get().color, '블랙')
+        self.assertFalse(flap.agreement.agreement_4)
+        self.assertEqual(flap.current_price.price, flap.price)
+        self.assertTrue(flap.current_price.is_uptodate)
+        self.assertIsNone(
+            models.Product.objects.get(name='마몽 숄더백').current_price
+        )
+        self.assertEqual(flap.consignment_set.get().pickup_time.time, '오전')
+        # existing tags are reused instead of duplicated
+        self.assertEqual(models.Tag.objects.filter(name='명품').count(), 1)
+
+    def test_intake_ignores_seller_of_users(self):
+        """Test users cannot register products for another seller"""
+        sample_user('other@test.com')
+        payload = [{
+            'brand': '샤넬', 'name': '클래식 플랩백', 'seller': 'other@test.com'
+        }]
+
+        res = self.client.post(INTAKE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        product = models.Product.objects.get(name='클래식 플랩백')
+        self.assertEqual(product.user, self.user)
+
+    def test_intake_seller_of_staff(self):
+        """Test staff can register products for another seller"""
+        other = sample_user('other@test.com')
+        self.user.is_staff = True
+        self.user.save()
+        payload = [{
+            'brand': '샤넬', 'name': '클래식 플랩백', 'seller': 'other@test.com'
+        }]
+
+        res = self.client.post(INTAKE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        product = models.Product.objects.get(name='클래식 플랩백')
+        self.assertEqual(product.user, other)
+
+    def test_intake_query_count_does_not_grow(self):
+        """Test lookups and inserts do not grow with the batch size"""
+        def batch(size):
+            return [
+                {
+                    'brand': '샤넬',
+                    'name': '상품 %d' % i,
+                    'price': '1000',
+                    'tags': ['명품'],
+                }
+                for i in range(size)
+            ]
+
+        # warm the process-local reference caches
+        self.client.post(INTAKE_URL, batch(1), format='json')
+
+        small = self.count_queries(batch(2))
+        large = self.count_queries(batch(20))
+
+        # search documents are still updated one product at a time
+        self.assertEqual(large - small, 18)
+
+    def count_queries(self, payload):
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.post(INTAKE_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return len(context.captured_queries)
+
+    def test_intake_csv_batch(self):
+        """Test registering products from a CSV upload"""
+        res = self.client.generic(
+            'POST', INTAKE_URL, CSV_BATCH.encode('utf-8'),
+            content_type='text/csv',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['created'], 2)
+        self.assertEqual(
+            models.Product.objects.get(name='마몽 숄더백').brand, self.gucci
+        )
+
+    def test_intake_rejects_whole_batch(self):
+        """Test one unknown brand rejects the batch without writing"""
+        payload = [
+            {'brand': '샤넬', 'name': '클래식 플랩백'},
+            {'brand': '에르메스', 'name': '버킨백'},
+        ]
+
+        res = self.client.post(INTAKE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('brand', res.data['errors'][1])
+        self.assertFalse(models.Product.objects.exists())
+
+    def test_import_products_command(self):
+        """Test importing products from a JSON lines file"""
+        rows = [
+            {'brand': 'CHANEL', 'name': '클래식 플랩백',
+             'seller': self.user.email},
+            {'brand': '구찌', 'name': '마몽 숄더백'},
+        ]
+        with tempfile.NamedTemporaryFile(
+            'w', suffix='.jsonl', delete=False, encoding='utf-8'
+        ) as stream:
+            for row in rows:
+                stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+        self.addCleanup(os.remove, stream.name)
+
+        out = StringIO()
+        call_command(
+            'import_products', stream.name,
+            '--seller', self.user.email, stdout=out,
+        )
+
+        self.assertIn('Imported 2 products', out.getvalue())
+        self.assertEqual(
+            models.Product.objects.filter(user=self.user).count(), 2
+        )
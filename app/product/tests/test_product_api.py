@@ -0,0 +1,273 @@
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from PIL import Image as PILImage
+
+from core import models
+
+
+PRODUCTS_URL = reverse('product:product-list')
+SEARCH_URL = reverse('product:product-search')
+AUTOCOMPLETE_URL = reverse('product:brand-autocomplete')
+
+
+def sample_user(email='seller@test.com', password='testpass'):
+    """Create a sample seller"""
+    return get_user_model().objects.create_user(
+        email=email,
+        password=password,
+        phone_number='01055525672',
+        name='kim',
+        gender='남성'
+    )
+
+
+def sample_brand(kor_name='샤넬', kor_letters='ㅅㄴ', eng_name='CHANEL'):
+    return models.Brand.objects.create(
+        kor_name=kor_name, kor_letters=kor_letters, eng_name=eng_name
+    )
+
+
+def sample_product(user, brand, **params):
+    """Create a sample product with tags, keywords, category and image"""
+    defaults = {
+        'name': '클래식 플랩백',
+        'purchased_year': '2019',
+        'purchased_where': '백화점',
+        'purchased_price': '7000000',
+        'wish_price': '6000000',
+        'product_grade': models.ProductGrade.objects.create(name='S'),
+        'product_status': models.ProductStatus.objects.create(name='판매중'),
+        'sell_category': models.SellCategory.objects.create(name='가방'),
+    }
+    defaults.update(params)
+    product = models.Product.objects.create(user=user, brand=brand, **defaults)
+
+    tag = models.Tag.objects.create(name='명품')
+    models.ProductTag.objects.create(product=product, tag=tag)
+    keyword = models.Keyword.objects.create(name='플랩')
+    models.ProductKeyword.objects.create(product=product, keyword=keyword)
+    main_category = models.MainCategory.objects.create(name='가방', code='B')
+    sub_category = models.SubCategory.objects.create(
+        name='숄더백', code='B01', main_category=main_category
+    )
+    models.ProductCategory.objects.create(
+        product=product, sub_category=sub_category
+    )
+    models.Image.objects.create(
+        product=product, image_url='products/1.jpg', is_damaged=False
+    )
+    return product
+
+
+class ProductListApiTests(TestCase):
+    """Test the public product list API"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user()
+        self.brand = sample_brand()
+
+    def test_list_products(self):
+        """Test retrieving products with their relations"""
+        product = sample_product(self.user, self.brand)
+
+        res = self.client.get(PRODUCTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNone(res.data['next'])
+        self.assertEqual(len(res.data['results']), 1)
+        item = res.data['results'][0]
+        self.assertEqual(item['id'], product.id)
+        self.assertEqual(item['brand']['eng_name'], self.brand.eng_name)
+        self.assertEqual(item['seller'], self.user.name)
+        self.assertEqual(item['tags'][0]['name'], '명품')
+        self.assertEqual(item['keywords'][0]['name'], '플랩')
+        self.assertEqual(item['categories'][0]['code'], 'B01')
+        self.assertEqual(len(item['images']), 1)
+
+    def test_list_query_count_is_constant(self):
+        """Test the number of queries does not grow with the page size"""
+        for i in range(10):
+            sample_product(self.user, self.brand, name='상품 %d' % i)
+
+        # warm the process-local reference caches
+        self.client.get(PRODUCTS_URL)
+
+        # one query for the page and one per prefetched relation
+        with self.assertNumQueries(6):
+            res = self.client.get(PRODUCTS_URL, {'page_size': 10})
+
+        self.assertEqual(len(res.data['results']), 10)
+
+    def test_keyset_pagination(self):
+        """Test walking pages with the cursor returns every product once"""
+        products = [
+            sample_product(self.user, self.brand, name='상품 %d' % i)
+            for i in range(5)
+        ]
+
+        seen = []
+        url, params = PRODUCTS_URL, {'page_size': 2}
+        while url:
+            res = self.client.get(url, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            seen.extend(item['id'] for item in res.data['results'])
+            url, params = res.data['next'], None
+
+        expected = [p.id for p in sorted(
+            products, key=lambda p: (p.created_at, p.id), reverse=True
+        )]
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor(self):
+        """Test a malformed cursor returns 404"""
+        res = self.client.get(PRODUCTS_URL, {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_filter_products_by_price(self):
+        """Test returning products within a price range"""
+        cheap = sample_product(self.user, self.brand, price=100)
+        middle = sample_product(self.user, self.brand, price=500)
+        sample_product(self.user, self.brand, price=900)
+
+        res = self.client.get(
+            PRODUCTS_URL, {'min_price': '100', 'max_price': '500'}
+        )
+
+        ids = {item['id'] for item in res.data['results']}
+        self.assertEqual(ids, {cheap.id, middle.id})
+
+    def test_order_products_by_price(self):
+        """Test paging through products ordered by price, products
+        without a price last"""
+        prices = [700, 100, 300, 300, 500]
+        for price in prices:
+            sample_product(self.user, self.brand, price=price)
+        unpriced = [
+            sample_product(self.user, self.brand).id for _ in range(3)
+        ]
+
+        for ordering, expected_prices, expected_unpriced in (
+            ('price', sorted(prices), unpriced),
+            ('-price', sorted(prices, reverse=True), unpriced[::-1]),
+        ):
+            seen = []
+            url = PRODUCTS_URL
+            params = {'ordering': ordering, 'page_size': 2}
+            while url:
+                res = self.client.get(url, params)
+                seen.extend(res.data['results'])
+                url, params = res.data['next'], None
+
+            self.assertEqual(
+                [int(float(item['price'])) for item in seen[:5]],
+                expected_prices
+            )
+            self.assertEqual(
+                [item['id'] for item in seen[5:]], expected_unpriced
+            )
+
+
+class ProductSearchApiTests(TestCase):
+    """Test the public product search API"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user()
+
+    def test_search_requires_query(self):
+        """Test searching without a query is rejected"""
+        res = self.client.get(SEARCH_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_products(self):
+        """Test searching returns only the matching products"""
+        chanel = sample_product(self.user, sample_brand())
+        sample_product(
+            self.user, sample_brand('구찌', 'ㄱㅉ', 'GUCCI'), name='마몽 숄더백'
+        )
+
+        res = self.client.get(SEARCH_URL, {'q': 'ㅅㄴ'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['id'] for item in res.data['results']], [chanel.id]
+        )
+
+
+class BrandAutocompleteApiTests(TransactionTestCase):
+    """Test the brand autocomplete API"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_autocomplete_by_sell_category(self):
+        """Test suggestions can be filtered by sell category"""
+        bags = models.SellCategory.objects.create(name='가방')
+        chanel = sample_brand()
+        models.BrandCategory.objects.create(brand=chanel, category=bags)
+        sample_brand('생로랑', 'ㅅㄹㄹ', 'SAINT LAURENT')
+
+        res = self.client.get(
+            AUTOCOMPLETE_URL, {'q': 'ㅅ', 'sell_category': bags.id}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([brand['id'] for brand in res.data], [chanel.id])
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ProductImageUploadApiTests(TestCase):
+    """Test uploading product images"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user()
+        self.client.force_authenticate(self.user)
+        self.product = sample_product(self.user, sample_brand())
+
+    def upload(self, product):
+        with tempfile.TemporaryFile() as stream:
+            PILImage.new('RGB', (100, 100)).save(stream, 'JPEG')
+            stream.seek(0)
+            upload = SimpleUploadedFile(
+                'photo.jpg', stream.read(), 'image/jpeg'
+            )
+        url = reverse('product:product-image-upload', args=[product.id])
+        return self.client.post(
+            url, {'image_url': upload, 'is_damaged': False},
+            format='multipart',
+        )
+
+    @patch('core.images.schedule_derivatives')
+    def test_upload_image(self, schedule):
+        """Test the seller can upload an image and variants are scheduled"""
+        res = self.upload(self.product)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        image = models.Image.objects.get(pk=res.data['id'])
+        self.assertEqual(image.product, self.product)
+        schedule.assert_called_once_with(image)
+
+    @patch('core.images.schedule_derivatives')
+    def test_upload_image_of_other_seller(self, schedule):
+        """Test uploading to another seller's product is forbidden"""
+        other = sample_product(
+            sample_user('other@test.com'), sample_brand('구찌', 'ㄱㅉ', 'GUCCI')
+        )
+
+        res = self.upload(other)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        schedule.assert_not_called()
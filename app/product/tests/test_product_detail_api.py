@@ -0,0 +1,261 @@
+from asgiref.sync import async_to_sync
+
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import async_orm, models
+
+from product.detail_cache import DetailCache, detail_cache
+from product.tests.test_product_api import (
+    sample_brand,
+    sample_product,
+    sample_user,
+)
+
+
+ASYNC_PRODUCTS_URL = reverse('product-async:product-list')
+
+
+def detail_url(product_id):
+    """Return the product detail URL"""
+    return reverse('product:product-detail', args=[product_id])
+
+
+def async_detail_url(product_id):
+    """Return the async product detail URL"""
+    return reverse('product-async:product-detail', args=[product_id])
+
+
+def sample_detail_page(user, brand):
+    """Create a product with every section of the detail page"""
+    product = sample_product(user, brand)
+    related = models.Product.objects.create(
+        user=user, brand=brand, name='보이백'
+    )
+    models.RelatedProduct.objects.create(
+        from_product=product, to_product=related
+    )
+    models.ProductDetail.objects.create(product=product, color='블랙')
+    models.SellerReview.objects.create(
+        product=related, comment='좋아요', rating='4.5'
+    )
+    models.PriceHistory.objects.record_price(product, 5000000)
+    return product, related
+
+
+class ProductDetailApiTests(TestCase):
+    """Test the product detail API"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user()
+        self.brand = sample_brand()
+
+    def test_retrieve_product_detail(self):
+        """Test retrieving every section of a product"""
+        product, related = sample_detail_page(self.user, self.brand)
+
+        res = self.client.get(detail_url(product.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['product']['id'], product.id)
+        self.assertEqual(res.data['details'][0]['color'], '블랙')
+        self.assertEqual(len(res.data['images']), 1)
+        self.assertEqual(len(res.data['price_history']), 1)
+        self.assertEqual(
+            [item['id'] for item in res.data['related_products']],
+            [related.id]
+        )
+        self.assertEqual(res.data['seller_reviews'][0]['comment'], '좋아요')
+
+    def test_retrieve_missing_product(self):
+        """Test a missing product returns 404"""
+        res = self.client.get(detail_url(0))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class AsyncProductApiTests(TransactionTestCase):
+    """Test the async browse endpoints.
+
+    The queries run in the ORM thread pool on their own connections, so
+    the data has to be committed."""
+
+    def setUp(self):
+        self.client = AsyncClient()
+        self.user = sample_user()
+        self.brand = sample_brand()
+
+    def tearDown(self):
+        # Let the test database be dropped at the end of the run
+        async_orm.shutdown()
+
+    def test_async_detail_matches_sync_detail(self):
+        """Test both detail endpoints return the same page"""
+        product, _ = sample_detail_page(self.user, self.brand)
+
+        res = async_to_sync(self.client.get)(async_detail_url(product.id))
+        sync_res = APIClient().get(detail_url(product.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), sync_res.json())
+
+    def test_async_detail_missing_product(self):
+        """Test a missing product returns 404 from the async endpoint"""
+        res = async_to_sync(self.client.get)(async_detail_url(0))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_async_list_products(self):
+        """Test listing products from the async endpoint"""
+        product = sample_product(self.user, self.brand)
+
+        res = async_to_sync(self.client.get)(ASYNC_PRODUCTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['id'] for item in res.json()['results']], [product.id]
+        )
+
+    def test_async_list_invalid_cursor(self):
+        """Test an invalid cursor returns 404 from the async endpoint"""
+        res = async_to_sync(self.client.get)(
+            ASYNC_PRODUCTS_URL, {'cursor': 'invalid'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ProductDetailCacheTests(TransactionTestCase):
+    """Test conditional requests and the cache of the detail page.
+
+    Versions change once a transaction commits, so the data has to be
+    committed."""
+
+    def setUp(self):
+        cache.clear()
+        detail_cache.clear()
+        self.client = APIClient()
+        self.user = sample_user()
+        self.brand = sample_brand()
+        self.product, _ = sample_detail_page(self.user, self.brand)
+
+    def tearDown(self):
+        async_orm.shutdown()
+
+    def test_validators_sent(self):
+        """Test the page has an ETag and a modification date"""
+        res = self.client.get(detail_url(self.product.id))
+
+        self.assertTrue(res.has_header('ETag'))
+        self.assertTrue(res.has_header('Last-Modified'))
+        self.assertIn('no-cache', res['Cache-Control'])
+
+    def test_not_modified(self):
+        """Test an unchanged page is answered with 304 and no query"""
+        res = self.client.get(detail_url(self.product.id))
+
+        with self.assertNumQueries(0):
+            res = self.client.get(
+                detail_url(self.product.id), HTTP_IF_NONE_MATCH=res['ETag']
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_repeat_view_cached(self):
+        """Test an unchanged page is served without a query"""
+        first = self.client.get(detail_url(self.product.id))
+
+        with self.assertNumQueries(0):
+            res = self.client.get(detail_url(self.product.id))
+
+        self.assertEqual(res.json(), first.json())
+
+    def test_price_change_changes_page(self):
+        """Test a new price changes the ETag and the cached page"""
+        first = self.client.get(detail_url(self.product.id))
+
+        models.PriceHistory.objects.record_price(self.product, 4500000)
+        res = self.client.get(
+            detail_url(self.product.id), HTTP_IF_NONE_MATCH=first['ETag']
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], first['ETag'])
+        self.assertEqual(len(res.data['price_history']), 2)
+
+    def test_brand_change_changes_page(self):
+        """Test renaming a brand changes the page of its products"""
+        first = self.client.get(detail_url(self.product.id))
+
+        self.brand.kor_name = '루이비통'
+        self.brand.save()
+        res = self.client.get(detail_url(self.product.id))
+
+        self.assertNotEqual(res['ETag'], first['ETag'])
+        self.assertEqual(res.data['product']['brand']['kor_name'], '루이비통')
+
+    def test_new_tag_keeps_page(self):
+        """Test creating a tag no page shows yet keeps every page"""
+        first = self.client.get(detail_url(self.product.id))
+
+        models.Tag.objects.create(name='신상')
+        res = self.client.get(detail_url(self.product.id))
+
+        self.assertEqual(res['ETag'], first['ETag'])
+
+    def test_seller_rename_changes_page(self):
+        """Test renaming the seller changes the page of their products"""
+        first = self.client.get(detail_url(self.product.id))
+
+        self.user.name = 'new seller'
+        self.user.save()
+        res = self.client.get(detail_url(self.product.id))
+
+        self.assertNotEqual(res['ETag'], first['ETag'])
+
+    def test_other_user_change_keeps_page(self):
+        """Test saving a seller without renaming them keeps the page"""
+        first = self.client.get(detail_url(self.product.id))
+
+        self.user.set_password('newpass')
+        self.user.save()
+        res = self.client.get(detail_url(self.product.id))
+
+        self.assertEqual(res['ETag'], first['ETag'])
+
+    def test_async_not_modified(self):
+        """Test the async endpoint answers 304 with the same ETag"""
+        res = self.client.get(detail_url(self.product.id))
+
+        async_res = async_to_sync(AsyncClient().get)(
+            async_detail_url(self.product.id),
+            headers={'If-None-Match': res['ETag']},
+        )
+
+        self.assertEqual(async_res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_missing_product_stores_no_version(self):
+        """Test unknown ids get a 404 without a version in the cache"""
+        res = self.client.get(detail_url(self.product.id + 1000))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertIsNone(
+            cache.get('version:product_detail:%d' % (self.product.id + 1000))
+        )
+
+    def test_least_recently_used_evicted(self):
+        """Test the least recently used page is dropped first"""
+        pages = DetailCache(size=2)
+        pages.set(1, (1, 1), 'first')
+        pages.set(2, (1, 1), 'second')
+        pages.get(1, (1, 1))
+        pages.set(3, (1, 1), 'third')
+
+        self.assertEqual(pages.get(1, (1, 1)), 'first')
+        self.assertIsNone(pages.get(2, (1, 1)))
+        self.assertIsNone(pages.get(1, (1, 2)))
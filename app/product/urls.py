@@ -0,0 +1,25 @@
+from django.urls import path
+
+from product import views
+
+
+app_name = 'product'
+
+urlpatterns = [
+    path('', views.ProductListView.as_view(), name='product-list'),
+    path(
+        '<int:pk>/', views.ProductDetailView.as_view(), name='product-detail'
+    ),
+    path(
+        '<int:pk>/images/',
+        views.ProductImageUploadView.as_view(),
+        name='product-image-upload',
+    ),
+    path('intake/', views.ProductIntakeView.as_view(), name='product-intake'),
+    path('search/', views.ProductSearchView.as_view(), name='product-search'),
+    path(
+        'brands/autocomplete/',
+        views.BrandAutocompleteView.as_view(),
+        name='brand-autocomplete',
+    ),
+]
@@ -0,0 +1,191 @@
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import (
+    NotFound,
+    PermissionDenied,
+    ValidationError,
+)
+from rest_framework.parsers import JSONParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core import images, product_versions, search
+from core.autocomplete import autocomplete_brands
+from core.models import Product
+
+from product import detail, detail_cache, facets, intake, serializers
+from product.compiled_serializers import compile_serializer
+from product.pagination import KeysetPagination
+from product.parsers import CSVParser, JSONLinesParser
+
+
+def _params_to_int(value, default=None):
+    """Convert a query string parameter to an integer"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class CompiledListMixin:
+    """List with the compiled form of the serializer class, which builds
+    the page from values() rows instead of model instances"""
+
+    def get_keyset_fields(self):
+        """Return the fields the paginator reads from the rows"""
+        orderings = getattr(self, 'keyset_orderings', ())
+        return [ordering.lstrip('-') for ordering in orderings]
+
+    def list(self, request, *args, **kwargs):
+        compiled = compile_serializer(self.get_serializer_class())
+        queryset = compiled.values(
+            self.filter_queryset(self.get_queryset()),
+            extra=self.get_keyset_fields(),
+        )
+        page = self.paginate_queryset(queryset)
+        data = compiled.serialize(
+            queryset if page is None else page,
+            context=self.get_serializer_context(),
+        )
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+
+class ProductListView(CompiledListMixin, generics.ListAPIView):
+    """List products newest first, paginated by keyset.
+
+    Filters by ids (comma separated) and price range; ``?facets=`` adds
+    the counts of the requested facets of the filtered products."""
+    serializer_class = serializers.ProductListSerializer
+    pagination_class = KeysetPagination
+    keyset_orderings = ('-created_at', 'price', '-price')
+
+    def get_filters(self):
+        return facets.parse_filters(self.request.query_params)
+
+    def get_queryset(self):
+        """Return the filtered products"""
+        return facets.filter_products(
+            Product.objects.all(), self.get_filters()
+        )
+
+    def get_facets(self):
+        """Return the counts of the requested facets, if any"""
+        requested = facets.parse_facets(
+            self.request.query_params.get('facets')
+        )
+        if not requested:
+            return None
+        return facets.get_facets(self.get_filters(), requested)
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        counts = self.get_facets()
+        if counts is not None:
+            response.data['facets'] = counts
+        return response
+
+
+class ProductDetailView(APIView):
+    """Return a product with its details, images, price history, related
+    products and seller reviews.
+
+    Answers 304 when the client has the current version of the page and
+    serves unchanged pages from the in-process cache."""
+
+    def get(self, request, pk, format=None):
+        try:
+            versions = product_versions.get_versions(pk)
+            response = detail_cache.not_modified(request, versions)
+            if response is not None:
+                return response
+            page = detail_cache.get_page(
+                pk, versions, detail.load_detail_page
+            )
+        except Product.DoesNotExist:
+            raise NotFound()
+        return detail_cache.set_validators(Response(page), versions)
+
+
+class ProductSearchView(CompiledListMixin, generics.ListAPIView):
+    """Search products by name, brand, tags, keywords, memo or chosung"""
+    serializer_class = serializers.ProductListSerializer
+    pagination_class = KeysetPagination
+    keyset_orderings = ('-rank',)
+
+    def get_queryset(self):
+        """Return the matching products, best match first"""
+        query = self.request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'This field is required.'})
+        return search.search_products(Product.objects.all(), query)
+
+
+class BrandAutocompleteView(APIView):
+    """Suggest brands by prefix of their Korean, chosung or English name"""
+    max_limit = 50
+
+    def get(self, request, format=None):
+        limit = _params_to_int(request.query_params.get('limit'), 10)
+        brands = autocomplete_brands(
+            request.query_params.get('q', ''),
+            sell_category=_params_to_int(
+                request.query_params.get('sell_category')
+            ),
+            limit=max(1, min(limit, self.max_limit)),
+        )
+        return Response(brands)
+
+
+class ProductIntakeView(APIView):
+    """Register a batch of products given as JSON, JSON lines or CSV"""
+    permission_classes = (permissions.IsAuthenticated,)
+    parser_classes = (JSONParser, JSONLinesParser, CSVParser)
+    max_batch_size = 1000
+
+    def post(self, request, format=None):
+        rows = request.data
+        if isinstance(rows, dict):
+            rows = rows.get('products', [])
+        if not isinstance(rows, list) or not rows:
+            raise ValidationError({'products': 'Expected a list of products.'})
+        if len(rows) > self.max_batch_size:
+            raise ValidationError({
+                'products': 'Batches are limited to %d products.'
+                % self.max_batch_size
+            })
+
+        serializer = serializers.ProductIntakeSerializer(data=rows, many=True)
+        serializer.is_valid(raise_exception=True)
+        try:
+            # Only staff may register products for other sellers
+            products = intake.import_batch(
+                serializer.validated_data,
+                seller=request.user,
+                seller_column=request.user.is_staff,
+            )
+        except intake.IntakeError as exc:
+            return Response(
+                {'errors': exc.errors}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            {'created': len(products), 'ids': [p.pk for p in products]},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class ProductImageUploadView(generics.CreateAPIView):
+    """Upload an image of a product and render its derivatives"""
+    serializer_class = serializers.ImageSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def perform_create(self, serializer):
+        """Attach the image to the product and schedule its variants"""
+        product = get_object_or_404(Product, pk=self.kwargs['pk'])
+        user = self.request.user
+        if product.user_id != user.pk and not user.is_staff:
+            raise PermissionDenied()
+        image = serializer.save(product=product)
+        images.schedule_derivatives(image)
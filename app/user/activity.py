@@ -0,0 +1,165 @@
+"""Write-behind recording of when users were last seen.
+
+Authenticated requests and logins only note the time in a per-process
+buffer.  A background thread writes the buffer every
+LAST_SEEN_FLUSH_INTERVAL seconds with one UPDATE ... FROM (VALUES ...)
+statement per LAST_SEEN_BATCH_SIZE users, and the buffer is flushed once
+more when the process exits.  A timestamp never moves backwards, so
+workers flushing out of order are harmless, and User.save leaves the
+timestamps alone so saving a loaded user does not move them back either.
+
+Timestamps still in the buffer are lost if the process is killed, which
+is acceptable for activity tracking.
+"""
+import atexit
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Case, DateTimeField, Q, Value, When
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+
+def write_last_seen(seen, batch_size=1000):
+    """Write a {user_id: timestamp} mapping, never moving a user back"""
+    items = sorted(seen.items())
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        if connection.vendor == 'postgresql':
+            _write_values(batch)
+        else:
+            _write_case(batch)
+
+
+def _write_values(batch):
+    User = get_user_model()
+    table = connection.ops.quote_name(User._meta.db_table)
+    assignments = ', '.join(
+        '%s = v.seen' % connection.ops.quote_name(field)
+        for field in User.SEEN_FIELDS
+    )
+    values = ', '.join(['(%s, %s::timestamptz)'] * len(batch))
+    sql = (
+        'UPDATE {table} AS u SET {assignments} '
+        'FROM (VALUES {values}) AS v (id, seen) '
+        'WHERE u.id = v.id '
+        'AND (u.recent_login IS NULL OR u.recent_login < v.seen)'
+    ).format(table=table, assignments=assignments, values=values)
+    params = [value for row in batch for value in row]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def _write_case(batch):
+    User = get_user_model()
+    seen = Case(
+        *(When(pk=pk, then=Value(when)) for pk, when in batch),
+        output_field=DateTimeField(),
+    )
+    newer = Q()
+    for pk, when in batch:
+        newer |= Q(pk=pk) & (
+            Q(recent_login__isnull=True) | Q(recent_login__lt=when)
+        )
+    User.objects.filter(newer).update(
+        **{field: seen for field in User.SEEN_FIELDS}
+    )
+
+
+class ActivityRecorder:
+    """Buffer last seen timestamps and write them behind"""
+
+    def __init__(self, flush_interval=None, batch_size=None):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._seen = {}
+        self._pid = None
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def get_flush_interval(self):
+        if self.flush_interval is not None:
+            return self.flush_interval
+        return settings.LAST_SEEN_FLUSH_INTERVAL
+
+    def get_batch_size(self):
+        if self.batch_size is not None:
+            return self.batch_size
+        return settings.LAST_SEEN_BATCH_SIZE
+
+    def record(self, user_id, when=None):
+        """Note that a user was seen"""
+        when = when or timezone.now()
+        with self._lock:
+            self._check_process()
+            previous = self._seen.get(user_id)
+            if previous is None or previous < when:
+                self._seen[user_id] = when
+            self._start()
+
+    def pending(self):
+        with self._lock:
+            return dict(self._seen)
+
+    def flush(self):
+        """Write the buffered timestamps, returning how many were written"""
+        with self._lock:
+            seen, self._seen = self._seen, {}
+        if not seen:
+            return 0
+        try:
+            write_last_seen(seen, self.get_batch_size())
+        except Exception:
+            logger.exception('Could not write last seen timestamps')
+            with self._lock:
+                # Keep them for the next flush unless newer ones arrived
+                for user_id, when in seen.items():
+                    if self._seen.get(user_id, when) <= when:
+                        self._seen[user_id] = when
+            return 0
+        return len(seen)
+
+    def stop(self):
+        """Stop the flush thread and write what is left"""
+        self._stopped.set()
+        self.flush()
+
+    def _check_process(self):
+        # A forked worker inherits the buffer and a dead thread
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._seen = {}
+            self._thread = None
+            self._stopped = threading.Event()
+
+    def _start(self):
+        if self._thread is not None or not self.get_flush_interval():
+            return
+        self._thread = threading.Thread(
+            target=self._run, name='last-seen', daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def _run(self):
+        while not self._stopped.wait(self.get_flush_interval()):
+            try:
+                self.flush()
+            finally:
+                # The thread owns its connection, nothing else closes it
+                connection.close()
+
+
+recorder = ActivityRecorder()
+
+
+def record_activity(user_id, when=None):
+    """Note that a user was seen, to be written behind"""
+    recorder.record(user_id, when)
@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+
+from user import lockout
+
+
+class LockoutModelBackend(ModelBackend):
+    """Authenticate by email and password, refusing locked accounts and
+    throttled emails or client addresses.
+
+    Refusals raise PermissionDenied so no other backend is tried."""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        User = get_user_model()
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        address = lockout.get_client_address(request)
+        # Refused before the user is loaded or the password hashed, which
+        # keeps an attack cheap to turn away
+        if lockout.is_throttled(username, address):
+            raise PermissionDenied
+
+        try:
+            user = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            # Hash anyway so unknown emails take as long as known ones
+            User().set_password(password)
+            lockout.record_failure(username, address)
+            return None
+
+        if lockout.is_locked(user):
+            raise PermissionDenied
+        if not user.check_password(password):
+            if lockout.record_failure(username, address, user=user):
+                raise PermissionDenied
+            return None
+        if not self.user_can_authenticate(user):
+            return None
+
+        lockout.record_success(username)
+        return user
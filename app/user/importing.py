@@ -0,0 +1,146 @@
+"""Bulk import of users from a legacy member base.
+
+Hashing a password with the default hasher is deliberately slow and CPU
+bound, so plain text passwords are hashed in a process pool while already
+hashed legacy passwords are stored as they are and upgraded by Django on
+the user's next login.  Users are inserted with one bulk_create per batch;
+emails that already exist are skipped before any hashing is done, and a
+concurrent insert of the same email is ignored by the database.
+"""
+import django
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+
+from core import reference
+
+
+BCRYPT_PREFIXES = ('$2a$', '$2b$', '$2y$')
+TEXT_FIELDS = ('name', 'phone_number', 'gender', 'social_login_id',
+               'bank_account')
+
+
+def to_django_hash(value):
+    """Return a legacy password hash in Django's encoding.
+
+    Accepts hashes already encoded by Django and bare bcrypt hashes;
+    raises ValueError for anything the configured hashers cannot check."""
+    if value.startswith(BCRYPT_PREFIXES):
+        value = 'bcrypt$' + value
+    # Raises ValueError when no configured hasher matches
+    identify_hasher(value)
+    return value
+
+
+def _init_worker():
+    if not apps.ready:
+        django.setup()
+
+
+def hash_passwords(passwords):
+    """Hash plain text passwords, run in the worker processes"""
+    return [make_password(password) for password in passwords]
+
+
+def _resolve(cache, name, field, errors):
+    if not name:
+        return None
+    try:
+        return cache.get_by_name(name).pk
+    except cache.model.DoesNotExist:
+        errors.append('Unknown %s "%s"' % (field, name))
+        return None
+
+
+def prepare_row(row):
+    """Return the User fields of a row and its errors"""
+    User = get_user_model()
+    errors = []
+    email = User.objects.normalize_email((row.get('email') or '').strip())
+    try:
+        validate_email(email)
+    except ValidationError:
+        errors.append('Invalid email "%s"' % email)
+
+    fields = {'email': email}
+    for field in TEXT_FIELDS:
+        fields[field] = (row.get(field) or '').strip()
+    try:
+        fields['point'] = int(row.get('point') or 0)
+    except (TypeError, ValueError):
+        errors.append('Invalid point "%s"' % row.get('point'))
+    fields['grade_id'] = _resolve(
+        reference.user_grades, row.get('grade'), 'grade', errors
+    )
+    fields['social_platform_id'] = _resolve(
+        reference.social_platforms, row.get('social_platform'),
+        'social_platform', errors,
+    )
+
+    if row.get('password_hash'):
+        try:
+            fields['password'] = to_django_hash(row['password_hash'])
+        except ValueError:
+            errors.append('Unsupported password hash')
+    return fields, errors
+
+
+def import_users(rows, executor=None, chunksize=16):
+    """Create the users of a batch of rows.
+
+    Plain text passwords are hashed by ``executor`` when given.  Returns
+    the number of users created, the number of rows skipped because the
+    email exists or was inserted concurrently, and the errors of the
+    invalid rows by row index."""
+    User = get_user_model()
+    prepared = {}
+    errors = {}
+    for index, row in enumerate(rows):
+        fields, row_errors = prepare_row(row)
+        if row_errors:
+            errors[index] = row_errors
+        elif fields['email'] in prepared:
+            errors[index] = ['Duplicate email "%s"' % fields['email']]
+        else:
+            prepared[fields['email']] = (fields, row.get('password') or None)
+
+    existing = set(User.objects.filter(
+        email__in=list(prepared)
+    ).values_list('email', flat=True))
+    pending = [
+        item for email, item in prepared.items() if email not in existing
+    ]
+
+    to_hash = [password for fields, password in pending
+               if 'password' not in fields]
+    if executor is None:
+        hashed = hash_passwords(to_hash)
+    else:
+        hashed = []
+        chunks = [
+            to_hash[start:start + chunksize]
+            for start in range(0, len(to_hash), chunksize)
+        ]
+        for result in executor.map(hash_passwords, chunks):
+            hashed.extend(result)
+    hashed = iter(hashed)
+
+    users = []
+    for fields, password in pending:
+        if 'password' not in fields:
+            fields = dict(fields, password=next(hashed))
+        users.append(User(**fields))
+    User.objects.bulk_create(users, ignore_conflicts=True)
+
+    # Rows a concurrent insert won were ignored; only the users stored
+    # with the hash of this batch were created by it
+    passwords = {user.email: user.password for user in users}
+    stored = User.objects.filter(email__in=list(passwords)).values_list(
+        'email', 'password'
+    )
+    created = sum(
+        1 for email, password in stored if passwords[email] == password
+    )
+    return created, len(prepared) - created, errors
@@ -0,0 +1,262 @@
+"""Login failure throttling and account locking.
+
+Failed logins are counted outside of the ``users`` table by a pluggable
+counter backend, in sliding windows keyed by email and by client address.
+A credential stuffing wave therefore never writes to the user rows that
+normal logins read.  The only user row write happens once per lock: the
+attempt that crosses the threshold flips ``is_lock`` with a conditional
+UPDATE, so concurrent attempts need no SELECT ... FOR UPDATE and only one
+of them increments ``lock_count``.
+
+Locks expire at ``locked_until``, after LOGIN_LOCK_DURATION doubled for
+every earlier lock of the account and capped at LOGIN_LOCK_MAX_DURATION.
+Accounts locked without an expiry stay locked until ``unlock_user`` is
+called.
+"""
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+class BaseCounterBackend:
+    """Count events per key over a sliding window of seconds"""
+
+    def hit(self, key, window):
+        """Record an event and return the number of events in the window"""
+        raise NotImplementedError
+
+    def count(self, key, window):
+        """Return the number of events in the window"""
+        raise NotImplementedError
+
+    def reset(self, key, window):
+        """Forget the events of the key in the window"""
+        raise NotImplementedError
+
+
+class LocalMemoryCounterBackend(BaseCounterBackend):
+    """Exact sliding windows kept in process memory.
+
+    Only suitable for tests and single process deployments."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = defaultdict(deque)
+
+    def _expire(self, events, window, now):
+        while events and events[0] <= now - window:
+            events.popleft()
+
+    def hit(self, key, window):
+        now = time.monotonic()
+        with self._lock:
+            events = self._events[key]
+            self._expire(events, window, now)
+            events.append(now)
+            return len(events)
+
+    def count(self, key, window):
+        now = time.monotonic()
+        with self._lock:
+            events = self._events.get(key)
+            if not events:
+                return 0
+            self._expire(events, window, now)
+            return len(events)
+
+    def reset(self, key, window):
+        with self._lock:
+            self._events.pop(key, None)
+
+
+class CacheCounterBackend(BaseCounterBackend):
+    """Sliding windows approximated with buckets in the shared cache.
+
+    The window is split in ``buckets`` slots; an event increments the
+    counter of the current slot with an atomic cache.incr and the count
+    is the sum of the slots covering the window."""
+
+    key_prefix = 'login-failures:'
+
+    def __init__(self, buckets=10):
+        self.buckets = buckets
+
+    def _bucket_keys(self, key, window):
+        size = max(window // self.buckets, 1)
+        current = int(time.time()) // size
+        return size, [
+            '%s%s:%d:%d' % (self.key_prefix, key, size, bucket)
+            for bucket in range(current - self.buckets + 1, current + 1)
+        ]
+
+    def hit(self, key, window):
+        size, keys = self._bucket_keys(key, window)
+        # add() only creates the slot, so concurrent hits are never lost
+        cache.add(keys[-1], 0, timeout=window + size)
+        try:
+            cache.incr(keys[-1])
+        except ValueError:
+            # The slot expired between add() and incr()
+            cache.set(keys[-1], 1, timeout=window + size)
+        return self.count(key, window)
+
+    def count(self, key, window):
+        _, keys = self._bucket_keys(key, window)
+        return sum(cache.get_many(keys).values())
+
+    def reset(self, key, window):
+        cache.delete_many(self._bucket_keys(key, window)[1])
+
+
+_counter = None
+_counter_lock = threading.Lock()
+
+
+def get_counter():
+    """Return the configured counter backend"""
+    global _counter
+    with _counter_lock:
+        if _counter is None:
+            _counter = import_string(settings.LOGIN_FAILURE_COUNTER)()
+    return _counter
+
+
+def reset_counter():
+    """Drop the counter backend so the next call loads it again"""
+    global _counter
+    with _counter_lock:
+        _counter = None
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+def email_key(email):
+    return 'email:' + normalize_email(email)
+
+
+def address_key(address):
+    return 'address:' + (address or '')
+
+
+def get_client_address(request):
+    """Return the address of the client to throttle, or None when the
+    address throttle is off.
+
+    With LOGIN_CLIENT_ADDRESS_HEADER set, the address is the one the
+    first of the LOGIN_TRUSTED_PROXY_COUNT proxies appended to the
+    header; the entries before it are sent by the client and can be
+    forged."""
+    if request is None or settings.LOGIN_FAILURE_IP_LIMIT is None:
+        return None
+    header = settings.LOGIN_CLIENT_ADDRESS_HEADER
+    if header:
+        addresses = [
+            address.strip()
+            for address in request.META.get(header, '').split(',')
+            if address.strip()
+        ]
+        proxies = settings.LOGIN_TRUSTED_PROXY_COUNT
+        if len(addresses) >= proxies:
+            return addresses[-proxies]
+    return request.META.get('REMOTE_ADDR')
+
+
+def is_throttled(email, address=None):
+    """Return True if logins for the email or from the address are
+    refused without checking the password"""
+    counter = get_counter()
+    if counter.count(
+        email_key(email), settings.LOGIN_FAILURE_WINDOW
+    ) >= settings.LOGIN_FAILURE_LIMIT:
+        return True
+    if address and counter.count(
+        address_key(address), settings.LOGIN_FAILURE_IP_WINDOW
+    ) >= settings.LOGIN_FAILURE_IP_LIMIT:
+        return True
+    return False
+
+
+def is_locked(user, now=None):
+    """Return True if the account is locked now"""
+    if not user.is_lock:
+        return False
+    if user.locked_until is None:
+        return True
+    return user.locked_until > (now or timezone.now())
+
+
+def lock_duration(lock_count):
+    """Return how long the next lock of an account locked ``lock_count``
+    times before lasts"""
+    seconds = settings.LOGIN_LOCK_DURATION * 2 ** min(lock_count, 32)
+    return timedelta(seconds=min(seconds, settings.LOGIN_LOCK_MAX_DURATION))
+
+
+def lock_user(user, failures):
+    """Lock an account unless it already is.
+
+    Returns True if this call locked it.  The update only matches the
+    lock count that was read, so of concurrent attempts relocking an
+    expired lock only one succeeds."""
+    now = timezone.now()
+    locked_until = now + lock_duration(user.lock_count)
+    locked = type(user).objects.filter(
+        Q(is_lock=False) | Q(locked_until__lte=now),
+        pk=user.pk,
+        lock_count=user.lock_count,
+    ).update(
+        is_lock=True,
+        locked_until=locked_until,
+        lock_count=F('lock_count') + 1,
+        login_fail_count=failures,
+        latest_try_login_date=now,
+    ) > 0
+    if locked:
+        user.is_lock = True
+        user.locked_until = locked_until
+        user.lock_count += 1
+    return locked
+
+
+def unlock_user(user):
+    """Unlock an account and forget its failed logins"""
+    get_counter().reset(
+        email_key(user.email), settings.LOGIN_FAILURE_WINDOW
+    )
+    type(user).objects.filter(pk=user.pk).update(
+        is_lock=False, locked_until=None, login_fail_count=0
+    )
+    user.is_lock = False
+    user.locked_until = None
+    user.login_fail_count = 0
+
+
+def record_failure(email, address=None, user=None):
+    """Count a failed login and lock the account of ``user``, if the email
+    belongs to one, at the threshold.
+
+    Returns True if the account got locked."""
+    counter = get_counter()
+    if address:
+        counter.hit(address_key(address), settings.LOGIN_FAILURE_IP_WINDOW)
+    failures = counter.hit(email_key(email), settings.LOGIN_FAILURE_WINDOW)
+    if user is not None and failures >= settings.LOGIN_FAILURE_LIMIT:
+        return lock_user(user, failures)
+    return False
+
+
+def record_success(email):
+    """Forget the failed logins of an email after a successful login"""
+    counter = get_counter()
+    key = email_key(email)
+    if counter.count(key, settings.LOGIN_FAILURE_WINDOW):
+        counter.reset(key, settings.LOGIN_FAILURE_WINDOW)
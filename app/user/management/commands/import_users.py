@@ -0,0 +1,94 @@
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.row_files import batched, read_rows
+from user import importing
+
+
+class Command(BaseCommand):
+    """Django command to import users from a JSON lines or CSV file"""
+    help = (
+        'Import users in batches, hashing plain text passwords on every '
+        'core. Rows with a password_hash column keep their legacy hash. '
+        'Invalid rows are reported and skipped, existing emails are left '
+        'untouched.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'),
+            help='Input format, guessed from the file extension by default',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Hashing processes, one per CPU by default, 0 to hash '
+                 'in this process',
+        )
+
+    def import_batches(self, rows, options, executor):
+        """Import the rows batch by batch, yielding (created, skipped,
+        failed)"""
+        offset = 0
+        started = time.monotonic()
+        for batch in batched(rows, options['batch_size']):
+            created, skipped, errors = importing.import_users(
+                batch, executor=executor
+            )
+            for index, row_errors in sorted(errors.items()):
+                self.stderr.write('Row %d: %s' % (
+                    offset + index + 1, '; '.join(row_errors)
+                ))
+            offset += len(batch)
+
+            elapsed = time.monotonic() - started
+            self.stdout.write('%d rows processed, %.0f rows/sec' % (
+                offset, offset / elapsed if elapsed else offset
+            ))
+            yield created, skipped, len(errors)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.lower().endswith('.csv') else 'jsonl'
+        )
+        workers = options['workers']
+        if workers is None:
+            workers = os.cpu_count()
+
+        executor = None
+        if workers:
+            executor = ProcessPoolExecutor(
+                max_workers=workers, initializer=importing._init_worker
+            )
+        try:
+            with open(path, newline='', encoding='utf-8') as stream:
+                rows = read_rows(stream, file_format)
+                try:
+                    batches = list(
+                        self.import_batches(rows, options, executor)
+                    )
+                except (ValueError, csv.Error) as exc:
+                    raise CommandError('Invalid input: %s' % exc)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        created = sum(batch[0] for batch in batches)
+        skipped = sum(batch[1] for batch in batches)
+        failed = sum(batch[2] for batch in batches)
+        message = 'Imported %d users, %d already existed' % (
+            created, skipped
+        )
+        if failed:
+            self.stdout.write(self.style.WARNING(
+                '%s, %d invalid rows' % (message, failed)
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,42 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from user import verification
+
+
+class Command(BaseCommand):
+    """Django command to delete expired phone verification codes"""
+    help = (
+        'Delete expired phone verification codes in small chunks, each in '
+        'its own transaction, so no lock is held for long'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument(
+            '--keep', type=int, default=0,
+            help='Keep codes for this many seconds after they expired',
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help='Seconds to wait between chunks',
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        before = timezone.now() - timedelta(seconds=options['keep'])
+        total = 0
+        for deleted in verification.purge_expired(
+            before, chunk_size=options['chunk_size']
+        ):
+            total += deleted
+            self.stdout.write('%d codes deleted' % total)
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(
+            'Deleted %d expired codes' % total
+        ))
@@ -0,0 +1,11 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_in
+from django.dispatch import receiver
+
+from user.activity import record_activity
+
+
+# Django still sets last_login on login; the activity is written behind
+@receiver(user_logged_in, sender=get_user_model())
+def record_login(sender, request, user, **kwargs):
+    record_activity(user.pk)
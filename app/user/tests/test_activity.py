@@ -0,0 +1,125 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from user.activity import ActivityRecorder, write_last_seen
+from user.middleware import LastSeenMiddleware
+
+
+def sample_user(email='test@test.com', password='testpass'):
+    """Create a sample user"""
+    return get_user_model().objects.create_user(
+        email=email,
+        password=password,
+        phone_number='01055525672',
+        name='kim',
+        gender='남성'
+    )
+
+
+class ActivityRecorderTests(TestCase):
+
+    def setUp(self):
+        self.user = sample_user()
+        self.other = sample_user(email='other@test.com')
+        self.now = timezone.now()
+        # No background thread, the tests flush explicitly
+        self.recorder = ActivityRecorder(flush_interval=0)
+
+    def test_save_does_not_touch_last_seen(self):
+        """Test saving a user leaves the activity timestamps alone"""
+        self.user.name = 'lee'
+        self.user.save()
+
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.recent_login)
+
+    def test_save_keeps_newer_last_seen(self):
+        """Test saving a user loaded before a flush does not move its
+        timestamps back"""
+        stale = get_user_model().objects.get(pk=self.user.pk)
+        self.recorder.record(self.user.pk, self.now)
+        self.recorder.flush()
+
+        stale.name = 'lee'
+        stale.save()
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'lee')
+        self.assertEqual(self.user.recent_login, self.now)
+        self.assertEqual(self.user.sleep_expiration_date, self.now)
+
+    def test_record_keeps_latest_timestamp(self):
+        """Test only the latest timestamp of a user is buffered"""
+        self.recorder.record(self.user.pk, self.now)
+        self.recorder.record(self.user.pk, self.now - timedelta(minutes=1))
+
+        self.assertEqual(self.recorder.pending(), {self.user.pk: self.now})
+
+    def test_flush_writes_batch(self):
+        """Test flushing writes every buffered user in batches"""
+        self.recorder.batch_size = 1
+        self.recorder.record(self.user.pk, self.now)
+        self.recorder.record(self.other.pk, self.now)
+
+        with self.assertNumQueries(2):
+            self.assertEqual(self.recorder.flush(), 2)
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.recent_login, self.now)
+        self.assertEqual(self.user.sleep_expiration_date, self.now)
+        self.assertIsNone(self.user.last_login)
+        self.assertEqual(self.recorder.pending(), {})
+
+    def test_flush_never_moves_back(self):
+        """Test an older timestamp does not overwrite a newer one"""
+        write_last_seen({self.user.pk: self.now})
+        write_last_seen({self.user.pk: self.now - timedelta(minutes=1)})
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.recent_login, self.now)
+
+    def test_failed_flush_keeps_buffer(self):
+        """Test timestamps are kept for the next flush when writing fails"""
+        self.recorder.record(self.user.pk, self.now)
+
+        with patch(
+            'user.activity.write_last_seen', side_effect=Exception
+        ):
+            self.assertEqual(self.recorder.flush(), 0)
+
+        self.assertEqual(self.recorder.pending(), {self.user.pk: self.now})
+
+    def test_authenticated_request_is_recorded(self):
+        """Test authenticated requests are recorded without a write"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        with patch('user.middleware.record_activity') as record_activity:
+            client.get('/api/product/')
+
+        record_activity.assert_called_once_with(self.user.pk)
+
+    def test_async_request_is_recorded(self):
+        """Test the middleware awaits async views instead of running them
+        in a thread"""
+        async def get_response(request):
+            return HttpResponse()
+
+        middleware = LastSeenMiddleware(get_response)
+        request = RequestFactory().get('/')
+        request.user = self.user
+
+        with patch('user.middleware.record_activity') as record_activity:
+            async_to_sync(middleware)(request)
+
+        self.assertTrue(iscoroutinefunction(middleware))
+        record_activity.assert_called_once_with(self.user.pk)
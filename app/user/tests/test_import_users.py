@@ -0,0 +1,125 @@
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from core import models
+from user import importing
+
+
+LEGACY_BCRYPT = (
+    '$2b$12$abcdefghijklmnopqrstuuB8u6yqPj3JcJ1mNlq4Jd2uS1CNkG0G6'
+)
+
+
+def sample_row(email='test@test.com', **params):
+    """Return a sample import row"""
+    row = {
+        'email': email,
+        'name': 'kim',
+        'phone_number': '01055525672',
+        'gender': '남성',
+        'password': 'testpass',
+    }
+    row.update(params)
+    return row
+
+
+class ImportUsersTests(TestCase):
+
+    def setUp(self):
+        self.grade = models.UserGrade.objects.create(grade='VIP')
+        self.platform = models.SocialPlatform.objects.create(platform='kakao')
+
+    def test_import_hashes_plain_passwords(self):
+        """Test plain text passwords are hashed with the default hasher"""
+        created, skipped, errors = importing.import_users([
+            sample_row(grade='VIP', social_platform='kakao',
+                       social_login_id='123'),
+        ])
+
+        self.assertEqual((created, skipped, errors), (1, 0, {}))
+        user = get_user_model().objects.get(email='test@test.com')
+        self.assertTrue(user.check_password('testpass'))
+        self.assertEqual(user.grade, self.grade)
+        self.assertEqual(user.social_platform, self.platform)
+
+    def test_import_keeps_legacy_hash(self):
+        """Test pre-hashed legacy passwords are stored without rehashing"""
+        importing.import_users([
+            sample_row(password='', password_hash=LEGACY_BCRYPT),
+        ])
+
+        user = get_user_model().objects.get(email='test@test.com')
+        self.assertEqual(user.password, 'bcrypt$' + LEGACY_BCRYPT)
+
+    def test_import_rejects_unknown_hash(self):
+        """Test hashes no configured hasher can check are rejected"""
+        _, _, errors = importing.import_users([
+            sample_row(password_hash='5f4dcc3b5aa765d61d8327deb882cf99'),
+        ])
+
+        self.assertEqual(errors, {0: ['Unsupported password hash']})
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_import_skips_existing_and_duplicate_emails(self):
+        """Test existing emails are skipped and duplicates reported"""
+        get_user_model().objects.create_user(
+            email='test@test.com', password='other'
+        )
+
+        created, skipped, errors = importing.import_users([
+            sample_row(),
+            sample_row(email='new@test.com'),
+            sample_row(email='new@test.com'),
+            sample_row(email='invalid', grade='unknown'),
+        ])
+
+        self.assertEqual((created, skipped), (1, 1))
+        self.assertEqual(sorted(errors), [2, 3])
+        self.assertEqual(len(errors[3]), 2)
+        self.assertTrue(
+            get_user_model().objects.get(
+                email='test@test.com'
+            ).check_password('other')
+        )
+
+    def test_import_counts_concurrent_insert_as_skipped(self):
+        """Test a row another import inserted first is not counted as
+        created"""
+        hash_passwords = importing.hash_passwords
+
+        def hash_during_concurrent_insert(passwords):
+            get_user_model().objects.create_user(
+                email='test@test.com', password='other'
+            )
+            return hash_passwords(passwords)
+
+        with patch('user.importing.hash_passwords',
+                   side_effect=hash_during_concurrent_insert):
+            created, skipped, _ = importing.import_users([sample_row()])
+
+        self.assertEqual((created, skipped), (0, 1))
+
+    def test_import_users_command(self):
+        """Test importing users from a CSV file"""
+        with tempfile.NamedTemporaryFile(
+            'w', suffix='.csv', delete=False, encoding='utf-8'
+        ) as stream:
+            stream.write('email,name,phone_number,gender,password\n')
+            stream.write('a@test.com,kim,010,남성,testpass\n')
+            stream.write('b@test.com,lee,010,여성,testpass\n')
+        self.addCleanup(os.remove, stream.name)
+
+        out = StringIO()
+        call_command(
+            'import_users', stream.name, '--workers', '0', stdout=out
+        )
+
+        self.assertIn('rows/sec', out.getvalue())
+        self.assertIn('Imported 2 users, 0 already existed', out.getvalue())
+        self.assertEqual(get_user_model().objects.count(), 2)
@@ -0,0 +1,221 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import authenticate, get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from user import lockout
+
+
+def sample_user(email='test@test.com', password='testpass'):
+    """Create a sample user"""
+    return get_user_model().objects.create_user(
+        email=email,
+        password=password,
+        phone_number='01055525672',
+        name='kim',
+        gender='남성'
+    )
+
+
+class CounterBackendTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_local_memory_window_slides(self):
+        """Test events older than the window are no longer counted"""
+        counter = lockout.LocalMemoryCounterBackend()
+        with patch('user.lockout.time.monotonic', return_value=100.0):
+            counter.hit('key', 60)
+            counter.hit('key', 60)
+        with patch('user.lockout.time.monotonic', return_value=150.0):
+            self.assertEqual(counter.hit('key', 60), 3)
+        with patch('user.lockout.time.monotonic', return_value=165.0):
+            self.assertEqual(counter.count('key', 60), 1)
+
+    def test_cache_counter_window_slides(self):
+        """Test cache buckets older than the window are no longer counted"""
+        counter = lockout.CacheCounterBackend(buckets=6)
+        with patch('user.lockout.time.time', return_value=600.0):
+            counter.hit('key', 60)
+            counter.hit('key', 60)
+        with patch('user.lockout.time.time', return_value=650.0):
+            self.assertEqual(counter.hit('key', 60), 3)
+        with patch('user.lockout.time.time', return_value=665.0):
+            self.assertEqual(counter.count('key', 60), 1)
+
+    def test_cache_counter_reset(self):
+        """Test resetting a key forgets its events"""
+        counter = lockout.CacheCounterBackend()
+        counter.hit('key', 60)
+        counter.reset('key', 60)
+
+        self.assertEqual(counter.count('key', 60), 0)
+
+
+@override_settings(
+    LOGIN_FAILURE_COUNTER='user.lockout.LocalMemoryCounterBackend',
+    LOGIN_FAILURE_LIMIT=3,
+    LOGIN_FAILURE_IP_LIMIT=5,
+)
+class LockoutBackendTests(TestCase):
+
+    def setUp(self):
+        lockout.reset_counter()
+        self.addCleanup(lockout.reset_counter)
+        self.user = sample_user()
+
+    def login(self, password, email='test@test.com', address='10.0.0.1'):
+        request = RequestFactory().post('/', REMOTE_ADDR=address)
+        return authenticate(request, email=email, password=password)
+
+    def test_login_success(self):
+        """Test a correct password authenticates the user"""
+        self.assertEqual(self.login('testpass'), self.user)
+
+    def test_failures_below_limit_do_not_touch_user_row(self):
+        """Test failed logins below the limit write nothing to users"""
+        with self.assertNumQueries(2):
+            self.assertIsNone(self.login('wrong'))
+            self.assertIsNone(self.login('wrong'))
+
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_lock)
+        self.assertEqual(self.user.login_fail_count, 0)
+
+    def test_account_locks_at_limit(self):
+        """Test the account locks once when the limit is reached"""
+        for _ in range(3):
+            self.login('wrong')
+        self.assertIsNone(self.login('testpass'))
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_lock)
+        self.assertEqual(self.user.lock_count, 1)
+        self.assertEqual(self.user.login_fail_count, 3)
+
+    def test_lock_is_a_conditional_update(self):
+        """Test locking an already locked account changes nothing"""
+        self.assertTrue(lockout.lock_user(self.user, 3))
+        self.assertFalse(lockout.lock_user(self.user, 4))
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.lock_count, 1)
+
+    def test_locked_account_refused_after_window(self):
+        """Test a locked account stays locked when the counter expires"""
+        lockout.lock_user(self.user, 3)
+        lockout.get_counter().reset(lockout.email_key(self.user.email), 0)
+
+        self.assertIsNone(self.login('testpass'))
+
+    def test_lock_expires(self):
+        """Test a locked account can log in once the lock expired"""
+        lockout.lock_user(self.user, 3)
+        lockout.get_counter().reset(lockout.email_key(self.user.email), 0)
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+
+        self.assertEqual(self.login('testpass'), self.user)
+
+    @override_settings(LOGIN_LOCK_DURATION=60, LOGIN_LOCK_MAX_DURATION=150)
+    def test_lock_duration_backs_off(self):
+        """Test every further lock lasts twice as long, up to the
+        maximum"""
+        self.assertEqual(lockout.lock_duration(0), timedelta(seconds=60))
+        self.assertEqual(lockout.lock_duration(1), timedelta(seconds=120))
+        self.assertEqual(lockout.lock_duration(2), timedelta(seconds=150))
+
+    def test_expired_lock_relocks_longer(self):
+        """Test locking again after a lock expired counts the lock"""
+        lockout.lock_user(self.user, 3)
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        self.user.refresh_from_db()
+
+        self.assertTrue(lockout.lock_user(self.user, 3))
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.lock_count, 2)
+        self.assertGreater(
+            self.user.locked_until,
+            timezone.now() + lockout.lock_duration(0),
+        )
+
+    def test_unlock_user(self):
+        """Test unlocking an account lets the user log in again"""
+        for _ in range(3):
+            self.login('wrong')
+
+        lockout.unlock_user(self.user)
+
+        self.assertEqual(self.login('testpass'), self.user)
+
+    def test_success_resets_failures(self):
+        """Test a successful login forgets earlier failures"""
+        self.login('wrong')
+        self.login('wrong')
+        self.login('testpass')
+        self.login('wrong')
+
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_lock)
+
+    def test_address_is_throttled(self):
+        """Test an address with too many failures is refused early"""
+        for index in range(5):
+            self.login('wrong', email='user%d@test.com' % index)
+
+        with self.assertNumQueries(0):
+            self.assertIsNone(self.login('testpass'))
+        self.assertEqual(
+            self.login('testpass', address='10.0.0.2'), self.user
+        )
+
+    @override_settings(LOGIN_CLIENT_ADDRESS_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_address_behind_proxy(self):
+        """Test clients behind a proxy are throttled by the address the
+        proxy forwarded, not the proxy's own"""
+        request = RequestFactory().post(
+            '/', REMOTE_ADDR='10.0.0.254',
+            HTTP_X_FORWARDED_FOR='1.2.3.4, 203.0.113.7',
+        )
+        self.assertEqual(lockout.get_client_address(request), '203.0.113.7')
+
+        for index in range(5):
+            request = RequestFactory().post(
+                '/', REMOTE_ADDR='10.0.0.254',
+                HTTP_X_FORWARDED_FOR='203.0.113.7',
+            )
+            authenticate(
+                request, email='user%d@test.com' % index, password='wrong'
+            )
+
+        request = RequestFactory().post(
+            '/', REMOTE_ADDR='10.0.0.254', HTTP_X_FORWARDED_FOR='203.0.113.8'
+        )
+        self.assertEqual(
+            authenticate(request, email='test@test.com', password='testpass'),
+            self.user,
+        )
+
+    @override_settings(LOGIN_FAILURE_IP_LIMIT=None)
+    def test_address_throttle_disabled(self):
+        """Test the address throttle can be turned off"""
+        for index in range(5):
+            self.login('wrong', email='user%d@test.com' % index)
+
+        self.assertEqual(self.login('testpass'), self.user)
+
+    def test_unknown_email_is_throttled(self):
+        """Test failures for unknown emails are counted as well"""
+        for _ in range(3):
+            self.assertIsNone(self.login('wrong', email='no@test.com'))
+
+        self.assertTrue(lockout.is_throttled('no@test.com'))
@@ -0,0 +1,136 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from core.models import PhoneAuthorization
+from user import lockout, verification
+
+
+PHONE_NUMBER = '01055525672'
+
+
+@override_settings(
+    LOGIN_FAILURE_COUNTER='user.lockout.LocalMemoryCounterBackend',
+    PHONE_CODE_ISSUE_LIMIT=2,
+    PHONE_CODE_MAX_ATTEMPTS=2,
+)
+class PhoneVerificationTests(TestCase):
+
+    def setUp(self):
+        lockout.reset_counter()
+        self.addCleanup(lockout.reset_counter)
+
+    def test_issue_code(self):
+        """Test issuing a code that expires after the TTL"""
+        code = verification.issue_code(PHONE_NUMBER)
+
+        self.assertEqual(len(code.authorization_number), 6)
+        self.assertTrue(code.authorization_number.isdigit())
+        self.assertEqual(
+            code.expires_at - code.issued_at, timedelta(minutes=3)
+        )
+
+    def test_issue_rate_limit(self):
+        """Test a number cannot get more codes than the limit"""
+        verification.issue_code(PHONE_NUMBER)
+        verification.issue_code(PHONE_NUMBER)
+
+        with self.assertRaises(verification.RateLimitExceeded):
+            verification.issue_code(PHONE_NUMBER)
+        verification.issue_code('01000000000')
+
+    def test_issue_limit_decided_by_hit(self):
+        """Test the limit holds when the count read before issuing is
+        stale, as with concurrent requests"""
+        with patch.object(
+            lockout.LocalMemoryCounterBackend, 'count', return_value=0
+        ):
+            verification.issue_code(PHONE_NUMBER)
+            verification.issue_code(PHONE_NUMBER)
+
+            with self.assertRaises(verification.RateLimitExceeded):
+                verification.issue_code(PHONE_NUMBER)
+
+        self.assertEqual(
+            PhoneAuthorization.objects.filter(
+                phone_number=PHONE_NUMBER
+            ).count(),
+            2,
+        )
+
+    def test_verify_code_once(self):
+        """Test a matching code verifies only once"""
+        code = verification.issue_code(PHONE_NUMBER)
+
+        verified = verification.verify_code(
+            PHONE_NUMBER, code.authorization_number
+        )
+
+        self.assertIsNotNone(verified.verified_at)
+        with self.assertRaises(verification.VerificationError):
+            verification.verify_code(PHONE_NUMBER, code.authorization_number)
+
+    def test_only_latest_code_verifies(self):
+        """Test an older code is replaced by a newer one"""
+        now = timezone.now()
+        PhoneAuthorization.objects.create(
+            phone_number=PHONE_NUMBER,
+            authorization_number='111111',
+            issued_at=now - timedelta(seconds=10),
+        )
+        PhoneAuthorization.objects.create(
+            phone_number=PHONE_NUMBER,
+            authorization_number='222222',
+            issued_at=now,
+        )
+
+        with self.assertRaises(verification.VerificationError):
+            verification.verify_code(PHONE_NUMBER, '111111')
+        verification.verify_code(PHONE_NUMBER, '222222')
+
+    def test_expired_code_does_not_verify(self):
+        """Test a code cannot be used after it expired"""
+        code = verification.issue_code(PHONE_NUMBER)
+        PhoneAuthorization.objects.filter(pk=code.pk).update(
+            expires_at=timezone.now()
+        )
+
+        with self.assertRaises(verification.VerificationError):
+            verification.verify_code(PHONE_NUMBER, code.authorization_number)
+
+    def test_wrong_guesses_exhaust_code(self):
+        """Test a code is unusable after too many wrong guesses"""
+        code = verification.issue_code(PHONE_NUMBER)
+        for _ in range(2):
+            with self.assertRaises(verification.VerificationError):
+                verification.verify_code(PHONE_NUMBER, 'wrong')
+
+        with self.assertRaises(verification.VerificationError):
+            verification.verify_code(PHONE_NUMBER, code.authorization_number)
+
+    def test_purge_command(self):
+        """Test the purge deletes only expired codes, in chunks"""
+        now = timezone.now()
+        for _ in range(3):
+            PhoneAuthorization.objects.create(
+                phone_number=PHONE_NUMBER,
+                authorization_number='1234',
+                expires_at=now - timedelta(minutes=1),
+            )
+        valid = verification.issue_code(PHONE_NUMBER)
+
+        out = StringIO()
+        call_command(
+            'purge_phone_authorizations', '--chunk-size', '2', stdout=out
+        )
+
+        self.assertIn('Deleted 3 expired codes', out.getvalue())
+        self.assertEqual(
+            list(PhoneAuthorization.objects.values_list('pk', flat=True)),
+            [valid.pk]
+        )
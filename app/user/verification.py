@@ -0,0 +1,114 @@
+"""Phone number verification codes.
+
+Codes expire after PHONE_CODE_TTL seconds and can be used once.  Lookups
+go through the (phone_number, issued_at) index and only consider the
+latest code of a number; expired rows are removed in chunks by the
+purge_phone_authorizations command.  Issuing is limited per number with
+the same counter backend as failed logins, so a sign-up spike does not
+add queries to count recent codes.
+"""
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+
+from core.models import PhoneAuthorization
+from user.lockout import get_counter
+
+
+class VerificationError(Exception):
+    """Raised when a code cannot be issued or does not verify"""
+
+
+class RateLimitExceeded(VerificationError):
+    """Raised when too many codes were issued for a number"""
+
+
+def generate_code(length=None):
+    length = length or settings.PHONE_CODE_LENGTH
+    return ''.join(secrets.choice('0123456789') for _ in range(length))
+
+
+def _issue_key(phone_number):
+    return 'phone-code:' + phone_number
+
+
+def issue_code(phone_number):
+    """Create and return a new code for a number"""
+    counter = get_counter()
+    key = _issue_key(phone_number)
+    window = settings.PHONE_CODE_ISSUE_WINDOW
+    # Counting with the hit itself lets no concurrent request slip in
+    # between a check and the hit; refused requests count as well
+    if counter.hit(key, window) > settings.PHONE_CODE_ISSUE_LIMIT:
+        raise RateLimitExceeded(
+            'Too many codes were issued for %s' % phone_number
+        )
+
+    now = timezone.now()
+    return PhoneAuthorization.objects.create(
+        phone_number=phone_number,
+        authorization_number=generate_code(),
+        issued_at=now,
+        expires_at=now + timedelta(seconds=settings.PHONE_CODE_TTL),
+    )
+
+
+def verify_code(phone_number, code):
+    """Consume the latest code of a number if it matches.
+
+    Raises VerificationError if there is no usable code or it does not
+    match.  Every wrong guess counts towards PHONE_CODE_MAX_ATTEMPTS."""
+    now = timezone.now()
+    latest = (
+        PhoneAuthorization.objects.filter(
+            phone_number=phone_number,
+            issued_at__gt=now - timedelta(seconds=settings.PHONE_CODE_TTL),
+        )
+        .order_by('-issued_at')
+        .first()
+    )
+    if (
+        latest is None
+        or latest.verified_at is not None
+        or latest.expires_at <= now
+        or latest.attempts >= settings.PHONE_CODE_MAX_ATTEMPTS
+    ):
+        raise VerificationError('There is no valid code for this number')
+
+    usable = PhoneAuthorization.objects.filter(
+        pk=latest.pk,
+        verified_at__isnull=True,
+        attempts__lt=settings.PHONE_CODE_MAX_ATTEMPTS,
+    )
+    if not constant_time_compare(latest.authorization_number, code or ''):
+        usable.update(attempts=F('attempts') + 1)
+        raise VerificationError('The code does not match')
+    # Only one of two concurrent requests with the right code wins
+    if not usable.update(verified_at=now):
+        raise VerificationError('There is no valid code for this number')
+    latest.verified_at = now
+    return latest
+
+
+def purge_expired(before=None, chunk_size=1000):
+    """Delete codes that expired before ``before`` in short transactions.
+
+    Yields the number of rows deleted per chunk."""
+    before = before or timezone.now()
+    expired = PhoneAuthorization.objects.filter(
+        expires_at__lt=before
+    ).order_by('expires_at')
+    while True:
+        ids = list(expired.values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return
+        with transaction.atomic():
+            deleted, _ = PhoneAuthorization.objects.filter(
+                pk__in=ids
+            ).delete()
+        yield deleted